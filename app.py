@@ -9,24 +9,37 @@ Redesigned: Configuration on welcome screen, then transitions to chatbot after i
 """
 
 import streamlit as st
+import pandas as pd
+import dataclasses
+import functools
+import hashlib
+import math
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from typing import Dict, Any, Optional
 
 import sys
 from pathlib import Path
 
-sys.path.insert(0, str(Path(__file__).parent / "query_processing"))
+# Streamlit re-executes this script on every rerun; only add the path once per process
+QUERY_PROCESSING_PATH = str(Path(__file__).parent / "query_processing")
+if QUERY_PROCESSING_PATH not in sys.path:
+    sys.path.insert(0, QUERY_PROCESSING_PATH)
 
 # These imports will work once the path is set correctly
 try:
     from query_processing.config import PipelineConfig
-    from query_processing.models import Recommendation
+    from query_processing.models import Recommendation, PROVIDER_ICONS
     from query_processing.query_processor import QueryProcessor
     from query_processing.retriever import HybridRetriever
     from query_processing.reranker import LLMReranker
     from query_processing.scorer import MultiDimensionalScorer
-    from query_processing.llm_client import LLMClient, EmbeddingClient
+    from query_processing.llm_client import LLMClient, EmbeddingClient, CachedEmbeddingClient
     from query_processing.prompts import SUMMARY_SYSTEM, SUMMARY_PROMPT
+    from query_processing.semantic_cache import SemanticQueryCache
+    from query_processing.batcher import CoalescingEmbedder
     IMPORTS_AVAILABLE = True
 except ImportError as e:
     IMPORTS_AVAILABLE = False
@@ -92,108 +105,188 @@ st.markdown("""
 # Helper Functions
 # ==============================================================================
 
+@functools.lru_cache(maxsize=8)
 def get_provider_icon(provider: str) -> str:
     """Get icon for provider"""
-    icons = {'aws': '🔶', 'gcp': '🔵', 'azure': '🔷'}
-    return icons.get(provider.lower(), '☁️')
+    return PROVIDER_ICONS.get(provider.lower(), '☁️')
+
+
+def _rec_key(rec: Recommendation) -> tuple:
+    """
+    Hashable identity of a recommendation card (scores rounded so float noise still hits)
+
+    Matches and concerns depend on the query, not the service, so they are part of the key.
+    """
+    return (rec.service_id, rec.provider, rec.rank, round(rec.relevance_score, 4), round(rec.final_score, 4),
+            tuple(rec.matches), tuple(rec.concerns))
+
+
+@st.cache_data(max_entries=4096, show_spinner=False)
+def _build_card_text(rec_key: tuple, _rec: Recommendation) -> Dict[str, str]:
+    """
+    Format every string shown on a recommendation card.
+
+    Memoized on _rec_key(rec), so re-rendering the cards of past chat messages on
+    each rerun is a dict lookup instead of rebuilding the markdown.
+    """
+    return {
+        'rank': f"### #{_rec.rank}",
+        'title': f"**{_rec.icon} {_rec.service_name}**",
+        'caption': f"{_rec.provider.upper()} | {_rec.category} | {_rec.region}",
+        'score': f"{_rec.relevance_score:.1f}/10",
+        'specs': f"**Specs:** {_rec.specs_summary}",
+        'pricing': f"**Pricing:** {_rec.pricing_summary}",
+        'features': f"**Features:** {_rec.features_short}" if _rec.key_features else "",
+        'matches': f"✓ {_rec.matches_short}" if _rec.matches else "",
+        'concerns': f"⚠ {_rec.concerns_short}" if _rec.concerns else "",
+        'description': f"**Description:** {_rec.description[:500]}...",
+        'service_id': f"**Service ID:** `{_rec.service_id}`",
+        'final_score': f"**Final Score:** {_rec.final_score:.4f}",
+    }
 
 
 def render_recommendation_card(rec: Recommendation):
     """Render a recommendation as a styled card"""
-    provider_icon = get_provider_icon(rec.provider)
+    text = _build_card_text(_rec_key(rec), rec)
 
     with st.container():
         col1, col2, col3 = st.columns([0.5, 3, 1])
 
         with col1:
-            st.markdown(f"### #{rec.rank}")
+            st.markdown(text['rank'])
 
         with col2:
-            st.markdown(f"**{provider_icon} {rec.service_name}**")
-            st.caption(f"{rec.provider.upper()} | {rec.category} | {rec.region}")
+            st.markdown(text['title'])
+            st.caption(text['caption'])
 
         with col3:
-            st.metric("Score", f"{rec.relevance_score:.1f}/10")
+            st.metric("Score", text['score'])
 
-        st.markdown(f"**Specs:** {rec.specs_summary}")
-        st.markdown(f"**Pricing:** {rec.pricing_summary}")
+        st.markdown(text['specs'])
+        st.markdown(text['pricing'])
 
-        if rec.key_features:
-            st.markdown(f"**Features:** {', '.join(rec.key_features[:4])}")
+        if text['features']:
+            st.markdown(text['features'])
 
-        if rec.matches:
-            st.success(f"✓ {' | '.join(rec.matches[:3])}")
+        if text['matches']:
+            st.success(text['matches'])
 
-        if rec.concerns:
-            st.warning(f"⚠ {' | '.join(rec.concerns[:2])}")
+        if text['concerns']:
+            st.warning(text['concerns'])
 
         with st.expander("View Details"):
-            st.markdown(f"**Description:** {rec.description[:500]}...")
-            st.markdown(f"**Service ID:** `{rec.service_id}`")
-            st.markdown(f"**Final Score:** {rec.final_score:.4f}")
+            st.markdown(text['description'])
+            st.markdown(text['service_id'])
+            st.markdown(text['final_score'])
 
         st.divider()
 
 
-def render_additional_recommendations_table(recommendations: list):
-    """Render additional recommendations (beyond top 5) in an expandable table"""
+ADDITIONAL_PAGE_SIZE = 25
+ADDITIONAL_COLUMNS = ["Rank", "Provider", "Service", "Category", "Score", "Specs", "Pricing", "Region"]
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def _build_additional_page(page_key: tuple, page: int, _page_recs: list):
+    """
+    Build the dataframe for one page of additional recommendations.
+
+    Memoized on the page's (rank, service_id, score) tuples and page number; the
+    recommendation objects themselves are excluded from the cache key.
+    """
+    rows = (
+        (
+            f"#{rec.rank}",
+            f"{rec.icon} {rec.provider.upper()}",
+            rec.service_name,
+            rec.category,
+            f"{rec.relevance_score:.1f}/10",
+            rec.specs_short,
+            rec.pricing_summary,
+            rec.region
+        )
+        for rec in _page_recs
+    )
+    return pd.DataFrame.from_records(rows, columns=ADDITIONAL_COLUMNS)
+
+
+def render_additional_page(additional_recs: list, key: str) -> list:
+    """
+    Render one page of the additional recommendations table
+
+    Args:
+        additional_recs: Recommendations beyond the top 5
+        key: Widget key for the page selector
+
+    Returns:
+        Recommendations on the current page
+    """
+    num_pages = math.ceil(len(additional_recs) / ADDITIONAL_PAGE_SIZE)
+    page = 1
+    if num_pages > 1:
+        page = st.number_input("Page", min_value=1, max_value=num_pages, value=1, step=1, key=key)
+
+    page_recs = additional_recs[(page - 1) * ADDITIONAL_PAGE_SIZE:page * ADDITIONAL_PAGE_SIZE]
+    page_key = tuple((rec.rank, rec.service_id, rec.relevance_score) for rec in page_recs)
+    df = _build_additional_page(page_key, page, page_recs)
+
+    st.dataframe(
+        df,
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "Rank": st.column_config.TextColumn("Rank", width="small"),
+            "Provider": st.column_config.TextColumn("Provider", width="small"),
+            "Service": st.column_config.TextColumn("Service", width="medium"),
+            "Category": st.column_config.TextColumn("Category", width="small"),
+            "Score": st.column_config.TextColumn("Score", width="small"),
+            "Specs": st.column_config.TextColumn("Specs", width="medium"),
+            "Pricing": st.column_config.TextColumn("Pricing", width="medium"),
+            "Region": st.column_config.TextColumn("Region", width="small"),
+        }
+    )
+
+    return page_recs
+
+
+def render_additional(recommendations: list, key_suffix: str = 'current', lazy: bool = False):
+    """
+    Render additional recommendations (beyond top 5) in an expandable table
+
+    Args:
+        recommendations: All recommendations for a query
+        key_suffix: Makes widget keys unique per chat message (e.g. the history index)
+        lazy: Build the table only after "Show full table" is ticked (used for history
+            messages, whose collapsed expanders would otherwise be rebuilt on every rerun)
+    """
     if len(recommendations) <= 5:
         return
 
     additional_recs = recommendations[5:]
 
     with st.expander(f"📊 View {len(additional_recs)} More Recommendations", expanded=False):
-        # Prepare data for the table
-        table_data = []
-        for rec in additional_recs:
-            provider_icon = get_provider_icon(rec.provider)
-            table_data.append({
-                "Rank": f"#{rec.rank}",
-                "Provider": f"{provider_icon} {rec.provider.upper()}",
-                "Service": rec.service_name,
-                "Category": rec.category,
-                "Score": f"{rec.relevance_score:.1f}/10",
-                "Specs": rec.specs_summary[:50] + "..." if len(rec.specs_summary) > 50 else rec.specs_summary,
-                "Pricing": rec.pricing_summary,
-                "Region": rec.region
-            })
+        if lazy and not st.checkbox("Show full table", key=f"_expanded_{key_suffix}"):
+            return
 
-        # Display as dataframe
-        import pandas as pd
-        df = pd.DataFrame(table_data)
-
-        st.dataframe(
-            df,
-            use_container_width=True,
-            hide_index=True,
-            column_config={
-                "Rank": st.column_config.TextColumn("Rank", width="small"),
-                "Provider": st.column_config.TextColumn("Provider", width="small"),
-                "Service": st.column_config.TextColumn("Service", width="medium"),
-                "Category": st.column_config.TextColumn("Category", width="small"),
-                "Score": st.column_config.TextColumn("Score", width="small"),
-                "Specs": st.column_config.TextColumn("Specs", width="medium"),
-                "Pricing": st.column_config.TextColumn("Pricing", width="medium"),
-                "Region": st.column_config.TextColumn("Region", width="small"),
-            }
-        )
+        page_recs = render_additional_page(additional_recs, key=f"additional_rec_page_{key_suffix}")
 
         # Option to view details of any additional recommendation
         st.markdown("---")
         st.markdown("**View detailed information:**")
 
+        # Labels map straight to their recommendation (not to a list position)
+        options = {f"#{rec.rank} - {rec.service_name} ({rec.provider.upper()})": rec for rec in page_recs}
         selected_rank = st.selectbox(
             "Select a recommendation to view details",
-            options=[f"#{rec.rank} - {rec.service_name} ({rec.provider.upper()})" for rec in additional_recs],
-            key="additional_rec_selector"
+            options=list(options),
+            key=f"additional_rec_selector_{key_suffix}"
         )
 
         if selected_rank:
             # Find the selected recommendation
-            selected_idx = int(selected_rank.split("#")[1].split(" -")[0]) - 1
-            selected_rec = recommendations[selected_idx]
+            selected_rec = options[selected_rank]
 
-            st.markdown(f"### {get_provider_icon(selected_rec.provider)} {selected_rec.service_name}")
+            st.markdown(f"### {selected_rec.icon} {selected_rec.service_name}")
 
             detail_col1, detail_col2 = st.columns(2)
 
@@ -222,200 +315,344 @@ def render_additional_recommendations_table(recommendations: list):
             st.code(f"Service ID: {selected_rec.service_id}")
 
 
-def render_additional_recommendations_table_history(recommendations: list, msg_idx: int):
-    """Render additional recommendations table for chat history with unique keys"""
-    if len(recommendations) <= 5:
-        return
+def _config_key() -> tuple:
+    """Collect the session settings that make up the pipeline configuration"""
+    return (
+        st.session_state.get('ollama_host', 'http://localhost:11434'),
+        st.session_state.get('chat_model', 'gemma3:4b'),
+        st.session_state.get('embedding_model', 'embeddinggemma:300m'),
+        st.session_state.get('use_qdrant_cloud', False),
+        st.session_state.get('qdrant_url', ''),
+        st.session_state.get('qdrant_api_key', ''),
+        st.session_state.get('qdrant_host', 'localhost'),
+        st.session_state.get('qdrant_port', 6333),
+        st.session_state.get('collection_name', 'cloud_services'),
+        st.session_state.get('dense_top_k', 30),
+        st.session_state.get('sparse_top_k', 30),
+        st.session_state.get('fusion_top_k', 25),
+        st.session_state.get('max_rerank_candidates', 20),
+        st.session_state.get('top_k', 5),
+    )
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _build_config(key: tuple) -> PipelineConfig:
+    """Build a PipelineConfig from a settings tuple (see _config_key)"""
+    (ollama_host, chat_model, embedding_model, use_qdrant_cloud, qdrant_url, qdrant_api_key, qdrant_host,
+     qdrant_port, collection_name, dense_top_k, sparse_top_k, fusion_top_k, max_rerank_candidates, top_k) = key
 
-    additional_recs = recommendations[5:]
+    config = PipelineConfig()
 
-    with st.expander(f"📊 View {len(additional_recs)} More Recommendations", expanded=False):
-        # Prepare data for the table
-        table_data = []
-        for rec in additional_recs:
-            provider_icon = get_provider_icon(rec.provider)
-            table_data.append({
-                "Rank": f"#{rec.rank}",
-                "Provider": f"{provider_icon} {rec.provider.upper()}",
-                "Service": rec.service_name,
-                "Category": rec.category,
-                "Score": f"{rec.relevance_score:.1f}/10",
-                "Specs": rec.specs_summary[:50] + "..." if len(rec.specs_summary) > 50 else rec.specs_summary,
-                "Pricing": rec.pricing_summary,
-                "Region": rec.region
-            })
+    # Ollama settings
+    config.ollama.host = ollama_host
+    config.ollama.chat_model = chat_model
+    config.ollama.embedding_model = embedding_model
 
-        # Display as dataframe
-        import pandas as pd
-        df = pd.DataFrame(table_data)
-
-        st.dataframe(
-            df,
-            use_container_width=True,
-            hide_index=True,
-            column_config={
-                "Rank": st.column_config.TextColumn("Rank", width="small"),
-                "Provider": st.column_config.TextColumn("Provider", width="small"),
-                "Service": st.column_config.TextColumn("Service", width="medium"),
-                "Category": st.column_config.TextColumn("Category", width="small"),
-                "Score": st.column_config.TextColumn("Score", width="small"),
-                "Specs": st.column_config.TextColumn("Specs", width="medium"),
-                "Pricing": st.column_config.TextColumn("Pricing", width="medium"),
-                "Region": st.column_config.TextColumn("Region", width="small"),
-            }
-        )
+    # Qdrant settings
+    if use_qdrant_cloud:
+        config.qdrant.url = qdrant_url or None
+        config.qdrant.api_key = qdrant_api_key or None
+        config.qdrant.host = None
+        config.qdrant.port = None
+    else:
+        config.qdrant.url = None
+        config.qdrant.api_key = None
+        config.qdrant.host = qdrant_host
+        config.qdrant.port = qdrant_port
 
-        # Option to view details of any additional recommendation
-        st.markdown("---")
-        st.markdown("**View detailed information:**")
+    config.qdrant.collection_name = collection_name
 
-        selected_rank = st.selectbox(
-            "Select a recommendation to view details",
-            options=[f"#{rec.rank} - {rec.service_name} ({rec.provider.upper()})" for rec in additional_recs],
-            key=f"additional_rec_selector_history_{msg_idx}"
-        )
+    # Retrieval settings
+    config.retrieval.dense_top_k = dense_top_k
+    config.retrieval.sparse_top_k = sparse_top_k
+    config.retrieval.fusion_top_k = fusion_top_k
 
-        if selected_rank:
-            # Find the selected recommendation
-            selected_idx = int(selected_rank.split("#")[1].split(" -")[0]) - 1
-            selected_rec = recommendations[selected_idx]
+    # Reranking settings
+    config.reranking.max_candidates = max_rerank_candidates
 
-            st.markdown(f"### {get_provider_icon(selected_rec.provider)} {selected_rec.service_name}")
+    # Output settings
+    config.top_k_results = top_k
 
-            detail_col1, detail_col2 = st.columns(2)
+    return config
 
-            with detail_col1:
-                st.markdown(f"**Provider:** {selected_rec.provider.upper()}")
-                st.markdown(f"**Category:** {selected_rec.category}")
-                st.markdown(f"**Region:** {selected_rec.region}")
-                st.markdown(f"**Relevance Score:** {selected_rec.relevance_score:.1f}/10")
-                st.markdown(f"**Final Score:** {selected_rec.final_score:.4f}")
 
-            with detail_col2:
-                st.markdown(f"**Specs:** {selected_rec.specs_summary}")
-                st.markdown(f"**Pricing:** {selected_rec.pricing_summary}")
+def create_config_from_session() -> PipelineConfig:
+    """Create PipelineConfig from session state"""
+    return _build_config(_config_key())
 
-            st.markdown(f"**Description:** {selected_rec.description}")
 
-            if selected_rec.key_features:
-                st.markdown(f"**Features:** {', '.join(selected_rec.key_features)}")
+# ==============================================================================
+# Cached Pipeline Components
+# ==============================================================================
+# Streamlit reruns the whole script on every interaction, so each component is
+# built once per distinct set of settings and shared across reruns and sessions.
+# Only hashable scalars are passed in so the cache keys stay stable.
 
-            if selected_rec.matches:
-                st.success(f"✓ Matches: {' | '.join(selected_rec.matches)}")
+@st.cache_resource(show_spinner=False)
+def get_llm_client(host: str, model: str, temperature: float, keep_alive: Optional[str] = None) -> LLMClient:
+    """Get a shared LLM client for summary generation"""
+    return LLMClient(host=host, model=model, temperature=temperature, keep_alive=keep_alive)
 
-            if selected_rec.concerns:
-                st.warning(f"⚠ Concerns: {' | '.join(selected_rec.concerns)}")
 
-            st.code(f"Service ID: {selected_rec.service_id}")
+@st.cache_resource(show_spinner=False)
+def get_embedder(host: str, model: str) -> CachedEmbeddingClient:
+    """
+    Get a shared embedding client backed by the on-disk embedding cache.
 
+    Cache misses go through a CoalescingEmbedder, so queries arriving together
+    from different sessions are embedded in one batched request.
+    """
+    return CachedEmbeddingClient(CoalescingEmbedder(EmbeddingClient(host=host, model=model)))
 
-def create_config_from_session() -> PipelineConfig:
-    """Create PipelineConfig from session state"""
+
+@st.cache_resource(show_spinner=False)
+def get_query_processor(host: str, model: str, temperature: float, timeout: int) -> QueryProcessor:
+    """Get a shared query processor"""
+    config = PipelineConfig()
+    config.ollama.host = host
+    config.ollama.chat_model = model
+    config.ollama.temperature = temperature
+    config.ollama.timeout = timeout
+    return QueryProcessor(config)
+
+
+@st.cache_resource(show_spinner=False)
+def get_retriever(host: str, embedding_model: str, qdrant_url: Optional[str], qdrant_api_key: Optional[str],
+                  qdrant_host: Optional[str], qdrant_port: Optional[int], collection_name: str,
+                  dense_top_k: int, sparse_top_k: int, fusion_top_k: int) -> HybridRetriever:
+    """Get a shared hybrid retriever (the BM25 index is built only once)"""
     config = PipelineConfig()
+    config.ollama.host = host
+    config.ollama.embedding_model = embedding_model
+    config.qdrant.url = qdrant_url
+    config.qdrant.api_key = qdrant_api_key
+    config.qdrant.host = qdrant_host
+    config.qdrant.port = qdrant_port
+    config.qdrant.collection_name = collection_name
+    config.retrieval.dense_top_k = dense_top_k
+    config.retrieval.sparse_top_k = sparse_top_k
+    config.retrieval.fusion_top_k = fusion_top_k
+    return HybridRetriever(config, embedder=get_embedder(host, embedding_model))
+
+
+@st.cache_resource(show_spinner=False)
+def get_reranker(host: str, model: str, temperature: float, timeout: int,
+                 max_candidates: int, top_k_results: int) -> LLMReranker:
+    """Get a shared LLM reranker"""
+    config = PipelineConfig()
+    config.ollama.host = host
+    config.ollama.chat_model = model
+    config.ollama.temperature = temperature
+    config.ollama.timeout = timeout
+    config.reranking.max_candidates = max_candidates
+    config.top_k_results = top_k_results
+    return LLMReranker(config)
 
-    # Ollama settings
-    config.ollama.host = st.session_state.get('ollama_host', 'http://localhost:11434')
-    config.ollama.chat_model = st.session_state.get('chat_model', 'gemma3:4b')
-    config.ollama.embedding_model = st.session_state.get('embedding_model', 'embeddinggemma:300m')
 
-    # Qdrant settings
-    if st.session_state.get('use_qdrant_cloud', False):
-        config.qdrant.url = st.session_state.get('qdrant_url', '') or None
-        config.qdrant.api_key = st.session_state.get('qdrant_api_key', '') or None
-        config.qdrant.host = None
-        config.qdrant.port = None
-    else:
-        config.qdrant.url = None
-        config.qdrant.api_key = None
-        config.qdrant.host = st.session_state.get('qdrant_host', 'localhost')
-        config.qdrant.port = st.session_state.get('qdrant_port', 6333)
+@st.cache_resource(show_spinner=False)
+def get_semantic_cache(host: str, embedding_model: str) -> SemanticQueryCache:
+    """Get the shared semantic query cache (persisted under ./cache)"""
+    return SemanticQueryCache(get_embedder(host, embedding_model))
 
-    config.qdrant.collection_name = st.session_state.get('collection_name', 'cloud_services')
 
-    # Retrieval settings
-    config.retrieval.dense_top_k = st.session_state.get('dense_top_k', 30)
-    config.retrieval.sparse_top_k = st.session_state.get('sparse_top_k', 30)
-    config.retrieval.fusion_top_k = st.session_state.get('fusion_top_k', 25)
+@st.cache_resource(show_spinner=False)
+def get_scorer(top_k_results: int) -> MultiDimensionalScorer:
+    """Get a shared multi-dimensional scorer"""
+    config = PipelineConfig()
+    config.top_k_results = top_k_results
+    return MultiDimensionalScorer(config)
+
+
+def _pipeline_steps(config: PipelineConfig) -> dict:
+    """
+    Pipeline build steps for a config
+
+    Returns:
+        step_key -> (status text, builder, dependencies)
+    """
+    return {
+        'llm_client': ("Connecting to LLM (Ollama)...", lambda: get_llm_client(
+            config.ollama.host,
+            config.ollama.chat_model,
+            config.ollama.temperature,
+            config.ollama.keep_alive
+        ), []),
+        'embedder': ("Connecting to embedding model...", lambda: get_embedder(
+            config.ollama.host,
+            config.ollama.embedding_model
+        ), []),
+        'query_processor': ("Initializing query processor...", lambda: get_query_processor(
+            config.ollama.host,
+            config.ollama.chat_model,
+            config.ollama.temperature,
+            config.ollama.timeout
+        ), []),
+        'scorer': ("Initializing scorer...", lambda: get_scorer(config.top_k_results), []),
+        'retriever': ("Building retriever and BM25 index...", lambda: get_retriever(
+            config.ollama.host,
+            config.ollama.embedding_model,
+            config.qdrant.url,
+            config.qdrant.api_key,
+            config.qdrant.host,
+            config.qdrant.port,
+            config.qdrant.collection_name,
+            config.retrieval.dense_top_k,
+            config.retrieval.sparse_top_k,
+            config.retrieval.fusion_top_k
+        ), ['embedder']),
+        'reranker': ("Initializing reranker...", lambda: get_reranker(
+            config.ollama.host,
+            config.ollama.chat_model,
+            config.ollama.temperature,
+            config.ollama.timeout,
+            config.reranking.max_candidates,
+            config.top_k_results
+        ), ['llm_client']),
+    }
 
-    # Reranking settings
-    config.reranking.max_candidates = st.session_state.get('max_rerank_candidates', 20)
 
-    # Output settings
-    config.top_k_results = st.session_state.get('top_k', 5)
+@st.cache_resource(show_spinner=False)
+def _prewarm_events() -> Dict[str, threading.Event]:
+    """Process-wide map of config hash -> event set when that config's prewarm finished"""
+    return {}
 
-    return config
 
+def _warm_pipeline(config: PipelineConfig, done: threading.Event):
+    """
+    Build the pipeline components in the background and exercise them once
 
-def initialize_pipeline() -> Optional[dict]:
-    """Initialize all pipeline components"""
-    config = create_config_from_session()
+    Runs before the user initializes the pipeline, so the cached factories
+    are already populated, the BM25 scorer (and any JIT kernel) has run and
+    Ollama has the models loaded.
+    """
+    try:
+        steps = _pipeline_steps(config)
+        components = {}
 
-    progress_container = st.empty()
-    status_container = st.empty()
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            futures = {key: pool.submit(builder) for key, (_, builder, deps) in steps.items() if not deps}
+            for key, future in futures.items():
+                components[key] = future.result()
 
-    steps = [
-        ("Connecting to LLM (Ollama)...", "llm"),
-        ("Connecting to embedding model...", "embedder"),
-        ("Initializing query processor...", "query_processor"),
-        ("Building retriever and BM25 index...", "retriever"),
-        ("Initializing reranker...", "reranker"),
-        ("Initializing scorer...", "scorer"),
-    ]
+        for key, (_, builder, deps) in steps.items():
+            if deps:
+                components[key] = builder()
 
-    components = {}
+        components['embedder'].embed("warm up")
+        components['retriever'].bm25_index.search("warm up", top_k=1)
+        components['llm_client'].generate("", max_tokens=1)
+        print("✅ Pipeline prewarmed")
+
+    except Exception as e:
+        print(f"  Pipeline prewarm failed: {str(e)}")
+
+    finally:
+        done.set()
+
+
+PREWARM_EVENTS_MAX = 8
 
-    progress_bar = progress_container.progress(0)
 
-    for i, (step_text, step_key) in enumerate(steps):
-        status_container.info(f"🔄 {step_text}")
-        progress_bar.progress((i) / len(steps))
+def prewarm_pipeline(config: PipelineConfig):
+    """Start a background prewarm for a config (once per process and config)"""
+    events = _prewarm_events()
+    key = _config_hash(config)
+
+    if key in events:
+        return
+
+    # Forget finished prewarms once the map grows; their components stay in the resource caches
+    if len(events) >= PREWARM_EVENTS_MAX:
+        for done_key in [k for k, event in events.items() if event.is_set()]:
+            del events[done_key]
+
+    events[key] = threading.Event()
+    threading.Thread(target=_warm_pipeline, args=(config, events[key]), name="pipeline-prewarm",
+                     daemon=True).start()
 
-        try:
-            if step_key == "llm":
-                components['llm_client'] = LLMClient(
-                    host=config.ollama.host,
-                    model=config.ollama.chat_model,
-                    temperature=config.ollama.temperature
-                )
 
-            elif step_key == "embedder":
-                components['embedder'] = EmbeddingClient(
-                    host=config.ollama.host,
-                    model=config.ollama.embedding_model
-                )
+@st.cache_resource(show_spinner=False)
+def _pipeline_registry() -> Dict[str, dict]:
+    """Process-wide map of config hash -> initialized pipeline, shared by all sessions"""
+    return {}
+
+
+def initialize_pipeline() -> Optional[dict]:
+    """Initialize all pipeline components (reusing one already built for the same settings)"""
+    config = create_config_from_session()
+    config_hash = _config_hash(config)
 
-            elif step_key == "query_processor":
-                components['query_processor'] = QueryProcessor(config)
+    registry = _pipeline_registry()
+    if config_hash in registry:
+        st.toast("✅ Pipeline ready (shared)")
+        return registry[config_hash]
 
-            elif step_key == "retriever":
-                components['retriever'] = HybridRetriever(config)
+    progress_container = st.empty()
+    status_container = st.empty()
 
-            elif step_key == "reranker":
-                components['reranker'] = LLMReranker(config)
+    # Let a running prewarm of the same config finish; its components are then cache hits
+    warm_event = _prewarm_events().get(config_hash)
+    if warm_event is not None and not warm_event.is_set():
+        status_container.info("🔄 Finishing pipeline warm-up...")
+        warm_event.wait(timeout=30)
 
-            elif step_key == "scorer":
-                components['scorer'] = MultiDimensionalScorer(config)
+    # Steps without dependencies start immediately; dependents start as soon
+    # as their dependencies finish.
+    steps = _pipeline_steps(config)
 
-            time.sleep(0.2)  # Brief pause for visual feedback
+    components = {}
+    pending = dict(steps)
+    running = {}
 
-        except Exception as e:
-            progress_container.empty()
-            status_container.error(f"❌ Failed at: {step_text}\n\nError: {str(e)}")
-            return None
+    progress_bar = progress_container.progress(0)
 
-    progress_bar.progress(1.0)
-    status_container.success("✅ Pipeline initialized successfully!")
-    time.sleep(1)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        while pending or running:
+            # Start every step whose dependencies are ready
+            for step_key, (step_text, builder, deps) in list(pending.items()):
+                if all(dep in components for dep in deps):
+                    running[pool.submit(builder)] = step_key
+                    del pending[step_key]
+
+            status_container.info("🔄 " + " ".join(steps[k][0] for k in running.values()))
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                step_key = running.pop(future)
+                try:
+                    components[step_key] = future.result()
+                except Exception as e:
+                    for other in running:
+                        other.cancel()
+                    progress_container.empty()
+                    status_container.error(f"❌ Failed at: {steps[step_key][0]}\n\nError: {str(e)}")
+                    return None
+
+            progress_bar.progress(len(components) / len(steps))
 
     progress_container.empty()
     status_container.empty()
+    st.toast("✅ Pipeline initialized successfully!")
 
     components['config'] = config
+    registry[config_hash] = components
     return components
 
 
-def process_query(query: str, pipeline: dict, top_k: int = 5) -> Dict[str, Any]:
-    """Process a user query through the full pipeline"""
+def _config_hash(config: PipelineConfig) -> str:
+    """Stable digest of the pipeline settings, used as a cache key"""
+    return hashlib.blake2b(repr(config).encode(), digest_size=16).hexdigest()
+
+
+@st.cache_data(ttl=3600, max_entries=256, show_spinner="Running recommendation pipeline...")
+def _cached_process(query: str, config_hash: str, top_k: int, _pipeline: dict) -> Dict[str, Any]:
+    """
+    Run the full 4-stage pipeline for a query.
+
+    Memoized on (query, config_hash, top_k); the pipeline itself is unhashable and is
+    excluded from the cache key by its leading underscore. This function must stay free
+    of UI side effects so a cache hit renders exactly like a fresh run.
+    """
     results = {
         'stages': {},
         'recommendations': [],
@@ -425,22 +662,7 @@ def process_query(query: str, pipeline: dict, top_k: int = 5) -> Dict[str, Any]:
 
     # Stage 1: Query Understanding
     stage1_start = time.time()
-    with st.status("**Stage 1:** Query Understanding", expanded=False) as status:
-        st.write("Extracting requirements from query...")
-
-        requirements = pipeline['query_processor'].process(query)
-
-        st.write("**Extracted Requirements:**")
-        req_dict = requirements.to_dict()
-        relevant_reqs = {k: v for k, v in req_dict.items()
-                         if v and k not in ['raw_query', 'expanded_query']}
-        st.json(relevant_reqs)
-
-        st.write("**Expanded Query:**")
-        expanded = requirements.expanded_query
-        st.code(expanded[:300] + "..." if len(expanded) > 300 else expanded)
-
-        status.update(label="✅ Stage 1: Query Understanding Complete", state="complete")
+    requirements = _pipeline['query_processor'].process(query)
 
     results['stages']['query_understanding'] = {
         'requirements': requirements.to_dict(),
@@ -448,21 +670,13 @@ def process_query(query: str, pipeline: dict, top_k: int = 5) -> Dict[str, Any]:
     }
     results['timing']['stage1'] = time.time() - stage1_start
 
-    # Stage 2: Hybrid Retrieval
+    # Stage 2: Hybrid Retrieval (the reranker prompt prefix is prefilled in parallel)
     stage2_start = time.time()
-    with st.status("**Stage 2:** Hybrid Retrieval", expanded=False) as status:
-        st.write("Performing hybrid search (dense + sparse)...")
-
-        candidates = pipeline['retriever'].retrieve(requirements)
+    warm_pool = ThreadPoolExecutor(max_workers=1)
+    warm_future = warm_pool.submit(_pipeline['reranker'].warm, requirements)
+    warm_pool.shutdown(wait=False)
 
-        st.write(f"**Retrieved:** {len(candidates)} candidates after fusion")
-
-        if candidates:
-            st.write("**Top Retrieved Candidates:**")
-            for i, c in enumerate(candidates[:5], 1):
-                st.write(f"{i}. {c.service_name} ({c.provider}) - Fusion: {c.fusion_score:.4f}")
-
-        status.update(label=f"✅ Stage 2: Retrieved {len(candidates)} candidates", state="complete")
+    candidates = _pipeline['retriever'].retrieve(requirements)
 
     results['stages']['retrieval'] = {
         'candidate_count': len(candidates),
@@ -472,21 +686,12 @@ def process_query(query: str, pipeline: dict, top_k: int = 5) -> Dict[str, Any]:
     results['timing']['stage2'] = time.time() - stage2_start
 
     if not candidates:
-        st.error("No candidates found. Try broadening your search criteria.")
         return results
 
     # Stage 3: LLM Reranking
     stage3_start = time.time()
-    with st.status("**Stage 3:** LLM Reranking", expanded=False) as status:
-        st.write(f"Reranking {len(candidates)} candidates with pairwise comparisons...")
-
-        scored_candidates = pipeline['reranker'].rerank(requirements, candidates)
-
-        st.write("**Reranked Order:**")
-        for i, s in enumerate(scored_candidates[:5], 1):
-            st.write(f"{i}. {s.candidate.service_name} ({s.candidate.provider}) - Score: {s.llm_relevance_score:.1f}/10")
-
-        status.update(label=f"✅ Stage 3: Reranked {len(scored_candidates)} candidates", state="complete")
+    warm_future.result()
+    scored_candidates = _pipeline['reranker'].rerank(requirements, candidates)
 
     results['stages']['reranking'] = {
         'reranked_count': len(scored_candidates),
@@ -497,26 +702,11 @@ def process_query(query: str, pipeline: dict, top_k: int = 5) -> Dict[str, Any]:
     results['timing']['stage3'] = time.time() - stage3_start
 
     if not scored_candidates:
-        st.error("No candidates passed reranking.")
         return results
 
     # Stage 4: Multi-dimensional Scoring
     stage4_start = time.time()
-    with st.status("**Stage 4:** Multi-dimensional Scoring", expanded=False) as status:
-        st.write("Computing feature-based scores and final ranking...")
-
-        all_recommendations = pipeline['scorer'].score_and_rank(requirements, scored_candidates)
-        # Keep all recommendations but note how many are "top" results
-        recommendations = all_recommendations
-
-        st.write("**Final Ranking (Top 5):**")
-        for rec in recommendations[:5]:
-            st.write(f"#{rec.rank}: {rec.service_name} ({rec.provider}) - Final: {rec.final_score:.4f}")
-
-        if len(recommendations) > 5:
-            st.write(f"*...and {len(recommendations) - 5} more candidates*")
-
-        status.update(label=f"✅ Stage 4: Generated {len(recommendations)} recommendations", state="complete")
+    recommendations = _pipeline['scorer'].score_and_rank(requirements, scored_candidates)
 
     results['stages']['scoring'] = {
         'recommendations_count': len(recommendations),
@@ -527,35 +717,268 @@ def process_query(query: str, pipeline: dict, top_k: int = 5) -> Dict[str, Any]:
     results['timing']['stage4'] = time.time() - stage4_start
     results['recommendations'] = recommendations
 
-    # Generate summary
-    with st.status("Generating summary...", expanded=False) as status:
-        rec_summary = []
-        for rec in recommendations[:5]:
-            rec_summary.append(
-                f"#{rec.rank}: {rec.service_name} ({rec.provider.upper()}) - "
-                f"Score: {rec.relevance_score}/10 - {rec.pricing_summary}"
-            )
+    # Summary prompt (generated and streamed outside the cache by render_summary)
+    rec_summary = []
+    for rec in recommendations[:5]:
+        rec_summary.append(
+            f"#{rec.rank}: {rec.service_name} ({rec.provider.upper()}) - "
+            f"Score: {rec.relevance_score}/10 - {rec.pricing_summary}"
+        )
+
+    results['summary_prompt'] = SUMMARY_PROMPT.format(
+        query=query,
+        recommendations='\n'.join(rec_summary)
+    )
+
+    return results
+
+
+def render_pipeline_stages(results: Dict[str, Any]):
+    """Render the per-stage status panels from a pipeline results dict"""
+    stages = results['stages']
+
+    # Stage 1: Query Understanding
+    understanding = stages['query_understanding']
+    with st.status("✅ Stage 1: Query Understanding Complete", state="complete", expanded=False):
+        st.write("**Extracted Requirements:**")
+        relevant_reqs = {k: v for k, v in understanding['requirements'].items()
+                         if v and k not in ['raw_query', 'expanded_query']}
+        st.json(relevant_reqs)
+
+        st.write("**Expanded Query:**")
+        expanded = understanding['expanded_query']
+        st.code(expanded[:300] + "..." if len(expanded) > 300 else expanded)
+
+    # Stage 2: Hybrid Retrieval
+    retrieval = stages['retrieval']
+    candidate_count = retrieval['candidate_count']
+    with st.status(f"✅ Stage 2: Retrieved {candidate_count} candidates", state="complete", expanded=False):
+        st.write(f"**Retrieved:** {candidate_count} candidates after fusion")
+
+        if retrieval['top_candidates']:
+            st.write("**Top Retrieved Candidates:**")
+            for i, c in enumerate(retrieval['top_candidates'][:5], 1):
+                st.write(f"{i}. {c['name']} ({c['provider']}) - Fusion: {c['score']:.4f}")
+
+    if not candidate_count:
+        st.error("No candidates found. Try broadening your search criteria.")
+        return
+
+    # Stage 3: LLM Reranking
+    reranking = stages['reranking']
+    with st.status(f"✅ Stage 3: Reranked {reranking['reranked_count']} candidates", state="complete",
+                   expanded=False):
+        st.write("**Reranked Order:**")
+        for i, s in enumerate(reranking['top_reranked'][:5], 1):
+            st.write(f"{i}. {s['name']} ({s['provider']}) - Score: {s['score']:.1f}/10")
+
+    if not reranking['reranked_count']:
+        st.error("No candidates passed reranking.")
+        return
+
+    # Stage 4: Multi-dimensional Scoring
+    scoring = stages['scoring']
+    count = scoring['recommendations_count']
+    with st.status(f"✅ Stage 4: Generated {count} recommendations", state="complete", expanded=False):
+        st.write("**Final Ranking (Top 5):**")
+        for r in scoring['final_ranking'][:5]:
+            st.write(f"#{r['rank']}: {r['name']} ({r['provider']}) - Final: {r['final_score']:.4f}")
+
+        if count > 5:
+            st.write(f"*...and {count - 5} more candidates*")
+
+
+# Minimum seconds between redraws of streamed text
+STREAM_THROTTLE_INTERVALS = {'off': 0.0, 'balanced': 0.05, 'strong': 0.15}
+
+
+def _throttled_stream(chunks, placeholder, interval: float = 0.05) -> str:
+    """
+    Render streamed text into a placeholder, redrawing at most once per interval
+
+    Args:
+        chunks: Iterator of text chunks
+        placeholder: st.empty() placeholder to draw into
+        interval: Minimum seconds between redraws (0 redraws on every chunk)
+
+    Returns:
+        Full streamed text
+    """
+    buf = ""
+    last = 0.0
+
+    for chunk in chunks:
+        buf += chunk
+        now = time.monotonic()
+        if now - last >= interval:
+            placeholder.markdown(buf + "▌")
+            last = now
+
+    # Final flush
+    if buf:
+        placeholder.markdown(buf)
+    return buf
+
+
+SUMMARY_CACHE_MAX = 512  # generated summaries kept per process
+
 
-        prompt = SUMMARY_PROMPT.format(
-            query=query,
-            recommendations='\n'.join(rec_summary)
+@st.cache_resource(show_spinner=False)
+def _summary_cache() -> "OrderedDict[str, str]":
+    """Process-wide LRU of generated summaries, keyed by model + prompt digest"""
+    return OrderedDict()
+
+
+@st.cache_resource(show_spinner=False)
+def _summary_cache_lock() -> threading.Lock:
+    """Guards _summary_cache across sessions"""
+    return threading.Lock()
+
+
+def render_summary(results: Dict[str, Any], pipeline: dict) -> str:
+    """
+    Render the recommendation summary, streaming tokens on first generation
+
+    Args:
+        results: Pipeline results from process_query
+        pipeline: Initialized pipeline components
+
+    Returns:
+        Full summary text
+    """
+    prompt = results.get('summary_prompt')
+    if not prompt:
+        return results['summary']
+
+    model = pipeline['config'].ollama.chat_model
+    key = hashlib.blake2b((model + "\0" + prompt).encode(), digest_size=16).hexdigest()
+    summaries = _summary_cache()
+
+    with _summary_cache_lock():
+        cached = summaries.get(key)
+        if cached is not None:
+            summaries.move_to_end(key)
+
+    if cached is not None:
+        st.markdown(cached)
+        return cached
+
+    placeholder = st.empty()
+    interval = STREAM_THROTTLE_INTERVALS.get(st.session_state.get('stream_throttle', 'balanced'), 0.05)
+    summary = _throttled_stream(
+        pipeline['llm_client'].generate_stream(prompt, system_prompt=SUMMARY_SYSTEM, max_tokens=500),
+        placeholder,
+        interval
+    )
+
+    if not summary:
+        top = results['recommendations'][0]
+        summary = (
+            f"Based on your requirements, the top recommendation is {top.service_name} "
+            f"from {top.provider.upper()}. {top.explanation}"
         )
+        placeholder.markdown(summary)
+    else:
+        with _summary_cache_lock():
+            summaries[key] = summary
+            summaries.move_to_end(key)
+            while len(summaries) > SUMMARY_CACHE_MAX:
+                summaries.popitem(last=False)
 
-        summary = pipeline['llm_client'].generate(prompt, system_prompt=SUMMARY_SYSTEM, max_tokens=500)
+    return summary
 
-        if not summary and recommendations:
-            top = recommendations[0]
-            summary = (
-                f"Based on your requirements, the top recommendation is {top.service_name} "
-                f"from {top.provider.upper()}. {top.explanation}"
-            )
 
-        results['summary'] = summary
-        status.update(label="✅ Summary generated", state="complete")
+def process_query(query: str, pipeline: dict, top_k: int = 5) -> Dict[str, Any]:
+    """Process a user query through the full pipeline"""
+    config = pipeline['config']
+    config_hash = _config_hash(config)
+    namespace = f"{config_hash}|{top_k}"
+
+    # Paraphrases of earlier queries are served from the semantic cache
+    semantic_cache = get_semantic_cache(config.ollama.host, config.ollama.embedding_model)
+    cached = semantic_cache.get(query, namespace=namespace)
+
+    if cached is not None:
+        results = dict(cached)
+    else:
+        results = _cached_process(query, config_hash, top_k, pipeline)
+        if results['recommendations']:
+            semantic_cache.put(query, dict(results), namespace=namespace)
 
+    results['query_key'] = hashlib.blake2b(f"{config_hash}|{top_k}|{query}".encode(), digest_size=16).hexdigest()
+    render_pipeline_stages(results)
     return results
 
 
+# ==============================================================================
+# Recommendation Store
+# ==============================================================================
+# Chat history keeps only service_id references; the Recommendation objects live
+# once in a process-wide LRU map shared by all sessions. A service recommended
+# again replaces its entry, so history shows its most recent scores and matches.
+
+REC_STORE_MAX = 500
+
+
+@st.cache_resource(show_spinner=False)
+def get_rec_store() -> "OrderedDict[str, Recommendation]":
+    """Get the shared recommendation store, keyed by service_id"""
+    return OrderedDict()
+
+
+@st.cache_resource(show_spinner=False)
+def _rec_store_lock() -> threading.Lock:
+    """Lock guarding the shared recommendation store across sessions"""
+    return threading.Lock()
+
+
+def store_recommendations(recommendations: list) -> list:
+    """
+    Add a query's recommendations to the shared store
+
+    Args:
+        recommendations: Recommendations to store
+
+    Returns:
+        List of service_ids referencing the stored recommendations
+    """
+    store = get_rec_store()
+    with _rec_store_lock():
+        for rec in recommendations:
+            store[rec.service_id] = rec
+            store.move_to_end(rec.service_id)
+
+        # Free the least recently used entries
+        while len(store) > REC_STORE_MAX:
+            store.popitem(last=False)
+
+    return [rec.service_id for rec in recommendations]
+
+
+def load_recommendations(rec_ids: list) -> tuple:
+    """
+    Look up stored recommendations by reference
+
+    Args:
+        rec_ids: service_ids returned by store_recommendations, in rank order
+
+    Returns:
+        (Recommendation objects still in the store, number of evicted ids)
+    """
+    store = get_rec_store()
+    recommendations = []
+    with _rec_store_lock():
+        for rank, service_id in enumerate(rec_ids, start=1):
+            rec = store.get(service_id)
+            if rec is None:
+                continue
+            store.move_to_end(service_id)
+            # The stored object may come from a later query; keep this message's ranking
+            recommendations.append(rec if rec.rank == rank else dataclasses.replace(rec, rank=rank))
+
+    return recommendations, len(rec_ids) - len(recommendations)
+
+
 # ==============================================================================
 # Welcome/Configuration Screen
 # ==============================================================================
@@ -707,6 +1130,14 @@ def render_welcome_screen():
                 help="Maximum candidates for LLM reranking"
             )
 
+            st.select_slider(
+                "Streaming UI Throttle",
+                options=list(STREAM_THROTTLE_INTERVALS),
+                value=st.session_state.get('stream_throttle', 'balanced'),
+                key='stream_throttle',
+                help="How often streamed summary text is redrawn (off = every token)"
+            )
+
     st.divider()
 
     # Initialize button
@@ -754,6 +1185,54 @@ def render_welcome_screen():
 # Chatbot Screen
 # ==============================================================================
 
+@st.fragment
+def render_history_message(message: dict, msg_idx: int):
+    """
+    Render one past chat message.
+
+    Each message is its own fragment, so interacting with a history widget
+    (table page, details selector) reruns only that message, not the whole chat.
+    """
+    with st.chat_message(message['role']):
+        if message['role'] == 'user':
+            st.markdown(message['content'])
+            return
+
+        if 'summary' in message:
+            st.markdown(message['summary'])
+
+        recommendations, evicted = load_recommendations(message['rec_ids']) \
+            if message.get('rec_ids') else ([], 0)
+
+        if evicted:
+            st.caption(f"⚠ {evicted} of {len(message['rec_ids'])} recommendations from this answer are no "
+                       f"longer cached; ask again to see them.")
+
+        if recommendations:
+            st.subheader("📋 Top 5 Recommendations")
+            # Show top 5 as cards
+            for rec in recommendations[:5]:
+                render_recommendation_card(rec)
+
+            # Show additional recommendations in expandable table
+            if len(recommendations) > 5:
+                render_additional(recommendations, key_suffix=str(msg_idx), lazy=True)
+
+            if 'total_time' in message:
+                st.caption(f"⏱️ Total processing time: {message['total_time']:.2f}s | "
+                           f"Total candidates: {message['num_candidates']}")
+
+        if 'stages' in message:
+            with st.expander("🔍 View Pipeline Details"):
+                st.json(message['stages'])
+
+
+def render_history():
+    """Render the chat history"""
+    for msg_idx, message in enumerate(st.session_state['messages']):
+        render_history_message(message, msg_idx)
+
+
 def render_chatbot_screen():
     """Render the chatbot interface"""
 
@@ -765,7 +1244,7 @@ def render_chatbot_screen():
 
     with header_col2:
         if st.button("🔄 Reset", help="Go back to configuration"):
-            # Clear pipeline and reset state
+            # Drop this session's reference; the shared pipeline stays cached for the next init
             if 'pipeline' in st.session_state:
                 del st.session_state['pipeline']
             st.session_state['initialized'] = False
@@ -781,30 +1260,7 @@ def render_chatbot_screen():
         st.session_state['messages'] = []
 
     # Display chat history
-    for msg_idx, message in enumerate(st.session_state['messages']):
-        with st.chat_message(message['role']):
-            if message['role'] == 'user':
-                st.markdown(message['content'])
-            else:
-                if 'summary' in message:
-                    st.markdown(message['summary'])
-
-                if 'recommendations' in message and message['recommendations']:
-                    st.subheader("📋 Top 5 Recommendations")
-                    # Show top 5 as cards
-                    for rec in message['recommendations'][:5]:
-                        render_recommendation_card(rec)
-
-                    # Show additional recommendations in expandable table
-                    if len(message['recommendations']) > 5:
-                        render_additional_recommendations_table_history(
-                            message['recommendations'],
-                            msg_idx
-                        )
-
-                if 'stages' in message:
-                    with st.expander("🔍 View Pipeline Details"):
-                        st.json(message['stages'])
+    render_history()
 
     # Example queries for new users
     if not st.session_state['messages']:
@@ -841,8 +1297,12 @@ def render_chatbot_screen():
                 top_k=st.session_state.get('top_k', 5)
             )
 
+            # Computed once here and stored on the message for history reruns
+            total_time = sum(results['timing'].values())
+            num_candidates = len(results['recommendations'])
+
             if results['recommendations']:
-                st.markdown(results['summary'])
+                results['summary'] = render_summary(results, st.session_state['pipeline'])
                 st.subheader("📋 Top 5 Recommendations")
 
                 # Show top 5 as cards
@@ -850,16 +1310,18 @@ def render_chatbot_screen():
                     render_recommendation_card(rec)
 
                 # Show additional recommendations in expandable table
-                render_additional_recommendations_table(results['recommendations'])
+                render_additional(results['recommendations'])
 
-                total_time = sum(results['timing'].values())
-                st.caption(f"⏱️ Total processing time: {total_time:.2f}s | Total candidates: {len(results['recommendations'])}")
+                st.caption(f"⏱️ Total processing time: {total_time:.2f}s | Total candidates: {num_candidates}")
 
             st.session_state['messages'].append({
                 'role': 'assistant',
                 'summary': results['summary'],
-                'recommendations': results['recommendations'],
-                'stages': results['stages']
+                'rec_ids': store_recommendations(results['recommendations']),
+                'query_key': results['query_key'],
+                'stages': results['stages'],
+                'total_time': total_time,
+                'num_candidates': num_candidates
             })
 
     # Chat input
@@ -876,8 +1338,12 @@ def render_chatbot_screen():
                 top_k=st.session_state.get('top_k', 5)
             )
 
+            # Computed once here and stored on the message for history reruns
+            total_time = sum(results['timing'].values())
+            num_candidates = len(results['recommendations'])
+
             if results['recommendations']:
-                st.markdown(results['summary'])
+                results['summary'] = render_summary(results, st.session_state['pipeline'])
                 st.subheader("📋 Top 5 Recommendations")
 
                 # Show top 5 as cards
@@ -885,16 +1351,18 @@ def render_chatbot_screen():
                     render_recommendation_card(rec)
 
                 # Show additional recommendations in expandable table
-                render_additional_recommendations_table(results['recommendations'])
+                render_additional(results['recommendations'])
 
-                total_time = sum(results['timing'].values())
-                st.caption(f"⏱️ Total processing time: {total_time:.2f}s | Total candidates: {len(results['recommendations'])}")
+                st.caption(f"⏱️ Total processing time: {total_time:.2f}s | Total candidates: {num_candidates}")
 
             st.session_state['messages'].append({
                 'role': 'assistant',
                 'summary': results['summary'],
-                'recommendations': results['recommendations'],
-                'stages': results['stages']
+                'rec_ids': store_recommendations(results['recommendations']),
+                'query_key': results['query_key'],
+                'stages': results['stages'],
+                'total_time': total_time,
+                'num_candidates': num_candidates
             })
 
     # Clear chat button at bottom
@@ -953,6 +1421,12 @@ def main():
     if st.session_state.get('initialized', False) and 'pipeline' in st.session_state:
         render_chatbot_screen()
     else:
+        # Build the pipeline for the default settings while the user reads the welcome
+        # screen. Only on the session's first run: later reruns carry half-edited
+        # settings, and submitted settings are built by initialize_pipeline anyway.
+        if not st.session_state.get('prewarm_started', False):
+            st.session_state['prewarm_started'] = True
+            prewarm_pipeline(create_config_from_session())
         render_welcome_screen()
 
 
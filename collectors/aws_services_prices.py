@@ -1,13 +1,67 @@
 import boto3
 import json
+from botocore.config import Config
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import List, Dict
+from pathlib import Path
+from typing import List, Dict, Iterator
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# Product attributes repeated across most SKUs; stored as their own dictionary-encoded
+# columns instead of inside the attributes map
+DICTIONARY_ATTRIBUTES = ['location', 'regionCode', 'instanceType', 'operatingSystem',
+                         'databaseEngine', 'deploymentOption', 'usagetype']
+
+# Columnar layout of the Parquet output (see AWSPricingExtractor._write_parquet).
+# The service code is not a column: datasets are hive-partitioned by service_code=,
+# and a column of the same name would clash with the partition field on dataset reads.
+PRICING_SCHEMA = pa.schema([
+    ('sku', pa.string()),
+    ('product_family', pa.dictionary(pa.int16(), pa.string())),
+    *[(name, pa.dictionary(pa.int16(), pa.string())) for name in DICTIONARY_ATTRIBUTES],
+    ('attributes', pa.map_(pa.string(), pa.string())),
+    ('terms', pa.string()),
+    ('publication_date', pa.string()),
+]) if pa is not None else None
+
+
+def _json_loads(data):
+    """Parse JSON with orjson when installed (several times faster on price items)"""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def _json_dumps(obj) -> str:
+    """Serialize compact JSON with orjson when installed"""
+    return orjson.dumps(obj).decode('utf-8') if orjson is not None else json.dumps(obj, separators=(',', ':'))
 
-class AWSPricingExtractor:
-    def __init__(self, region='us-east-1'):
-        self.client = boto3.client('pricing', region_name=region)
 
-    def get_ec2_pricing(self) -> List[Dict]:
+class AWSPricingExtractor:
+    def __init__(self, region='us-east-1', max_pool_connections: int = 32):
+        # One client (and connection pool) is shared by all extraction threads; keep-alive
+        # connections are reused across paginated get_products calls
+        self.client = boto3.client('pricing', region_name=region, config=Config(
+            tcp_keepalive=True,
+            max_pool_connections=max_pool_connections,
+            retries={'max_attempts': 10, 'mode': 'adaptive'}
+        ))
+
+    def get_ec2_pricing(self, out_path: str) -> int:
         """Get all EC2 instance pricing data"""
         print("Fetching EC2 pricing data...")
 
@@ -19,9 +73,9 @@ class AWSPricingExtractor:
             {'Type': 'TERM_MATCH', 'Field': 'preInstalledSw', 'Value': 'NA'}
         ]
 
-        return self._get_all_pricing_data('AmazonEC2', filters)
+        return self._get_all_pricing_data('AmazonEC2', filters, out_path)
 
-    def get_rds_pricing(self, engine: str, deployment: str) -> List[Dict]:
+    def get_rds_pricing(self, engine: str, deployment: str, out_path: str) -> int:
         """Get RDS database pricing data for specific engine and deployment"""
         print(f"Fetching RDS pricing data for {engine} ({deployment})...")
 
@@ -31,30 +85,30 @@ class AWSPricingExtractor:
             {'Type': 'TERM_MATCH', 'Field': 'deploymentOption', 'Value': deployment}
         ]
 
-        return self._get_all_pricing_data('AmazonRDS', filters)
+        return self._get_all_pricing_data('AmazonRDS', filters, out_path)
 
-    def get_lambda_pricing(self) -> List[Dict]:
+    def get_lambda_pricing(self, out_path: str) -> int:
         """Get all Lambda pricing data"""
         print("Fetching Lambda pricing data...")
 
         filters = []
-        return self._get_all_pricing_data('AWSLambda', filters)
+        return self._get_all_pricing_data('AWSLambda', filters, out_path)
 
-    def get_eks_pricing(self) -> List[Dict]:
+    def get_eks_pricing(self, out_path: str) -> int:
         """Get all EKS pricing data"""
         print("Fetching EKS pricing data...")
 
         filters = []
-        return self._get_all_pricing_data('AmazonEKS', filters)
+        return self._get_all_pricing_data('AmazonEKS', filters, out_path)
 
-    def get_ecs_pricing(self) -> List[Dict]:
+    def get_ecs_pricing(self, out_path: str) -> int:
         """Get all ECS/Fargate pricing data"""
         print("Fetching ECS/Fargate pricing data...")
 
         filters = []
-        return self._get_all_pricing_data('AmazonECS', filters)
+        return self._get_all_pricing_data('AmazonECS', filters, out_path)
 
-    def get_s3_pricing(self) -> List[Dict]:
+    def get_s3_pricing(self, out_path: str) -> int:
         """Get all S3 pricing data"""
         print("Fetching S3 pricing data...")
 
@@ -62,11 +116,16 @@ class AWSPricingExtractor:
 
         ]
 
-        return self._get_all_pricing_data('AmazonS3', filters)
+        return self._get_all_pricing_data('AmazonS3', filters, out_path)
+
+    def _iter_price_pages(self, service_code: str, filters: List[Dict]) -> Iterator[List[str]]:
+        """
+        Page through get_products for a service
 
-    def _get_all_pricing_data(self, service_code: str, filters: List[Dict]) -> List[Dict]:
-        """Fetch ALL pricing data with pagination"""
-        all_products = []
+        Yields:
+            The raw PriceList (JSON strings) of each page
+        """
+        count = 0
         next_token = None
         page_count = 0
 
@@ -84,14 +143,13 @@ class AWSPricingExtractor:
 
                 response = self.client.get_products(**params)
 
-                # Parse price list items
-                for price_item in response.get('PriceList', []):
-                    product_data = json.loads(price_item)
-                    all_products.append(product_data)
+                price_list = response.get('PriceList', [])
+                count += len(price_list)
+                yield price_list
 
                 next_token = response.get('NextToken')
 
-                print(f"  Page {page_count}: {len(all_products)} items so far...")
+                print(f"  Page {page_count}: {count} items so far...")
 
                 if not next_token:
                     break
@@ -99,14 +157,119 @@ class AWSPricingExtractor:
         except Exception as e:
             print(f"Error fetching pricing data: {str(e)}")
 
-        print(f"  ✅ Complete! Total items: {len(all_products)}")
-        return all_products
+    def _get_all_pricing_data(self, service_code: str, filters: List[Dict], out_path: str) -> int:
+        """
+        Fetch ALL pricing data with pagination, streaming it straight to disk
+
+        JSON output: each PriceList entry is already a JSON document, so it is
+        written verbatim (one per line) inside a JSON array instead of being
+        parsed and re-serialized. Peak memory is one page regardless of service size.
+
+        Parquet output (out_path ending in .parquet): each page becomes one Arrow
+        record batch, see _write_parquet.
+
+        Args:
+            service_code: AWS service code (e.g. 'AmazonEC2')
+            filters: get_products filters
+            out_path: JSON or Parquet file to write the products to
+
+        Returns:
+            Number of products written
+        """
+        if out_path.endswith('.parquet'):
+            count = self._write_parquet(service_code, self._iter_price_pages(service_code, filters), out_path)
+            print(f"  ✅ Complete! Total items: {count}")
+            return count
+
+        count = 0
+
+        with open(out_path, 'w') as f:
+            f.write("[\n")
+
+            # Write price list items as they arrive
+            for price_list in self._iter_price_pages(service_code, filters):
+                for price_item in price_list:
+                    if count:
+                        f.write(",\n")
+                    f.write(price_item)
+                    count += 1
+
+            f.write("\n]\n")
+
+        print(f"  ✅ Complete! Total items: {count}")
+        return count
+
+    def _write_parquet(self, service_code: str, pages: Iterator[List[str]], out_path: str) -> int:
+        """
+        Write pricing pages as zstd-compressed Parquet, one record batch per page
+
+        Each page is parsed straight into per-column lists (struct of arrays).
+        Low-cardinality strings (product family and the DICTIONARY_ATTRIBUTES)
+        become dictionary-encoded columns, the remaining product attributes a
+        map<string, string> column. The offer terms are nested under SKU-specific
+        keys, so they are kept as a JSON string.
+
+        Args:
+            service_code: AWS service code, stored in the file's schema metadata
+            pages: Raw PriceList pages from _iter_price_pages
+            out_path: Parquet file to write
+
+        Returns:
+            Number of products written
+        """
+        if pa is None:
+            raise ImportError("pyarrow is required for Parquet output (pip install pyarrow)")
+
+        count = 0
+        Path(out_path).parent.mkdir(parents=True, exist_ok=True)
+
+        schema = PRICING_SCHEMA.with_metadata({'service_code': service_code})
+
+        with pq.ParquetWriter(out_path, schema, compression='zstd', use_dictionary=True) as writer:
+            for price_list in pages:
+                if not price_list:
+                    continue
+
+                columns = {field.name: [] for field in PRICING_SCHEMA}
+                for price_item in price_list:
+                    product_data = _json_loads(price_item)
+                    product = product_data.get('product', {})
+                    attributes = dict(product.get('attributes', {}))
+
+                    columns['sku'].append(product.get('sku', ''))
+                    columns['product_family'].append(product.get('productFamily', ''))
+                    for name in DICTIONARY_ATTRIBUTES:
+                        columns[name].append(attributes.pop(name, None))
+                    columns['attributes'].append(list(attributes.items()))
+                    columns['terms'].append(_json_dumps(product_data.get('terms', {})))
+                    columns['publication_date'].append(product_data.get('publicationDate', ''))
+
+                batch = pa.RecordBatch.from_arrays(
+                    [pa.array(columns[field.name], type=field.type) for field in PRICING_SCHEMA],
+                    schema=schema
+                )
+                writer.write_batch(batch)
+                count += batch.num_rows
+
+        return count
 
     # ============================================================
     # EXTRACT ALL SERVICES AND SAVE SEPARATELY
     # ============================================================
-    def extract_all_services(self, output_dir: str = '.'):
-        """Extract pricing data for all services into separate JSON files"""
+    def extract_all_services(self, output_dir: str = '.', max_workers: int = 16, output_format: str = 'json'):
+        """
+        Extract pricing data for all services into separate files
+
+        All service fetches run concurrently; pagination within a single
+        service stays sequential because each page needs the previous NextToken.
+
+        Args:
+            output_dir: Directory for the per-service output
+            max_workers: Number of concurrent service fetches
+            output_format: 'json' (one JSON array per dataset, read by AWS_preprocess) or
+                'parquet' (one dataset under pricing_{timestamp}.parquet/, hive-partitioned
+                by service_code)
+        """
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
 
         summary = {
@@ -115,67 +278,55 @@ class AWSPricingExtractor:
             'services': {}
         }
 
-        def save_to_file(service_name, data):
-            file_path = f"{output_dir}/{service_name}_pricing_{timestamp}.json"
-            with open(file_path, 'w') as f:
-                json.dump(data, f, indent=2)
-            print(f"  ✅ Saved {service_name} data → {file_path}")
-            return file_path
-
-        # EC2
-        print("\n" + "="*60)
-        print("EXTRACTING EC2 DATA")
-        print("="*60)
-        ec2_data = self.get_ec2_pricing()
-        summary['services']['ec2'] = {'count': len(ec2_data)}
-        save_to_file('ec2', ec2_data)
+        def fetch_and_save(file_name, fetch, args, service_code):
+            if output_format == 'parquet':
+                file_path = f"{output_dir}/pricing_{timestamp}.parquet/service_code={service_code}/{file_name}.parquet"
+            else:
+                file_path = f"{output_dir}/{file_name}_pricing_{timestamp}.json"
+            count = fetch(*args, out_path=file_path)
+            print(f"  ✅ Saved {file_name} data → {file_path}")
+            return count
 
-        # RDS
-        print("\n" + "="*60)
-        print("EXTRACTING RDS DATA")
-        print("="*60)
         rds_engines = ['MySQL', 'PostgreSQL', 'MariaDB', 'Oracle', 'SQL Server', 'Aurora MySQL', 'Aurora PostgreSQL']
         deployment_options = ['Single-AZ', 'Multi-AZ']
-        rds_summary = {}
+
+        # (summary key, file name, fetch function, args, service code)
+        tasks = [('ec2', 'ec2', self.get_ec2_pricing, (), 'AmazonEC2')]
         for engine in rds_engines:
-            rds_summary[engine] = {}
             for deployment in deployment_options:
-                rds_data = self.get_rds_pricing(engine, deployment)
-                rds_summary[engine][deployment] = len(rds_data)
-                save_to_file(f"rds_{engine.replace(' ', '_')}_{deployment}", rds_data)
-        summary['services']['rds'] = rds_summary
-
-        # Lambda
-        print("\n" + "="*60)
-        print("EXTRACTING LAMBDA DATA")
-        print("="*60)
-        lambda_data = self.get_lambda_pricing()
-        summary['services']['lambda'] = {'count': len(lambda_data)}
-        save_to_file('lambda', lambda_data)
-
-        # EKS
-        print("\n" + "="*60)
-        print("EXTRACTING EKS DATA")
-        print("="*60)
-        eks_data = self.get_eks_pricing()
-        summary['services']['eks'] = {'count': len(eks_data)}
-        save_to_file('eks', eks_data)
+                tasks.append((('rds', engine, deployment), f"rds_{engine.replace(' ', '_')}_{deployment}",
+                              self.get_rds_pricing, (engine, deployment), 'AmazonRDS'))
+        tasks += [
+            ('lambda', 'lambda', self.get_lambda_pricing, (), 'AWSLambda'),
+            ('eks', 'eks', self.get_eks_pricing, (), 'AmazonEKS'),
+            ('ecs', 'ecs', self.get_ecs_pricing, (), 'AmazonECS'),
+            ('s3', 's3', self.get_s3_pricing, (), 'AmazonS3'),
+        ]
 
-        # ECS
         print("\n" + "="*60)
-        print("EXTRACTING ECS DATA")
+        print(f"EXTRACTING {len(tasks)} SERVICE DATASETS ({max_workers} workers)")
         print("="*60)
-        ecs_data = self.get_ecs_pricing()
-        summary['services']['ecs'] = {'count': len(ecs_data)}
-        save_to_file('ecs', ecs_data)
 
-        # S3
-        print("\n" + "="*60)
-        print("EXTRACTING S3 DATA")
-        print("="*60)
-        s3_data = self.get_s3_pricing()
-        summary['services']['s3'] = {'count': len(s3_data)}
-        save_to_file('s3', s3_data)
+        counts = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {pool.submit(fetch_and_save, file_name, fetch, args, service_code): key
+                       for key, file_name, fetch, args, service_code in tasks}
+            for future in as_completed(futures):
+                key = futures[future]
+                try:
+                    counts[key] = future.result()
+                except Exception as e:
+                    print(f"Error extracting {key}: {str(e)}")
+                    counts[key] = 0
+
+        # Summary keeps the same layout as the sequential extractor
+        summary['services']['ec2'] = {'count': counts['ec2']}
+        summary['services']['rds'] = {
+            engine: {deployment: counts[('rds', engine, deployment)] for deployment in deployment_options}
+            for engine in rds_engines
+        }
+        for key in ['lambda', 'eks', 'ecs', 's3']:
+            summary['services'][key] = {'count': counts[key]}
 
         # Save summary
         summary_file = f"{output_dir}/aws_pricing_summary_{timestamp}.json"
@@ -189,6 +340,72 @@ class AWSPricingExtractor:
         return summary
 
 
+def iter_products(path: str) -> Iterator[Dict]:
+    """
+    Iterate over the products in a pricing JSON file without loading it whole
+
+    Uses ijson when installed; otherwise falls back to a full json.load.
+    Parquet output (a .parquet file or dataset directory) is read through iter_as_dicts.
+
+    Args:
+        path: Pricing file written by AWSPricingExtractor
+
+    Yields:
+        Product dictionaries
+    """
+    if path.rstrip('/').endswith('.parquet'):
+        yield from iter_as_dicts(path)
+        return
+
+    with open(path, 'rb') as f:
+        if ijson is not None:
+            yield from ijson.items(f, 'item')
+        else:
+            yield from json.load(f)
+
+
+def iter_as_dicts(path: str) -> Iterator[Dict]:
+    """
+    Iterate over Parquet pricing output as the original get_products documents
+
+    Adapter for consumers of the JSON layout; columnar consumers should read
+    the Parquet file directly (e.g. pyarrow.compute filters on the dictionary columns).
+
+    Args:
+        path: Parquet file, or dataset directory of Parquet files
+
+    Yields:
+        Product dictionaries ({'product': {...}, 'terms': {...}, 'publicationDate': ...})
+    """
+    if pq is None:
+        raise ImportError("pyarrow is required to read Parquet output (pip install pyarrow)")
+
+    root = Path(path)
+    files = sorted(root.rglob('*.parquet')) if root.is_dir() else [root]
+
+    for file in files:
+        parquet_file = pq.ParquetFile(file)
+        service_code = (parquet_file.schema_arrow.metadata or {}).get(b'service_code', b'').decode() or None
+
+        for batch in parquet_file.iter_batches():
+            for row in batch.to_pylist():
+                attributes = dict(row['attributes'] or [])
+                for name in DICTIONARY_ATTRIBUTES:
+                    if row.get(name) is not None:
+                        attributes[name] = row[name]
+
+                yield {
+                    'product': {
+                        'productFamily': row['product_family'],
+                        'attributes': attributes,
+                        'sku': row['sku'],
+                    },
+                    'serviceCode': service_code,
+                    'terms': _json_loads(row['terms']),
+                    'publicationDate': row['publication_date'],
+                }
+
+
 def main():
     print("AWS Pricing Data Extractor")
     print("="*60)
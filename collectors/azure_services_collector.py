@@ -5,68 +5,160 @@ Collects all available services from Microsoft Azure
 
 import requests
 import json
-from typing import List, Dict
+import hashlib
+import os
+import shelve
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from typing import List, Dict, Optional
 import time
 
+try:
+    import requests_cache
+except ImportError:
+    requests_cache = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _json_loads(data):
+    """Parse JSON with orjson when installed"""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+class RateLimiter:
+    """Token-bucket rate limiter: at most `rate` calls per `period` seconds"""
+
+    def __init__(self, rate: int = 10, period: float = 1.0):
+        self.rate = rate
+        self.period = period
+        self.tokens = float(rate)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a call is allowed"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate / self.period)
+                self.updated = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) * self.period / self.rate
+
+            time.sleep(wait)
+
 
 class AzureServicesCollector:
     """
     Collects Azure service information using the Azure Retail Prices API
     """
 
-    def __init__(self):
-        """Initialize the Azure Retail Prices API client"""
+    def __init__(self, requests_per_second: int = 10, cache_path: Optional[str] = "./cache/azure_prices",
+                 cache_ttl: int = 86400):
+        """
+        Initialize the Azure Retail Prices API client
+
+        Args:
+            requests_per_second: Client-side rate limit for API calls
+            cache_path: HTTP cache location for API pages (None disables caching)
+            cache_ttl: Seconds a cached page is served without revalidation
+        """
         self.base_url = "https://prices.azure.com/api/retail/prices"
+        self.cache_path = cache_path
+        self._cache_lock = threading.Lock()
+
+        if cache_path:
+            os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+
+        # Keep-alive session so every page reuses the same TLS connection.
+        # With requests-cache installed, pages are cached in SQLite and revalidated
+        # with ETag / If-None-Match; otherwise _fetch_page does the revalidation.
+        if cache_path and requests_cache is not None:
+            self.session = requests_cache.CachedSession(cache_name=cache_path, backend='sqlite',
+                                                        expire_after=cache_ttl, allowable_codes=(200, 304))
+        else:
+            self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=10))
+        self.session.headers.update({'Accept-Encoding': 'gzip'})  # decompressed transparently by requests
+        self.rate_limiter = RateLimiter(rate=requests_per_second)
         print("Azure Services Collector initialized")
         print("Using Azure Retail Prices API (no authentication required)")
 
+    def _fetch_page(self, url: str) -> Dict:
+        """Fetch and decode a single API page"""
+        if not self.cache_path or requests_cache is not None:
+            self.rate_limiter.acquire()
+            response = self.session.get(url, timeout=30)
+            response.raise_for_status()
+            return _json_loads(response.content)
+
+        return self._fetch_page_etag(url)
+
+    def _fetch_page_etag(self, url: str) -> Dict:
+        """Fetch a page with If-None-Match, reusing the stored body on 304 Not Modified"""
+        with self._cache_lock, shelve.open(self.cache_path) as db:
+            cached = db.get(url)
+
+        headers = {'If-None-Match': cached['etag']} if cached else {}
+
+        self.rate_limiter.acquire()
+        response = self.session.get(url, headers=headers, timeout=30)
+
+        if cached and response.status_code == 304:
+            return _json_loads(cached['body'])
+
+        response.raise_for_status()
+
+        etag = response.headers.get('ETag')
+        if etag:
+            with self._cache_lock, shelve.open(self.cache_path) as db:
+                db[url] = {'etag': etag, 'body': response.content}
+
+        return _json_loads(response.content)
+
     def get_all_services(self) -> List[Dict]:
         """
         Fetch all unique Azure services from the Retail Prices API
 
+        Pages are pipelined: the next page is requested as soon as its
+        NextPageLink is known, while the current page is being processed.
+
         Returns:
             List of unique service dictionaries
         """
         print("\nFetching all Azure services...")
 
         all_services = {}  # Use dict to deduplicate by serviceName
-        next_page_link = self.base_url
         page_count = 0
+        max_pages = 20  # Limit to 20 pages for service discovery
 
         try:
-            # We'll fetch multiple pages to get a comprehensive list
-            # The API returns paginated results
-            while next_page_link and page_count < 20:  # Limit to 20 pages for service discovery
-                page_count += 1
-                print(f"  Fetching page {page_count}...")
-
-                response = requests.get(next_page_link, timeout=30)
-                response.raise_for_status()
-
-                data = response.json()
-
-                # Extract unique services from this page
-                items = data.get('Items', [])
-                for item in items:
-                    service_name = item.get('serviceName', 'Unknown')
-                    service_id = item.get('serviceId', '')
-                    service_family = item.get('serviceFamily', '')
-                    product_name = item.get('productName', '')
-
-                    # Use serviceName as key to deduplicate
-                    if service_name not in all_services:
-                        all_services[service_name] = {
-                            'service_name': service_name,
-                            'service_id': service_id,
-                            'service_family': service_family,
-                            'example_product': product_name
-                        }
-
-                # Get next page link
-                next_page_link = data.get('NextPageLink')
-
-                # Small delay to avoid rate limiting
-                time.sleep(0.5)
+            with ThreadPoolExecutor(max_workers=1) as prefetcher:
+                # We'll fetch multiple pages to get a comprehensive list
+                # The API returns paginated results
+                page_future = prefetcher.submit(self._fetch_page, self.base_url)
+
+                while page_future is not None:
+                    page_count += 1
+                    print(f"  Fetching page {page_count}...")
+
+                    data = page_future.result()
+
+                    # Start fetching the next page before processing this one
+                    next_page_link = data.get('NextPageLink')
+                    page_future = None
+                    if next_page_link and page_count < max_pages:
+                        page_future = prefetcher.submit(self._fetch_page, next_page_link)
+
+                    self._collect_services(data, all_services)
 
             print(f"\nTotal unique services found: {len(all_services)}")
 
@@ -79,8 +171,42 @@ class AzureServicesCollector:
             print(f"Error fetching services: {str(e)}")
             return []
 
+    def _collect_services(self, data: Dict, all_services: Dict[str, Dict]):
+        """Add the unique services found on one API page to all_services"""
+        # Extract unique services from this page
+        items = data.get('Items', [])
+        for item in items:
+            service_name = item.get('serviceName', 'Unknown')
+            service_id = item.get('serviceId', '')
+            service_family = item.get('serviceFamily', '')
+            product_name = item.get('productName', '')
+
+            # Use serviceName as key to deduplicate
+            if service_name not in all_services:
+                all_services[service_name] = {
+                    'service_name': service_name,
+                    'service_id': service_id,
+                    'service_family': service_family,
+                    'example_product': product_name
+                }
+
     def save_to_file(self, services: List[Dict], filename: str = 'azure_services.json'):
-        """Save services data to JSON file"""
+        """
+        Save services data to JSON file
+
+        A sha256 of the sorted service names is kept in a `<filename>.sha256`
+        sidecar; the write is skipped when the service list hasn't changed.
+        """
+        names = sorted(service['service_name'] for service in services)
+        digest = hashlib.sha256(json.dumps(names).encode('utf-8')).hexdigest()
+        sidecar = f"{filename}.sha256"
+
+        if os.path.exists(filename) and os.path.exists(sidecar):
+            with open(sidecar) as f:
+                if f.read().strip() == digest:
+                    print(f"No service changes, keeping {filename}")
+                    return
+
         output = {
             'total_services': len(services),
             'collection_method': 'Azure Retail Prices API',
@@ -91,6 +217,9 @@ class AzureServicesCollector:
         with open(filename, 'w') as f:
             json.dump(output, f, indent=4)
 
+        with open(sidecar, 'w') as f:
+            f.write(digest)
+
         print(f"Saved to {filename}")
 
 
@@ -6,276 +6,468 @@ Azure uses the Retail Prices API which is public and doesn't require authenticat
 """
 
 import requests
+import gzip
 import json
+import os
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import List, Dict
+from pathlib import Path
+from typing import Iterator, Deque, List, Dict, Optional, Union
 import time
+import random
+from collections import deque
 from urllib.parse import quote
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import requests_cache
+except ImportError:
+    requests_cache = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# Responses that mean "slow down"; retried with Retry-After / jittered exponential backoff
+THROTTLE_STATUSES = (429, 503)
+
+# Pinned API version (stable paging) and the largest page size it accepts;
+# the default of 100 items per page means ten times as many round trips
+API_VERSION = '2023-01-01-preview'
+PAGE_SIZE = 1000
+
+
+def _write_jsonl(filename: str, records: List[Dict], compress: bool = True):
+    """
+    Write a raw pricing file as JSON Lines: one compact record per line (orjson when installed),
+    gzip-compressed by default
+
+    Args:
+        filename: Output path
+        records: JSON-serializable records
+        compress: gzip the output (level 3 keeps compression cheap)
+    """
+    f = gzip.open(filename, 'wb', compresslevel=3) if compress else open(filename, 'wb')
+    with f:
+        for record in records:
+            if orjson is not None:
+                f.write(orjson.dumps(record))
+            else:
+                f.write(json.dumps(record, separators=(',', ':')).encode('utf-8'))
+            f.write(b'\n')
+
+
+def _write_parquet(filename: str, records: List[Dict]):
+    """
+    Write one service's items as a zstd-compressed Parquet file
+
+    The Arrow schema is inferred across all records (nested objects become
+    struct / list columns); repeated strings are dictionary-encoded.
+
+    Args:
+        filename: Output path inside the dataset directory
+        records: Records of one service
+    """
+    if pq is None:
+        raise ImportError("pyarrow is required for Parquet output (pip install pyarrow)")
+
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    table = pa.Table.from_batches([pa.RecordBatch.from_struct_array(pa.array(records))])
+    pq.write_table(table, filename, compression='zstd', use_dictionary=True)
+
+
+def iter_as_dicts(path: str) -> Iterator[Dict]:
+    """
+    Iterate over Parquet pricing output as the original items
+
+    Fields a record did not have come back as None.
+
+    Args:
+        path: Parquet file, or dataset directory of Parquet files
+
+    Yields:
+        item dictionaries
+    """
+    if pq is None:
+        raise ImportError("pyarrow is required to read Parquet output (pip install pyarrow)")
+
+    root = Path(path)
+    files = sorted(root.rglob('*.parquet')) if root.is_dir() else [root]
+
+    for file in files:
+        for batch in pq.ParquetFile(file).iter_batches():
+            yield from batch.to_pylist()
+
+
+def _build_filter(filters: Dict[str, Union[str, List[str]]]) -> str:
+    """
+    Build OData filter string for API query
+
+    Args:
+        filters: Dictionary of field -> value filters; a list of values
+            matches any of them (OData `or`)
+
+    Returns:
+        OData filter string
+    """
+    filter_parts = []
+    for field, value in filters.items():
+        if isinstance(value, list):
+            filter_parts.append("(" + " or ".join(f"{field} eq '{v}'" for v in value) + ")")
+        else:
+            filter_parts.append(f"{field} eq '{value}'")
+    return " and ".join(filter_parts)
+
+
+# MySQL, PostgreSQL, SQL Database and MariaDB are fetched in one paginated crawl
+SQL_DATABASE_SERVICES = [
+    'Azure Database for MySQL',
+    'Azure Database for PostgreSQL',
+    'SQL Database',
+    'Azure Database for MariaDB'
+]
+
+# Service key -> OData filter, built once at import (every service uses Consumption prices)
+_FILTERS = {
+    key: _build_filter({'serviceName': service_name, 'priceType': 'Consumption'})
+    for key, service_name in [
+        ('virtual_machines', 'Virtual Machines'),
+        ('sql_database', SQL_DATABASE_SERVICES),
+        ('sql_managed_instance', 'SQL Managed Instance'),
+        ('synapse_analytics', 'Azure Synapse Analytics'),
+        ('storage', 'Storage'),
+        ('functions', 'Functions'),
+        ('container_instances', 'Container Instances'),
+        ('aks', 'Azure Kubernetes Service'),
+        ('app_service', 'Azure App Service'),
+        ('cosmos_db', 'Azure Cosmos DB'),
+        ('redis_cache', 'Redis Cache'),
+        ('logic_apps', 'Logic Apps'),
+        ('container_apps', 'Azure Container Apps'),
+        ('container_registry', 'Container Registry'),
+    ]
+}
+
 
 class AzurePricingExtractor:
     """Extract Azure pricing data using the Retail Prices API"""
 
-    def __init__(self):
-        """Initialize the Azure Retail Prices API client"""
+    def __init__(self, target_interval: float = 0.3, max_attempts: int = 6,
+                 cache_path: Optional[str] = "./cache/azure_pricing_pages", cache_ttl: int = 12 * 3600):
+        """
+        Initialize the Azure Retail Prices API client
+
+        Args:
+            target_interval: Target seconds between page requests of one service; only
+                the part not already spent waiting on the response is slept
+            max_attempts: Attempts per page while the API keeps throttling
+            cache_path: SQLite response cache for API pages (needs requests-cache; None disables)
+            cache_ttl: Seconds a cached page is served before it is revalidated
+        """
         self.base_url = "https://prices.azure.com/api/retail/prices"
+        self.target_interval = target_interval
+        self.max_attempts = max_attempts
+
+        # Keep-alive session with gzip responses, shared by every service's pagination.
+        # Server errors are retried by the adapter; throttling is handled in _get_page.
+        # With requests-cache, pages are keyed by URL (filter + NextPageLink skip token),
+        # so a re-run within the TTL is served from disk; stale pages are revalidated
+        # with ETag / Last-Modified when Azure provides them.
+        if cache_path and requests_cache is not None:
+            os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+            self.session = requests_cache.CachedSession(cache_path, backend='sqlite', expire_after=cache_ttl,
+                                                        allowable_methods=['GET'])
+        else:
+            self.session = requests.Session()
+        self.session.headers.update({'Accept-Encoding': 'gzip'})
+        self.session.mount("https://", HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=20,
+            max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[500, 502, 504])
+        ))
         print("Azure Pricing Extractor initialized")
         print("Using Azure Retail Prices API (public, no authentication required)")
 
-    def _build_filter(self, filters: Dict[str, str]) -> str:
-        """
-        Build OData filter string for API query
+    def __enter__(self):
+        return self
 
-        Args:
-            filters: Dictionary of field -> value filters
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
-        Returns:
-            OData filter string
-        """
-        filter_parts = []
-        for field, value in filters.items():
-            filter_parts.append(f"{field} eq '{value}'")
-        return " and ".join(filter_parts)
+    def close(self):
+        """Release the pooled connections"""
+        self.session.close()
+
+    def _build_filter(self, filters: Dict[str, Union[str, List[str]]]) -> str:
+        """Build OData filter string for an ad-hoc API query (the built-in services use _FILTERS)"""
+        return _build_filter(filters)
 
-    def _get_all_pricing_data(self, filter_str: str, service_name: str) -> List[Dict]:
+    def _get_all_pricing_data(self, filter_str: str, service_name: str, max_pages: int = 100) -> List[Dict]:
         """
         Fetch all pricing data with pagination
 
         Args:
             filter_str: OData filter string
             service_name: Name of service for logging
+            max_pages: Page limit for the crawl
 
         Returns:
             List of pricing items
         """
-        all_items = []
-        url = f"{self.base_url}?$filter={quote(filter_str)}"
+        all_items = deque()  # appends never reallocate; converted to a list once at the end
+        # NextPageLink carries the same query string, so only the first URL is built here
+        url = f"{self.base_url}?api-version={API_VERSION}&$top={PAGE_SIZE}&$filter={quote(filter_str)}"
         page_count = 0
+        latency = None  # EWMA of page request time
 
         try:
-            while url and page_count < 100:  # Limit to 100 pages
+            while url and page_count < max_pages:
                 page_count += 1
-
-                response = requests.get(url, timeout=30)
-                response.raise_for_status()
-
-                data = response.json()
-                items = data.get('Items', [])
-                all_items.extend(items)
-
-                print(f"  Page {page_count}: {len(all_items)} items so far...")
-
-                # Get next page
-                url = data.get('NextPageLink')
-
-                # Rate limiting
-                time.sleep(0.3)
-
-            print(f"   Complete! Total items: {len(all_items)}")
-
-        except Exception as e:
-            print(f"   Error fetching {service_name}: {str(e)}")
-
-        return all_items
+                start = time.monotonic()
+
+                response = self._get_page(url, stream=ijson is not None)
+
+                if ijson is not None:
+                    # Parse items straight off the socket; the next link is read in the same pass
+                    url = self._stream_page(response, all_items)
+                else:
+                    data = orjson.loads(response.content) if orjson is not None else response.json()
+                    all_items.extend(data.get('Items', []))
+                    url = data.get('NextPageLink')
+
+                print(f"  [{service_name}] Page {page_count}: {len(all_items)} items so far...")
+
+                # Pace requests: sleep only for what the response time didn't already cover
+                elapsed = time.monotonic() - start
+                latency = elapsed if latency is None else 0.8 * latency + 0.2 * elapsed
+                if url:
+                    time.sleep(max(0.0, self.target_interval - latency))
+
+            if url:
+                print(f"   Warning: {service_name} stopped at the {max_pages}-page limit; data is partial")
+            print(f"   {service_name} complete! Total items: {len(all_items)}")
+
+        # Throttling is retried in _get_page; what reaches here ends the crawl with a partial dataset
+        except requests.HTTPError as e:
+            status = e.response.status_code if e.response is not None else None
+            if status in THROTTLE_STATUSES:
+                print(f"   Warning: {service_name} still throttled ({status}) after {self.max_attempts} attempts "
+                      f"on page {page_count}; keeping {len(all_items)} items (partial)")
+            else:
+                print(f"   Error fetching {service_name}: HTTP {status} on page {page_count}; "
+                      f"keeping {len(all_items)} items (partial)")
+        except requests.RequestException as e:
+            print(f"   Error fetching {service_name}: {str(e)} on page {page_count}; "
+                  f"keeping {len(all_items)} items (partial)")
+
+        return list(all_items)
 
     def get_virtual_machines_pricing(self) -> List[Dict]:
         """Get Virtual Machines pricing"""
         print("\n Fetching Virtual Machines pricing...")
 
-        filter_str = self._build_filter({
-            'serviceName': 'Virtual Machines',
-            'priceType': 'Consumption'
-        })
-
-        return self._get_all_pricing_data(filter_str, 'Virtual Machines')
+        return self._get_all_pricing_data(_FILTERS['virtual_machines'], 'Virtual Machines')
 
     def get_sql_database_pricing(self) -> List[Dict]:
         """Get Azure SQL Database pricing"""
         print("\n Fetching Azure SQL Database pricing...")
 
-        filter_str = self._build_filter({
-            'serviceName': 'Azure Database for MySQL',
-            'priceType': 'Consumption'
-        })
-
-        mysql_data = self._get_all_pricing_data(filter_str, 'MySQL')
-
-        # Also get PostgreSQL
-        filter_str = self._build_filter({
-            'serviceName': 'Azure Database for PostgreSQL',
-            'priceType': 'Consumption'
-        })
-
-        postgres_data = self._get_all_pricing_data(filter_str, 'PostgreSQL')
-
-        # Get SQL Database
-        filter_str = self._build_filter({
-            'serviceName': 'SQL Database',
-            'priceType': 'Consumption'
-        })
-
-        sql_data = self._get_all_pricing_data(filter_str, 'SQL Database')
-
-        # Get MariaDB
-        filter_str = self._build_filter({
-            'serviceName': 'Azure Database for MariaDB',
-            'priceType': 'Consumption'
-        })
-
-        mariadb_data = self._get_all_pricing_data(filter_str, 'MariaDB')
-
-        return mysql_data + postgres_data + sql_data + mariadb_data
+        # Same total page budget as four separate 100-page crawls
+        return self._get_all_pricing_data(_FILTERS['sql_database'], 'SQL Databases',
+                                          max_pages=100 * len(SQL_DATABASE_SERVICES))
 
     def get_sql_managed_instance_pricing(self) -> List[Dict]:
         """Get SQL Managed Instance pricing"""
         print("\n Fetching SQL Managed Instance pricing...")
 
-        filter_str = self._build_filter({
-            'serviceName': 'SQL Managed Instance',
-            'priceType': 'Consumption'
-        })
-
-        return self._get_all_pricing_data(filter_str, 'SQL Managed Instance')
+        return self._get_all_pricing_data(_FILTERS['sql_managed_instance'], 'SQL Managed Instance')
 
     def get_synapse_analytics_pricing(self) -> List[Dict]:
         """Get Azure Synapse Analytics pricing"""
         print("\n Fetching Azure Synapse Analytics pricing...")
 
-        filter_str = self._build_filter({
-            'serviceName': 'Azure Synapse Analytics',
-            'priceType': 'Consumption'
-        })
-
-        return self._get_all_pricing_data(filter_str, 'Synapse Analytics')
+        return self._get_all_pricing_data(_FILTERS['synapse_analytics'], 'Synapse Analytics')
 
     def get_storage_pricing(self) -> List[Dict]:
         """Get Azure Storage pricing"""
         print("\n Fetching Azure Storage pricing...")
 
-        filter_str = self._build_filter({
-            'serviceName': 'Storage',
-            'priceType': 'Consumption'
-        })
-
-        return self._get_all_pricing_data(filter_str, 'Storage')
+        return self._get_all_pricing_data(_FILTERS['storage'], 'Storage')
 
     def get_functions_pricing(self) -> List[Dict]:
         """Get Azure Functions pricing"""
         print("\n Fetching Azure Functions pricing...")
 
-        filter_str = self._build_filter({
-            'serviceName': 'Functions',
-            'priceType': 'Consumption'
-        })
-
-        return self._get_all_pricing_data(filter_str, 'Azure Functions')
+        return self._get_all_pricing_data(_FILTERS['functions'], 'Azure Functions')
 
     def get_container_instances_pricing(self) -> List[Dict]:
         """Get Azure Container Instances pricing"""
         print("\n Fetching Container Instances pricing...")
 
-        filter_str = self._build_filter({
-            'serviceName': 'Container Instances',
-            'priceType': 'Consumption'
-        })
-
-        return self._get_all_pricing_data(filter_str, 'Container Instances')
+        return self._get_all_pricing_data(_FILTERS['container_instances'], 'Container Instances')
 
     def get_aks_pricing(self) -> List[Dict]:
         """Get Azure Kubernetes Service pricing"""
         print("\n Fetching AKS pricing...")
 
-        filter_str = self._build_filter({
-            'serviceName': 'Azure Kubernetes Service',
-            'priceType': 'Consumption'
-        })
-
-        return self._get_all_pricing_data(filter_str, 'AKS')
+        return self._get_all_pricing_data(_FILTERS['aks'], 'AKS')
 
     def get_app_service_pricing(self) -> List[Dict]:
         """Get Azure App Service pricing"""
         print("\n Fetching App Service pricing...")
 
-        filter_str = self._build_filter({
-            'serviceName': 'Azure App Service',
-            'priceType': 'Consumption'
-        })
-
-        return self._get_all_pricing_data(filter_str, 'App Service')
+        return self._get_all_pricing_data(_FILTERS['app_service'], 'App Service')
 
     def get_cosmos_db_pricing(self) -> List[Dict]:
         """Get Azure Cosmos DB pricing"""
         print("\n Fetching Cosmos DB pricing...")
 
-        filter_str = self._build_filter({
-            'serviceName': 'Azure Cosmos DB',
-            'priceType': 'Consumption'
-        })
-
-        return self._get_all_pricing_data(filter_str, 'Cosmos DB')
+        return self._get_all_pricing_data(_FILTERS['cosmos_db'], 'Cosmos DB')
 
     def get_redis_cache_pricing(self) -> List[Dict]:
         """Get Azure Cache for Redis pricing"""
         print("\n Fetching Redis Cache pricing...")
 
-        filter_str = self._build_filter({
-            'serviceName': 'Redis Cache',
-            'priceType': 'Consumption'
-        })
-
-        return self._get_all_pricing_data(filter_str, 'Redis Cache')
+        return self._get_all_pricing_data(_FILTERS['redis_cache'], 'Redis Cache')
 
     def get_logic_apps_pricing(self) -> List[Dict]:
         """Get Logic Apps pricing"""
         print("\n Fetching Logic Apps pricing...")
 
-        filter_str = self._build_filter({
-            'serviceName': 'Logic Apps',
-            'priceType': 'Consumption'
-        })
-
-        return self._get_all_pricing_data(filter_str, 'Logic Apps')
+        return self._get_all_pricing_data(_FILTERS['logic_apps'], 'Logic Apps')
 
     def get_container_apps_pricing(self) -> List[Dict]:
         """Get Azure Container Apps pricing"""
         print("\n Fetching Azure Container Apps pricing...")
 
-        filter_str = self._build_filter({
-            'serviceName': 'Azure Container Apps',
-            'priceType': 'Consumption'
-        })
-
-        return self._get_all_pricing_data(filter_str, 'Container Apps')
+        return self._get_all_pricing_data(_FILTERS['container_apps'], 'Container Apps')
 
     def get_container_registry_pricing(self) -> List[Dict]:
         """Get Container Registry pricing"""
         print("\n Fetching Container Registry pricing...")
 
-        filter_str = self._build_filter({
-            'serviceName': 'Container Registry',
-            'priceType': 'Consumption'
-        })
+        return self._get_all_pricing_data(_FILTERS['container_registry'], 'Container Registry')
 
-        return self._get_all_pricing_data(filter_str, 'Container Registry')
+    def save_to_file(self, service_name: str, data: List[Dict], output_dir: str = '.', compress: bool = True):
+        """
+        Save pricing data as JSON Lines (.jsonl.gz when compress is set)
 
-    def save_to_file(self, service_name: str, data: List[Dict], output_dir: str = '.'):
-        """Save pricing data to JSON file"""
+        Records are written one per line; service name, extraction date and
+        count go to a `<filename>.meta` JSON sidecar.
+        """
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"{output_dir}/azure_{service_name}_pricing_{timestamp}.json"
+        filename = f"{output_dir}/azure_{service_name}_pricing_{timestamp}.jsonl"
 
-        with open(filename, 'w') as f:
-            json.dump({
-                'service': service_name,
-                'extraction_date': datetime.now().isoformat(),
-                'total_items': len(data),
-                'items': data
-            }, f, indent=2)
+        if compress:
+            filename += '.gz'
+        _write_jsonl(filename, data, compress)
+
+        metadata = {
+            'service': service_name,
+            'extraction_date': datetime.now().isoformat(),
+            'total_items': len(data)
+        }
+        with open(f"{filename}.meta", 'w') as f:
+            json.dump(metadata, f, indent=2)
 
         print(f"   Saved {service_name} → {filename}")
         return filename
 
-    def extract_all_services(self, output_dir: str = '.'):
-        """Extract pricing data for all services"""
+    def _get_page(self, url: str, stream: bool = False) -> requests.Response:
+        """
+        GET one API page, backing off while the API is throttling
+
+        Waits for the Retry-After header when present, otherwise for a jittered
+        exponential delay (1s, 2s, 4s, ... capped at 30s).
+
+        Args:
+            url: Page URL
+            stream: Leave the body unread for incremental parsing
+
+        Returns:
+            Successful response
+        """
+        for attempt in range(self.max_attempts):
+            response = self.session.get(url, timeout=30, stream=stream)
+
+            if response.status_code not in THROTTLE_STATUSES:
+                response.raise_for_status()
+                return response
+
+            retry_after = response.headers.get('Retry-After')
+            response.close()
+
+            try:
+                delay = float(retry_after)
+            except (TypeError, ValueError):
+                delay = min(30.0, 2.0 ** attempt) * (1 + random.random() * 0.5)
+
+            print(f"   Throttled ({response.status_code}), retrying in {delay:.1f}s...")
+            time.sleep(delay)
+
+        response.raise_for_status()
+        return response
+
+    def _stream_page(self, response: requests.Response, all_items: Deque[Dict]) -> Optional[str]:
+        """
+        Incrementally parse one API page, appending its items as they are decoded
+
+        Args:
+            response: Streamed (stream=True) page response
+            all_items: Collection the page's items are appended to
+
+        Returns:
+            The page's NextPageLink, or None on the last page
+        """
+        response.raw.decode_content = True  # undo gzip transfer encoding
+
+        next_link = None
+        builder = None
+
+        try:
+            for prefix, event, value in ijson.parse(response.raw, use_float=True):
+                if prefix == 'Items.item' or prefix.startswith('Items.item.'):
+                    if prefix == 'Items.item' and event == 'start_map':
+                        builder = ijson.ObjectBuilder()
+                    builder.event(event, value)
+                    if prefix == 'Items.item' and event == 'end_map':
+                        all_items.append(builder.value)
+                        builder = None
+                elif prefix == 'NextPageLink':
+                    next_link = value
+        finally:
+            response.close()
+
+        return next_link
+
+    def extract_all_services(self, output_dir: str = '.', max_workers: int = 8, output_format: str = 'jsonl'):
+        """
+        Extract pricing data for all services
+
+        Services are fetched concurrently over the shared session; pagination
+        within a service stays sequential because each page links to the next.
+
+        Args:
+            output_dir: Directory for the per-service output
+            max_workers: Number of services fetched at once
+            output_format: 'jsonl' (one JSON Lines file per service, read by Azure_preprocess) or
+                'parquet' (one dataset under azure_pricing_{timestamp}.parquet/, hive-partitioned
+                by service)
+        """
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
 
         summary = {
@@ -313,17 +505,35 @@ class AzurePricingExtractor:
             ('storage', self.get_storage_pricing, 'Azure Storage'),
         ]
 
-        for service_key, fetch_func, display_name in services:
-            print("\n" + "="*60)
-            print(f"EXTRACTING: {display_name}")
-            print("="*60)
-
+        def fetch_and_save(service_key, fetch_func, display_name):
+            print(f"\nEXTRACTING: {display_name}")
             data = fetch_func()
+            if output_format == 'parquet':
+                if data:
+                    file_path = f"{output_dir}/azure_pricing_{timestamp}.parquet/service={service_key}/{service_key}.parquet"
+                    _write_parquet(file_path, data)
+                    print(f"   Saved {service_key} → {file_path}")
+            else:
+                self.save_to_file(service_key, data, output_dir)
+            return len(data)
+
+        counts = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {pool.submit(fetch_and_save, *service): service[0] for service in services}
+            for future in as_completed(futures):
+                service_key = futures[future]
+                try:
+                    counts[service_key] = future.result()
+                except Exception as e:
+                    print(f"   Error extracting {service_key}: {str(e)}")
+                    counts[service_key] = 0
+
+        # Summary keeps the service order of the list above
+        for service_key, _, display_name in services:
             summary['services'][service_key] = {
                 'display_name': display_name,
-                'item_count': len(data)
+                'item_count': counts[service_key]
             }
-            self.save_to_file(service_key, data, output_dir)
 
         # Save summary
         summary_file = f"{output_dir}/azure_pricing_summary_{timestamp}.json"
@@ -378,8 +588,8 @@ def main():
     print("\n")
 
     try:
-        extractor = AzurePricingExtractor()
-        extractor.extract_all_services(output_dir='.')
+        with AzurePricingExtractor() as extractor:
+            extractor.extract_all_services(output_dir='.')
     except Exception as e:
         print(f"\n Error: {str(e)}")
         print("\nPlease ensure:")
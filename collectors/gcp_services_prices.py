@@ -9,13 +9,123 @@ load_dotenv()
 
 from google.cloud import billing_v1
 from google.oauth2 import service_account
+import gzip
 import json
+import os
+import shelve
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import List, Dict
+from pathlib import Path
+from typing import Iterator, List, Dict, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# Only the SKU fields _sku_to_dict reads are sent back (next_page_token keeps paging working)
+SKU_FIELD_MASK = ','.join([
+    'next_page_token',
+    'skus.name',
+    'skus.sku_id',
+    'skus.description',
+    'skus.category',
+    'skus.service_regions',
+    'skus.pricing_info',
+])
+SKU_PAGE_SIZE = 5000  # API maximum
+
+
+def _write_jsonl(filename: str, records: List[Dict], compress: bool = True):
+    """
+    Write a raw pricing file as JSON Lines: one compact record per line (orjson when installed),
+    gzip-compressed by default
+
+    Args:
+        filename: Output path
+        records: JSON-serializable records
+        compress: gzip the output (level 3 keeps compression cheap)
+    """
+    f = gzip.open(filename, 'wb', compresslevel=3) if compress else open(filename, 'wb')
+    with f:
+        for record in records:
+            if orjson is not None:
+                f.write(orjson.dumps(record))
+            else:
+                f.write(json.dumps(record, separators=(',', ':')).encode('utf-8'))
+            f.write(b'\n')
+
+
+def _write_parquet(filename: str, records: List[Dict]):
+    """
+    Write one service's SKUs as a zstd-compressed Parquet file
+
+    The Arrow schema is inferred across all records (nested objects become
+    struct / list columns); repeated strings are dictionary-encoded.
+
+    Args:
+        filename: Output path inside the dataset directory
+        records: Records of one service
+    """
+    if pq is None:
+        raise ImportError("pyarrow is required for Parquet output (pip install pyarrow)")
+
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    table = pa.Table.from_batches([pa.RecordBatch.from_struct_array(pa.array(records))])
+    pq.write_table(table, filename, compression='zstd', use_dictionary=True)
+
+
+def iter_as_dicts(path: str) -> Iterator[Dict]:
+    """
+    Iterate over Parquet pricing output as the original SKUs
+
+    Fields a record did not have come back as None.
+
+    Args:
+        path: Parquet file, or dataset directory of Parquet files
+
+    Yields:
+        SKU dictionaries
+    """
+    if pq is None:
+        raise ImportError("pyarrow is required to read Parquet output (pip install pyarrow)")
+
+    root = Path(path)
+    files = sorted(root.rglob('*.parquet')) if root.is_dir() else [root]
+
+    for file in files:
+        for batch in pq.ParquetFile(file).iter_batches():
+            yield from batch.to_pylist()
+
 
 class GCPPricingExtractor:
-    def __init__(self):
-        """Initialize the GCP Cloud Catalog client"""
+    def __init__(self, cache_path: Optional[str] = "./cache/gcp_skus", cache_ttl: int = 12 * 3600,
+                 convert_workers: int = 2):
+        """
+        Initialize the GCP Cloud Catalog client
+
+        Args:
+            cache_path: Shelve file caching each service's converted SKUs (None disables)
+            cache_ttl: Seconds cached SKUs are reused before the catalog is listed again
+            convert_workers: Threads converting SKU pages while further pages are fetched
+        """
+        self.convert_workers = convert_workers
+        self.cache_path = cache_path
+        self.cache_ttl = cache_ttl
+        self._cache_lock = threading.Lock()
+        if cache_path:
+            os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+
         credentials_path = "/home/divya/.gcloud/credentials.json"
         print(f"Using credentials path: {credentials_path}")
         if credentials_path:
@@ -39,69 +149,114 @@ class GCPPricingExtractor:
             'app_engine': 'F17B-412E-CB64',
         }
 
+    def _cached_skus(self, service_id: str) -> Optional[List[Dict]]:
+        """SKUs cached for a service within the TTL, or None"""
+        if not self.cache_path:
+            return None
+
+        with self._cache_lock, shelve.open(self.cache_path) as db:
+            entry = db.get(service_id)
+
+        if entry and time.time() - entry['fetched_at'] < self.cache_ttl:
+            return entry['skus']
+        return None
+
+    def _cache_skus(self, service_id: str, skus: List[Dict]):
+        """Store a service's converted SKUs"""
+        if not self.cache_path or not skus:
+            return
+
+        with self._cache_lock, shelve.open(self.cache_path) as db:
+            db[service_id] = {'fetched_at': time.time(), 'skus': skus}
+
+    @staticmethod
+    def _sku_to_dict(sku) -> Dict:
+        """Convert one Cloud Catalog SKU message to the pricing file layout"""
+        # Each proto-plus attribute access wraps a field, so nested messages are read once into locals
+        category = sku.category
+        pricing_infos = []
+
+        # Extract pricing tiers
+        for pricing_info in sku.pricing_info:
+            expression = pricing_info.pricing_expression
+            effective_time = pricing_info.effective_time
+
+            # Extract tiered rates (units stays an int; the preprocessor int()s it either way)
+            tiered_rates = []
+            for tier in expression.tiered_rates:
+                unit_price = tier.unit_price
+                tiered_rates.append({
+                    'start_usage_amount': tier.start_usage_amount,
+                    'unit_price': {
+                        'currency_code': unit_price.currency_code,
+                        'units': unit_price.units,
+                        'nanos': unit_price.nanos
+                    }
+                })
+
+            pricing_infos.append({
+                'summary': pricing_info.summary,
+                'currency_conversion_rate': pricing_info.currency_conversion_rate,
+                'effective_time': effective_time.isoformat() if effective_time else None,
+                'pricing_expression': {
+                    'usage_unit': expression.usage_unit,
+                    'display_quantity': expression.display_quantity,
+                    'usage_unit_description': expression.usage_unit_description,
+                    'tiered_rates': tiered_rates
+                }
+            })
+
+        return {
+            'name': sku.name,
+            'sku_id': sku.sku_id,
+            'description': sku.description,
+            'category': {
+                'service_display_name': category.service_display_name,
+                'resource_family': category.resource_family,
+                'resource_group': category.resource_group,
+                'usage_type': category.usage_type
+            },
+            'service_regions': list(sku.service_regions),
+            'pricing_info': pricing_infos
+        }
+
+    def _convert_page(self, skus) -> List[Dict]:
+        """Convert one page of SKU messages"""
+        return [self._sku_to_dict(sku) for sku in skus]
+
     def get_service_skus(self, service_id: str, service_name: str) -> List[Dict]:
         """Get all SKUs (pricing items) for a specific service"""
         print(f"\nFetching {service_name} pricing data...")
+
+        cached = self._cached_skus(service_id)
+        if cached is not None:
+            print(f"  ✅ Using cached SKUs ({len(cached)}), fetched within the last {self.cache_ttl // 3600}h")
+            return cached
+
         all_skus = []
 
         try:
             service_path = f"services/{service_id}"
-            request = billing_v1.ListSkusRequest(parent=service_path)
-            page_result = self.client.list_skus(request=request)
-
-            page_count = 0
-            for sku in page_result:
-                page_count += 1
-
-                # Extract pricing information
-                sku_data = {
-                    'name': sku.name,
-                    'sku_id': sku.sku_id,
-                    'description': sku.description,
-                    'category': {
-                        'service_display_name': sku.category.service_display_name,
-                        'resource_family': sku.category.resource_family,
-                        'resource_group': sku.category.resource_group,
-                        'usage_type': sku.category.usage_type
-                    },
-                    'service_regions': list(sku.service_regions),
-                    'pricing_info': []
-                }
+            request = billing_v1.ListSkusRequest(parent=service_path, page_size=SKU_PAGE_SIZE)
+            page_result = self.client.list_skus(request=request, metadata=[('x-goog-fieldmask', SKU_FIELD_MASK)])
 
-                # Extract pricing tiers
-                for pricing_info in sku.pricing_info:
-                    pricing_data = {
-                        'summary': pricing_info.summary,
-                        'currency_conversion_rate': pricing_info.currency_conversion_rate,
-                        'effective_time': pricing_info.effective_time.isoformat() if pricing_info.effective_time else None,
-                        'pricing_expression': {
-                            'usage_unit': pricing_info.pricing_expression.usage_unit,
-                            'display_quantity': pricing_info.pricing_expression.display_quantity,
-                            'usage_unit_description': pricing_info.pricing_expression.usage_unit_description,
-                            'tiered_rates': []
-                        }
-                    }
-
-                    # Extract tiered rates
-                    for tier in pricing_info.pricing_expression.tiered_rates:
-                        tier_data = {
-                            'start_usage_amount': tier.start_usage_amount,
-                            'unit_price': {
-                                'currency_code': tier.unit_price.currency_code,
-                                'units': str(tier.unit_price.units),
-                                'nanos': tier.unit_price.nanos
-                            }
-                        }
-                        pricing_data['pricing_expression']['tiered_rates'].append(tier_data)
-
-                    sku_data['pricing_info'].append(pricing_data)
+            # Pages are converted on worker threads while the next page is fetched; at most
+            # two pages per worker are pending, so raw pages don't pile up in memory
+            with ThreadPoolExecutor(max_workers=self.convert_workers) as pool:
+                pending = deque()
+                for page in page_result.pages:
+                    pending.append(pool.submit(self._convert_page, page.skus))
 
-                all_skus.append(sku_data)
+                    while len(pending) >= self.convert_workers * 2:
+                        all_skus.extend(pending.popleft().result())
+                        print(f"  Processed {len(all_skus)} SKUs...")
 
-                if page_count % 50 == 0:
-                    print(f"  Processed {page_count} SKUs...")
+                while pending:
+                    all_skus.extend(pending.popleft().result())
+                    print(f"  Processed {len(all_skus)} SKUs...")
 
             print(f"  ✅ Complete! Total SKUs: {len(all_skus)}")
+            self._cache_skus(service_id, all_skus)
 
         except Exception as e:
             print(f"  ❌ Error fetching {service_name} pricing: {str(e)}")
@@ -185,24 +340,45 @@ class GCPPricingExtractor:
             'App Engine'
         )
 
-    def save_to_file(self, service_name: str, data: List[Dict], output_dir: str = '.'):
-        """Save pricing data to JSON file"""
+    def save_to_file(self, service_name: str, data: List[Dict], output_dir: str = '.', compress: bool = True):
+        """
+        Save pricing data as JSON Lines (.jsonl.gz when compress is set)
+
+        Records are written one per line; service name, extraction date and
+        count go to a `<filename>.meta` JSON sidecar.
+        """
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"{output_dir}/gcp_{service_name}_pricing_{timestamp}.json"
+        filename = f"{output_dir}/gcp_{service_name}_pricing_{timestamp}.jsonl"
+
+        if compress:
+            filename += '.gz'
+        _write_jsonl(filename, data, compress)
 
-        with open(filename, 'w') as f:
-            json.dump({
-                'service': service_name,
-                'extraction_date': datetime.now().isoformat(),
-                'total_skus': len(data),
-                'skus': data
-            }, f, indent=2)
+        metadata = {
+            'service': service_name,
+            'extraction_date': datetime.now().isoformat(),
+            'total_skus': len(data)
+        }
+        with open(f"{filename}.meta", 'w') as f:
+            json.dump(metadata, f, indent=2)
 
         print(f"  ✅ Saved {service_name} → {filename}")
         return filename
 
-    def extract_all_services(self, output_dir: str = '.'):
-        """Extract pricing data for all services"""
+    def extract_all_services(self, output_dir: str = '.', max_workers: int = 8, output_format: str = 'jsonl'):
+        """
+        Extract pricing data for all services
+
+        Services are listed concurrently; the Cloud Catalog client is thread-safe
+        and each service is an independent paginated stream.
+
+        Args:
+            output_dir: Directory for the per-service output
+            max_workers: Number of services fetched at once
+            output_format: 'jsonl' (one JSON Lines file per service, read by GCP_preprocess) or
+                'parquet' (one dataset under gcp_pricing_{timestamp}.parquet/, hive-partitioned
+                by service)
+        """
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
 
         summary = {
@@ -237,17 +413,35 @@ class GCPPricingExtractor:
             ('storage', self.get_storage_pricing, 'Cloud Storage'),
         ]
 
-        for service_key, fetch_func, display_name in services:
-            print("\n" + "="*60)
-            print(f"EXTRACTING: {display_name}")
-            print("="*60)
-
+        def fetch_and_save(service_key, fetch_func, display_name):
+            print(f"\nEXTRACTING: {display_name}")
             data = fetch_func()
+            if output_format == 'parquet':
+                if data:
+                    file_path = f"{output_dir}/gcp_pricing_{timestamp}.parquet/service={service_key}/{service_key}.parquet"
+                    _write_parquet(file_path, data)
+                    print(f"  ✅ Saved {service_key} → {file_path}")
+            else:
+                self.save_to_file(service_key, data, output_dir)
+            return len(data)
+
+        counts = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {pool.submit(fetch_and_save, *service): service[0] for service in services}
+            for future in as_completed(futures):
+                service_key = futures[future]
+                try:
+                    counts[service_key] = future.result()
+                except Exception as e:
+                    print(f"  ❌ Error extracting {service_key}: {str(e)}")
+                    counts[service_key] = 0
+
+        # Summary keeps the service order of the list above
+        for service_key, _, display_name in services:
             summary['services'][service_key] = {
                 'display_name': display_name,
-                'sku_count': len(data)
+                'sku_count': counts[service_key]
             }
-            self.save_to_file(service_key, data, output_dir)
 
         # Save summary
         summary_file = f"{output_dir}/gcp_pricing_summary_{timestamp}.json"
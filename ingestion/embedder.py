@@ -4,14 +4,28 @@ Generates embeddings using Gemma through Ollama
 """
 
 import requests
-from typing import List
+import hashlib
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Dict, List, Optional
+
+try:
+    import ollama
+except ImportError:
+    ollama = None
 
 
 class EmbeddingGenerator:
     """Generate embeddings for cloud service descriptions using Ollama"""
 
     def __init__(self, model_name: str = "embeddinggemma:300m", ollama_host: str = "http://localhost:11434",
-                 batch_size: int = 32):
+                 batch_size: int = 32, mem_cache_size: int = 50000, concurrency: int = 4):
         """
         Initialize the embedding generator
 
@@ -19,22 +33,42 @@ class EmbeddingGenerator:
             model_name: Ollama model to use (embeddinggemma:300m or other embedding models)
             ollama_host: Ollama API endpoint
             batch_size: Number of texts to embed in one batch
+            mem_cache_size: Texts whose embeddings are kept in memory (LRU) for duplicates
+            concurrency: Batches in flight at once in embed_texts
         """
         self.model_name = model_name
         self.ollama_host = ollama_host
         self.batch_size = batch_size
+        self.concurrency = concurrency
         self.dimension = None  # Will be set on first embedding
 
+        # text -> embedding, least recently used first
+        self.mem_cache_size = mem_cache_size
+        self._mem_cache = OrderedDict()
+        self._mem_lock = threading.Lock()
+
+        # Keep-alive session: every batch POST reuses the same connection to Ollama
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16,
+                              max_retries=Retry(total=3, backoff_factor=0.5))
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+        # With the ollama package installed, embeddings go through its pooled client
+        self._client = ollama.Client(host=ollama_host) if ollama is not None else None
+
         # Test connection and get dimension
         try:
-            response = requests.get(f"{ollama_host}/api/tags")
+            response = self._session.get(f"{ollama_host}/api/tags")
             response.raise_for_status()
             print(f" Connected to Ollama at {ollama_host}")
 
-            # Generate test embedding to detect dimension
+            # Read the dimension from the model metadata; embed a probe text only if it's missing
             print(f"   Detecting embedding dimension...")
-            test_embedding = self.embed_single("test")
-            self.dimension = len(test_embedding)
+            self.dimension = self._model_dimension()
+            if self.dimension is None:
+                test_embedding = self.embed_single("test")
+                self.dimension = len(test_embedding)
 
         except Exception as e:
             raise ConnectionError(f"Failed to connect to Ollama: {str(e)}")
@@ -42,6 +76,31 @@ class EmbeddingGenerator:
         print(f" Initialized EmbeddingGenerator with model: {model_name}")
         print(f"   Dimension: {self.dimension}, Batch size: {batch_size}")
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Release the pooled connections"""
+        self._session.close()
+
+    def _model_dimension(self) -> Optional[int]:
+        """Embedding length from /api/show model info (`<architecture>.embedding_length`), if reported"""
+        try:
+            response = self._session.post(f"{self.ollama_host}/api/show", json={"model": self.model_name})
+            response.raise_for_status()
+            model_info = response.json().get("model_info") or {}
+        except Exception as e:
+            print(f"   Could not read model info: {str(e)}")
+            return None
+
+        for key, value in model_info.items():
+            if key.endswith(".embedding_length") and isinstance(value, int):
+                return value
+        return None
+
     def embed_single(self, text: str) -> List[float]:
         """
         Generate embedding for a single text
@@ -52,26 +111,7 @@ class EmbeddingGenerator:
         Returns:
             Embedding vector
         """
-        try:
-            response = requests.post(f"{self.ollama_host}/api/embed",
-                json={
-                    "model": self.model_name,
-                    "input": text
-                }
-            )
-            response.raise_for_status()
-            embedding = response.json()["embeddings"][0]
-
-            # Set dimension on first call
-            if self.dimension is None:
-                self.dimension = len(embedding)
-                print(f"   Detected embedding dimension: {self.dimension}")
-
-            return embedding
-
-        except Exception as e:
-            print(f" Error generating embedding: {str(e)}")
-            raise
+        return self.embed_batch([text])[0]
 
     def embed_batch(self, texts: List[str]) -> List[List[float]]:
         """
@@ -86,17 +126,55 @@ class EmbeddingGenerator:
         if not texts:
             return []
 
-        embeddings = []
-        for text in texts:
-            embedding = self.embed_single(text)
-            embeddings.append(embedding)
-
-        return embeddings
+        # Duplicates (in this batch or seen earlier in the run) are embedded only once
+        found = {}
+        with self._mem_lock:
+            for text in texts:
+                if text in self._mem_cache:
+                    self._mem_cache.move_to_end(text)
+                    found[text] = self._mem_cache[text]
+        to_compute = [text for text in dict.fromkeys(texts) if text not in found]
+
+        if to_compute:
+            try:
+                # /api/embed accepts a list input: the whole batch is one request
+                if self._client is not None:
+                    embeddings = self._client.embed(model=self.model_name, input=to_compute)["embeddings"]
+                else:
+                    response = self._session.post(f"{self.ollama_host}/api/embed",
+                        json={
+                            "model": self.model_name,
+                            "input": to_compute
+                        }
+                    )
+                    response.raise_for_status()
+                    embeddings = response.json()["embeddings"]
+
+                # Set dimension on first call
+                if self.dimension is None and embeddings:
+                    self.dimension = len(embeddings[0])
+                    print(f"   Detected embedding dimension: {self.dimension}")
+
+            except Exception as e:
+                print(f" Error generating embedding: {str(e)}")
+                raise
+
+            with self._mem_lock:
+                for text, embedding in zip(to_compute, embeddings):
+                    found[text] = embedding
+                    self._mem_cache[text] = embedding
+                while len(self._mem_cache) > self.mem_cache_size:
+                    self._mem_cache.popitem(last=False)
+
+        return [found[text] for text in texts]
 
     def embed_texts(self, texts: List[str], show_progress: bool = True) -> List[List[float]]:
         """
         Generate embeddings for a list of texts with batching
 
+        Up to `concurrency` batches are in flight at once, so Ollama computes
+        one batch while the previous response is still being parsed.
+
         Args:
             texts: List of text strings to embed
             show_progress: Whether to print progress
@@ -105,28 +183,152 @@ class EmbeddingGenerator:
             List of embedding vectors
         """
         all_embeddings = []
-        total_batches = (len(texts) + self.batch_size - 1) // self.batch_size
-
-        for i in range(0, len(texts), self.batch_size):
-            batch = texts[i:i + self.batch_size]
-            batch_num = i // self.batch_size + 1
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
 
-            if show_progress:
-                print(f"  Processing batch {batch_num}/{total_batches} ({len(batch)} texts)...")
+        # Progress is printed in ~5% steps rather than once per batch
+        progress_every = max(1, len(batches) // 20)
 
-            embeddings = self.embed_batch(batch)
-            all_embeddings.extend(embeddings)
+        with ThreadPoolExecutor(max_workers=max(1, self.concurrency)) as pool:
+            # map yields results in batch order
+            for batch_num, embeddings in enumerate(pool.map(self.embed_batch, batches), start=1):
+                if show_progress and (batch_num % progress_every == 0 or batch_num == len(batches)):
+                    print(f"  Processed batch {batch_num}/{len(batches)} ({len(all_embeddings) + len(embeddings)} texts)")
+                all_embeddings.extend(embeddings)
 
         if show_progress:
             print(f" Generated {len(all_embeddings)} embeddings")
 
         return all_embeddings
 
-    def get_dimension(self) -> int | None:
+    def get_dimension(self) -> Optional[int]:
         """Get the embedding dimension"""
         return self.dimension
 
 
+class CachedEmbeddingGenerator:
+    """
+    Persistent embedding cache in front of an EmbeddingGenerator
+
+    Vectors are stored as float32 bytes in a SQLite table keyed by
+    sha256(model + NUL + text), so re-ingesting unchanged services skips
+    Ollama entirely and only new or edited texts are embedded.
+    """
+
+    # Keys per SELECT ... IN (...) (stays below SQLite's bound-parameter limit)
+    LOOKUP_CHUNK = 500
+
+    def __init__(self, generator: EmbeddingGenerator, cache_path: str = "./cache/ingestion_embeds.sqlite"):
+        """
+        Initialize the cached embedding generator
+
+        Args:
+            generator: Underlying embedding generator
+            cache_path: Path of the SQLite database
+        """
+        self.generator = generator
+        self.model_name = generator.model_name
+        self.batch_size = generator.batch_size
+        self.concurrency = generator.concurrency
+        self.cache_path = cache_path
+
+        Path(cache_path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(cache_path)
+        self._db.execute("CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, vec BLOB NOT NULL)")
+        self._db.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Close the cache database and the generator's connections"""
+        self._db.close()
+        self.generator.close()
+
+    def _key(self, text: str) -> bytes:
+        """Cache key for a text under the current model"""
+        return hashlib.sha256((self.model_name + "\0" + text).encode('utf-8')).digest()
+
+    def _lookup(self, keys: List[bytes]) -> Dict[bytes, List[float]]:
+        """Cached vectors for the given keys"""
+        found = {}
+        for i in range(0, len(keys), self.LOOKUP_CHUNK):
+            chunk = keys[i:i + self.LOOKUP_CHUNK]
+            rows = self._db.execute(
+                f"SELECT key, vec FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk
+            )
+            for key, vec in rows:
+                found[key] = array('f', vec).tolist()
+        return found
+
+    def embed_single(self, text: str) -> List[float]:
+        """
+        Generate embedding for a single text, using the cache when possible
+
+        Args:
+            text: Text string to embed
+
+        Returns:
+            Embedding vector
+        """
+        return self.embed_texts([text], show_progress=False)[0]
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """
+        Generate embeddings for a batch of texts, using the cache when possible
+
+        Args:
+            texts: List of text strings to embed
+
+        Returns:
+            List of embedding vectors
+        """
+        return self.embed_texts(texts, show_progress=False)
+
+    def embed_texts(self, texts: List[str], show_progress: bool = True) -> List[List[float]]:
+        """
+        Generate embeddings for a list of texts, embedding only cache misses
+
+        Args:
+            texts: List of text strings to embed
+            show_progress: Whether to print progress
+
+        Returns:
+            List of embedding vectors, in input order
+        """
+        keys = [self._key(text) for text in texts]
+        cached = self._lookup(list(set(keys)))
+
+        # Each distinct uncached text is embedded once
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+
+        if show_progress:
+            print(f"  Embedding cache: {len(texts) - sum(k in missing for k in keys)} hits, "
+                  f"{len(missing)} texts to embed")
+
+        if missing:
+            embeddings = self.generator.embed_texts(list(missing.values()), show_progress=show_progress)
+            new_vectors = dict(zip(missing.keys(), embeddings))
+
+            self._db.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, vec) VALUES (?, ?)",
+                [(key, array('f', vec).tobytes()) for key, vec in new_vectors.items()]
+            )
+            self._db.commit()
+            cached.update(new_vectors)
+
+        return [cached[key] for key in keys]
+
+    def get_dimension(self) -> Optional[int]:
+        """Get the embedding dimension"""
+        return self.generator.get_dimension()
+
+
 if __name__ == "__main__":
     # Test the embedder
     print("\n" + "="*60)
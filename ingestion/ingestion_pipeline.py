@@ -4,13 +4,33 @@ Orchestrates the full data ingestion process: load JSON â†’ generate embedd
 """
 
 import json
+import mmap
 import os
-from typing import List, Dict, Any, Optional
-from qdrant_client.models import PointStruct
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 import uuid
 
-from embedder import EmbeddingGenerator
+from embedder import EmbeddingGenerator, CachedEmbeddingGenerator
 from qdrant_manager import QdrantManager
+from qdrant_client.models import Distance
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 class IngestionPipeline:
@@ -19,8 +39,10 @@ class IngestionPipeline:
     def __init__(self, qdrant_host: str = "localhost", qdrant_port: int = 6333,
                  qdrant_url: Optional[str] = None, qdrant_api_key: Optional[str] = None,
                  collection_name: str = "cloud_services", embedding_batch_size: int = 32,
-                 upload_batch_size: int = 100, ollama_host: str = "http://localhost:11434",
-                 model_name: str = "embeddinggemma:300m"):
+                 upload_batch_size: Optional[int] = None, ollama_host: str = "http://localhost:11434",
+                 model_name: str = "embeddinggemma:300m", enable_quantization: bool = False,
+                 embedding_cache_path: Optional[str] = "./cache/ingestion_embeds.sqlite",
+                 quantization_type: str = "scalar", distance: str = "dot", prefer_grpc: bool = True):
         """
         Initialize the ingestion pipeline
 
@@ -31,11 +53,22 @@ class IngestionPipeline:
             qdrant_api_key: API key for Qdrant authentication (required for cloud instances)
             collection_name: Name of the Qdrant collection
             embedding_batch_size: Batch size for embedding generation
-            upload_batch_size: Batch size for uploading to Qdrant
+            upload_batch_size: Batch size for uploading to Qdrant (None sizes batches from the
+                vector dimension and payload size)
             ollama_host: Ollama API endpoint
             model_name: Ollama model to use for embeddings
+            enable_quantization: Create the collection with quantized vectors
+            embedding_cache_path: SQLite cache of embeddings reused across runs (None disables)
+            quantization_type: 'scalar' (int8) or 'binary' quantization when enabled
+            distance: Metric of a new collection: 'dot' (vectors are L2-normalized at ingestion,
+                so it ranks like cosine without per-comparison normalization) or 'cosine'
+            prefer_grpc: Talk to Qdrant over gRPC (falls back to REST if unreachable)
         """
         self.collection_name = collection_name
+        self.enable_quantization = enable_quantization
+        self.quantization_type = quantization_type
+        self.distance = Distance.DOT if distance == "dot" else Distance.COSINE
+        self.embedding_batch_size = embedding_batch_size
         self.upload_batch_size = upload_batch_size
 
         print("="*80)
@@ -45,9 +78,12 @@ class IngestionPipeline:
         # Initialize embedder
         self.embedder = EmbeddingGenerator(model_name=model_name, ollama_host=ollama_host,
                                            batch_size=embedding_batch_size)
+        if embedding_cache_path:
+            self.embedder = CachedEmbeddingGenerator(self.embedder, cache_path=embedding_cache_path)
 
         # Initialize Qdrant manager
-        self.qdrant = QdrantManager(host=qdrant_host, port=qdrant_port, url=qdrant_url, api_key=qdrant_api_key)
+        self.qdrant = QdrantManager(host=qdrant_host, port=qdrant_port, url=qdrant_url, api_key=qdrant_api_key,
+                                    prefer_grpc=prefer_grpc)
 
         # Ensure collection exists
         self._setup_collection()
@@ -60,8 +96,13 @@ class IngestionPipeline:
             if dimension is None:
                 raise ValueError("Failed to detect embedding dimension")
             self.qdrant.create_collection(collection_name=self.collection_name,
-                                          vector_size=dimension
+                                          vector_size=dimension,
+                                          distance=self.distance,
+                                          quantization=self.enable_quantization,
+                                          quantization_type=self.quantization_type,
+                                          assume_absent=True
             )
+            self.qdrant.create_payload_indexes(self.collection_name)
         else:
             print(f"\n Collection '{self.collection_name}' already exists")
 
@@ -80,8 +121,13 @@ class IngestionPipeline:
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"File not found: {file_path}")
 
-        with open(file_path, 'r') as f:
-            data = json.load(f)
+        # orjson parses straight from the read-only mapping, without copying the file into a bytes object
+        with open(file_path, 'rb') as f:
+            if orjson is not None and os.path.getsize(file_path) > 0:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+                    data = orjson.loads(view)
+            else:
+                data = json.load(f)
 
         provider = data.get('metadata', {}).get('provider', 'unknown')
         services = data.get('services', [])
@@ -91,35 +137,91 @@ class IngestionPipeline:
 
         return data
 
-    def prepare_points(self, services: List[Dict[str, Any]], embeddings: List[List[float]]) -> List[PointStruct]:
+    def iter_services(self, file_path: str) -> Iterator[Dict[str, Any]]:
         """
-        Prepare PointStruct objects for Qdrant upload
+        Stream the services of a standardized services JSON file
+
+        With ijson installed the 'services' array is parsed incrementally, so
+        embedding can start before the whole file has been read; otherwise the
+        file is loaded with json.load.
+
+        Args:
+            file_path: Path to the JSON file
+
+        Yields:
+            Service dictionaries
+        """
+        if ijson is None:
+            yield from self.load_standardized_json(file_path).get('services', [])
+            return
+
+        print(f"\n Streaming data from: {file_path}")
+
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"File not found: {file_path}")
+
+        # metadata precedes services in the preprocessors' output, so this stops early
+        with open(file_path, 'rb') as f:
+            metadata = next(ijson.items(f, 'metadata'), {})
+        print(f"   Provider: {metadata.get('provider', 'unknown')}")
+
+        with open(file_path, 'rb') as f:
+            yield from ijson.items(f, 'services.item', use_float=True)
+
+    def prepare_points(self, services: List[Dict[str, Any]],
+                       embeddings: List[List[float]]) -> Tuple[List[str], Any, List[Dict[str, Any]]]:
+        """
+        Prepare columnar point data for Qdrant upload
+
+        Ids, vectors and payloads are built as parallel arrays, so no per-point
+        PointStruct (and its validation) is constructed.
 
         Args:
             services: List of service dictionaries with embedding_text and blob
             embeddings: List of embedding vectors
 
         Returns:
-            List of PointStruct objects
+            (ids, vectors, payloads); vectors are L2-normalized, a float32 (N, D) array when numpy
+            is installed, otherwise the embedding lists
         """
         if len(services) != len(embeddings):
             raise ValueError(f"Mismatch: {len(services)} services but {len(embeddings)} embeddings")
 
-        points = []
-        for service, embedding in zip(services, embeddings):
-            blob = service.get('blob', {})
+        # Random UUIDs (simple hex form, accepted by Qdrant)
+        ids = [uuid.uuid4().hex for _ in range(len(services))]
 
-            # Create payload with all blob data
-            payload = blob.copy()
+        # Unit-length vectors make DOT equal to cosine similarity. Query vectors come from
+        # Ollama's /api/embed, which already returns L2-normalized embeddings.
+        if np is not None:
+            vectors = np.asarray(embeddings, dtype=np.float32)
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True).clip(min=1e-12)
+        else:
+            vectors = []
+            for embedding in embeddings:
+                norm = max(sum(x * x for x in embedding) ** 0.5, 1e-12)
+                vectors.append([x / norm for x in embedding])
 
-            # Add the embedding text for reference
-            payload['embedding_text'] = service.get('embedding_text', '')
+        # Payload is the blob data plus the embedding text for reference
+        payloads = [
+            {**service.get('blob', {}), 'embedding_text': service.get('embedding_text', '')}
+            for service in services
+        ]
 
-            # Let Qdrant auto-generate UUID
-            point = PointStruct(id=str(uuid.uuid4()), vector=embedding, payload=payload)
-            points.append(point)
+        return ids, vectors, payloads
 
-        return points
+    def _upload_window(self, services: List[Dict[str, Any]], embeddings: List[List[float]]):
+        """Prepare and upload the points of one ingestion window"""
+        ids, vectors, payloads = self.prepare_points(services, embeddings)
+
+        # Upload to Qdrant
+        self.qdrant.upload_collection(
+            collection_name=self.collection_name,
+            ids=ids,
+            vectors=vectors,
+            payloads=payloads,
+            batch_size=self.upload_batch_size,
+            verbose=False
+        )
 
     def ingest_provider(self, provider: str, data_dir: str = "./data"):
         """
@@ -137,47 +239,67 @@ class IngestionPipeline:
         provider_lower = provider.lower()
         file_path = os.path.join(data_dir, provider.upper(), f"{provider_lower}_standardized_services.json")
 
-        # Load data
-        data = self.load_standardized_json(file_path)
-        services = data.get('services', [])
-
-        if not services:
+        # Services are embedded and uploaded in windows while the file is still being read;
+        # a window holds enough batches to keep every concurrent embedding request busy
+        services = self.iter_services(file_path)
+        window_size = self.embedding_batch_size * max(1, self.embedder.concurrency)
+        total = skipped = 0
+
+        print(f"\n Generating embeddings and uploading in windows of {window_size} services...")
+
+        # Uploads run on their own thread: window i is upserted while window i+1 is embedded.
+        # At most two uploads are pending, which bounds the points held in memory.
+        pending = deque()
+        last_report = time.monotonic()
+        with ThreadPoolExecutor(max_workers=1) as uploader:
+            while True:
+                window = list(islice(services, window_size))
+                if not window:
+                    break
+
+                # Filter out empty texts in one pass (isspace avoids a stripped copy per text)
+                valid_services, valid_texts = [], []
+                for service in window:
+                    text = service.get('embedding_text', '')
+                    if text and not text.isspace():
+                        valid_services.append(service)
+                        valid_texts.append(text)
+                skipped += len(window) - len(valid_services)
+                if not valid_services:
+                    continue
+
+                embeddings = self.embedder.embed_texts(valid_texts, show_progress=False)
+
+                while len(pending) >= 2:
+                    pending.popleft().result()  # re-raises upload errors
+
+                pending.append(uploader.submit(self._upload_window, valid_services, embeddings))
+                total += len(valid_services)
+
+                # Progress at most every few seconds, not once per window
+                if time.monotonic() - last_report >= 5:
+                    print(f"  Embedded {total} services so far...")
+                    last_report = time.monotonic()
+
+            while pending:
+                pending.popleft().result()
+
+        print(f"  Embedded and uploaded {total} services")
+
+        if skipped:
+            print(f"  Filtered out {skipped} services with empty embedding text")
+
+        if not total:
             print(f"!!!  No services found in {file_path}")
             return
 
-        # Extract embedding texts
-        print("\n Extracting embedding texts...")
-        embedding_texts = [service.get('embedding_text', '') for service in services]
-
-        # Filter out empty texts
-        valid_indices = [i for i, text in enumerate(embedding_texts) if text.strip()]
-        if len(valid_indices) < len(embedding_texts):
-            print(f"  Filtering out {len(embedding_texts) - len(valid_indices)} services with empty embedding text")
-
-        valid_services = [services[i] for i in valid_indices]
-        valid_texts = [embedding_texts[i] for i in valid_indices]
-
-        # Generate embeddings
-        print(f"\n Generating embeddings for {len(valid_texts)} services...")
-        embeddings = self.embedder.embed_texts(valid_texts)
-
-        # Prepare points
-        print(f"\n Preparing {len(valid_services)} points for upload...")
-        points = self.prepare_points(valid_services, embeddings)
-
-        # Upload to Qdrant
-        self.qdrant.upload_points(
-            collection_name=self.collection_name,
-            points=points,
-            batch_size=self.upload_batch_size
-        )
-
         # Print summary
         print("\n" + "="*80)
         print(f" {provider.upper()} INGESTION COMPLETE")
         print("="*80)
 
-        # Get collection info
+        # Uploads don't wait for Qdrant to apply them, so let it catch up before reading counts
+        self.qdrant.wait_for_green(self.collection_name)
         info = self.qdrant.get_collection_info(self.collection_name)
         print(f"\n Collection Status:")
         print(f"   Total points in collection: {info.get('points_count', 0)}")
@@ -207,16 +329,31 @@ def main():
                         help="Ollama API endpoint")
     parser.add_argument("--model", type=str, default="embeddinggemma:300m",
                         help="Ollama model name for embeddings")
+    parser.add_argument("--quantize", action="store_true",
+                        help="Store vectors with quantization (new collections only)")
+    parser.add_argument("--quantization-type", type=str, default="scalar", choices=['scalar', 'binary'],
+                        help="Quantization used with --quantize: scalar (int8) or binary (1 bit)")
+    parser.add_argument("--no-grpc", action="store_true",
+                        help="Use Qdrant's REST API instead of gRPC")
+    parser.add_argument("--distance", type=str, default="dot", choices=['dot', 'cosine'],
+                        help="Distance metric for a new collection (vectors are normalized, so dot == cosine)")
+    parser.add_argument("--embedding-cache", type=str, default="./cache/ingestion_embeds.sqlite",
+                        help="SQLite embedding cache reused across runs (empty string disables)")
 
     args = parser.parse_args()
 
     # Initialize pipeline
     pipeline = IngestionPipeline(qdrant_host=args.qdrant_host, qdrant_port=args.qdrant_port,
         qdrant_url=args.qdrant_url, qdrant_api_key=args.qdrant_api_key, collection_name=args.collection,
-        ollama_host=args.ollama_host, model_name=args.model)
+        ollama_host=args.ollama_host, model_name=args.model, enable_quantization=args.quantize,
+        embedding_cache_path=args.embedding_cache or None, quantization_type=args.quantization_type,
+        distance=args.distance, prefer_grpc=not args.no_grpc)
 
     # Ingest data
-    pipeline.ingest_provider(args.provider, data_dir=args.data_dir)
+    try:
+        pipeline.ingest_provider(args.provider, data_dir=args.data_dir)
+    finally:
+        pipeline.embedder.close()
 
 
 if __name__ == "__main__":
@@ -3,16 +3,37 @@ Qdrant Collection Manager
 Handles Qdrant collection creation, configuration, and operations
 """
 
+import time
+
 from qdrant_client import QdrantClient
-from qdrant_client.models import (Distance, VectorParams, PointStruct, Filter)
+from qdrant_client.models import (Distance, VectorParams, PointStruct, Filter, ScalarQuantization,
+                                  ScalarQuantizationConfig, ScalarType, BinaryQuantization,
+                                  BinaryQuantizationConfig, PayloadSchemaType, CollectionStatus)
 from typing import List, Dict, Any, Optional
 
 
+# Filterable payload fields indexed on new collections (same set as scripts/create_qdrant_indexes.py)
+PAYLOAD_INDEXES = [
+    ("provider", PayloadSchemaType.KEYWORD),
+    ("category", PayloadSchemaType.KEYWORD),
+    ("service_type", PayloadSchemaType.KEYWORD),
+    ("service_name", PayloadSchemaType.KEYWORD),
+    ("region", PayloadSchemaType.KEYWORD),
+    ("supports_auto_scaling", PayloadSchemaType.BOOL),
+    ("supports_multi_az", PayloadSchemaType.BOOL),
+    ("supports_encryption", PayloadSchemaType.BOOL),
+]
+
+# Request size aimed for when the upload batch size is chosen automatically
+UPLOAD_TARGET_BYTES = 4 * 1024 * 1024
+MIN_UPLOAD_BATCH = 64
+
+
 class QdrantManager:
     """Manages Qdrant collections and operations"""
 
     def __init__(self, host: str = "localhost", port: int = 6333, url: Optional[str] = None,
-                 api_key: Optional[str] = None):
+                 api_key: Optional[str] = None, prefer_grpc: bool = True, grpc_port: int = 6334):
         """
         Initialize Qdrant client
 
@@ -21,15 +42,36 @@ class QdrantManager:
             port: Qdrant server port (used if url is not provided)
             url: Full URL to Qdrant instance
             api_key: API key for authentication (required for cloud instances)
+            prefer_grpc: Use gRPC, which sends vectors as packed floats instead of JSON;
+                falls back to REST when the gRPC port can't be reached
+            grpc_port: Qdrant gRPC port
         """
+        self.client = self._connect(host, port, url, api_key, prefer_grpc, grpc_port)
+
+        if prefer_grpc:
+            try:
+                self.client.get_collections()
+            except Exception as e:
+                print(f"  gRPC unavailable ({str(e)}), falling back to REST")
+                prefer_grpc = False
+                self.client = self._connect(host, port, url, api_key, prefer_grpc, grpc_port)
+
+        transport = "gRPC" if prefer_grpc else "REST"
+        print(f"Connected to Qdrant at {url or f'{host}:{port}'} ({transport})")
+
+        # Collections known to exist; kept in step with create / delete
+        self._known_collections = set()
+
+        # Collection -> automatically chosen upload batch size
+        self._batch_sizes = {}
+
+    @staticmethod
+    def _connect(host: str, port: int, url: Optional[str], api_key: Optional[str], prefer_grpc: bool,
+                 grpc_port: int) -> QdrantClient:
+        """Create the client for a URL (cloud instances) or host:port (local instances)"""
         if url:
-            # Use URL-based connection (for cloud instances)
-            self.client = QdrantClient(url=url, api_key=api_key)
-            print(f"Connected to Qdrant at {url}")
-        else:
-            # Use host:port connection (for local instances)
-            self.client = QdrantClient(host=host, port=port)
-            print(f"Connected to Qdrant at {host}:{port}")
+            return QdrantClient(url=url, api_key=api_key, prefer_grpc=prefer_grpc, grpc_port=grpc_port)
+        return QdrantClient(host=host, port=port, prefer_grpc=prefer_grpc, grpc_port=grpc_port)
 
     def collection_exists(self, collection_name: str) -> bool:
         """
@@ -41,15 +83,22 @@ class QdrantManager:
         Returns:
             True if collection exists, False otherwise
         """
+        if collection_name in self._known_collections:
+            return True
+
         try:
-            collections = self.client.get_collections().collections
-            return any(col.name == collection_name for col in collections)
+            exists = self.client.collection_exists(collection_name)
         except Exception as e:
             print(f" Error checking collection existence: {str(e)}")
             return False
 
+        if exists:
+            self._known_collections.add(collection_name)
+        return exists
+
     def create_collection(self, collection_name: str, vector_size: int, distance: Distance = Distance.COSINE,
-                          recreate: bool = False):
+                          recreate: bool = False, quantization: bool = False, quantization_type: str = "scalar",
+                          on_disk: Optional[bool] = None, assume_absent: bool = False):
         """
         Create a new collection
 
@@ -58,52 +107,184 @@ class QdrantManager:
             vector_size: Dimension of the embedding vectors
             distance: Distance metric (COSINE, EUCLID, DOT)
             recreate: If True, delete existing collection and create new
+            quantization: If True, keep a quantized copy of the vectors in RAM
+            quantization_type: 'scalar' (int8, 4x smaller than float32) or
+                'binary' (1 bit per dimension, 32x smaller; coarser, relies on rescoring)
+            on_disk: Keep the full-precision vectors on disk (defaults to on when quantized,
+                since they are then only read for rescoring)
+            assume_absent: Skip the existence check (the caller has just checked)
         """
-        if self.collection_exists(collection_name):
+        if quantization_type not in ("scalar", "binary"):
+            raise ValueError(f"Unknown quantization type: {quantization_type}")
+        if on_disk is None:
+            on_disk = quantization
+
+        if not assume_absent and self.collection_exists(collection_name):
             if recreate:
                 print(f"  Deleting existing collection: {collection_name}")
                 self.client.delete_collection(collection_name)
+                self._known_collections.discard(collection_name)
             else:
                 print(f"  Collection '{collection_name}' already exists, skipping creation")
                 return
 
         print(f" Creating collection: {collection_name}")
-        print(f"   Vector size: {vector_size}, Distance: {distance}")
+        print(f"   Vector size: {vector_size}, Distance: {distance}, "
+              f"Quantization: {quantization_type if quantization else 'none'}, On disk: {on_disk}")
+
+        quantization_config = None
+        if quantization and quantization_type == "binary":
+            quantization_config = BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+        elif quantization:
+            quantization_config = ScalarQuantization(
+                scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+            )
 
         result = self.client.create_collection(collection_name=collection_name,
-                                               vectors_config=VectorParams(size=vector_size, distance=distance))
+                                               vectors_config=VectorParams(size=vector_size, distance=distance,
+                                                                           on_disk=on_disk),
+                                               quantization_config=quantization_config)
+        self._known_collections.add(collection_name)
 
         print(f" Collection '{collection_name}' created successfully")
 
-    def upload_points(self, collection_name: str, points: List[PointStruct], batch_size: int = 100):
+    def create_payload_indexes(self, collection_name: str, indexes=PAYLOAD_INDEXES):
+        """
+        Index filterable payload fields
+
+        Creating the indexes before upload lets Qdrant build them as points
+        arrive, so filtered searches don't scan payloads.
+
+        Args:
+            collection_name: Name of the collection
+            indexes: (field name, PayloadSchemaType) pairs
+        """
+        for field_name, field_type in indexes:
+            try:
+                self.client.create_payload_index(collection_name=collection_name, field_name=field_name,
+                                                 field_schema=field_type)
+                print(f"   Created payload index for {field_name}")
+            except Exception as e:
+                if "already exists" in str(e).lower():
+                    print(f"   Payload index for {field_name} already exists")
+                else:
+                    print(f" Error creating payload index for {field_name}: {str(e)}")
+
+    def _auto_batch_size(self, collection_name: str, vector_size: int, payload: Dict[str, Any],
+                         total_points: int) -> int:
+        """
+        Upload batch size that makes each request roughly UPLOAD_TARGET_BYTES
+
+        Points are estimated as float32 vector bytes plus the size of a sample
+        payload; the estimate is computed once per collection.
+        """
+        if collection_name not in self._batch_sizes:
+            per_point_bytes = vector_size * 4 + sum(len(str(k)) + len(str(v)) for k, v in payload.items())
+            self._batch_sizes[collection_name] = max(MIN_UPLOAD_BATCH, UPLOAD_TARGET_BYTES // max(1, per_point_bytes))
+        return max(1, min(total_points, self._batch_sizes[collection_name]))
+
+    def upload_points(self, collection_name: str, points: List[PointStruct], batch_size: Optional[int] = None,
+                      parallel: int = 1, wait: bool = False):
         """
         Upload points to a collection in batches
 
+        Uses the client's bulk uploader, which batches, retries failed batches
+        and (with parallel > 1) spreads them over worker processes.
+
         Args:
             collection_name: Name of the collection
             points: List of PointStruct objects
-            batch_size: Number of points to upload per batch
+            batch_size: Number of points to upload per batch (None sizes batches to ~4 MB)
+            parallel: Upload worker processes (worth it for large one-shot uploads only,
+                since the pool is started on every call)
+            wait: Block until Qdrant has applied each batch (without it, call
+                wait_for_green before reading counts back)
         """
         total_points = len(points)
+        if not total_points:
+            return
+        if batch_size is None:
+            batch_size = self._auto_batch_size(collection_name, len(points[0].vector), points[0].payload or {},
+                                               total_points)
         total_batches = (total_points + batch_size - 1) // batch_size
 
-        print(f"\n Uploading {total_points} points to '{collection_name}'")
+        print(f"\n Uploading {total_points} points to '{collection_name}' ({total_batches} batches)")
+
+        try:
+            self.client.upload_points(collection_name=collection_name, points=points, batch_size=batch_size,
+                                      parallel=parallel, wait=wait, max_retries=3)
+        except Exception as e:
+            print(f"   Upload failed - {str(e)}")
+            raise
+
+        print(f" Successfully uploaded all {total_points} points")
+
+    def upload_collection(self, collection_name: str, ids: List[str], vectors: Any, payloads: List[Dict[str, Any]],
+                          batch_size: Optional[int] = None, parallel: int = 1, wait: bool = False,
+                          verbose: bool = True):
+        """
+        Upload points given as parallel id / vector / payload arrays
+
+        Skips building PointStruct models; the client batches the arrays directly.
 
-        for i in range(0, total_points, batch_size):
-            batch = points[i:i + batch_size]
-            batch_num = i // batch_size + 1
+        Args:
+            collection_name: Name of the collection
+            ids: Point ids
+            vectors: (N, D) numpy array or sequence of vectors
+            payloads: Point payloads
+            batch_size: Number of points to upload per batch (None sizes batches to ~4 MB)
+            parallel: Upload worker processes (see upload_points)
+            wait: Block until Qdrant has applied each batch (without it, call
+                wait_for_green before reading counts back)
+            verbose: Print start / completion lines (errors are always printed)
+        """
+        total_points = len(ids)
+        if not total_points:
+            return
+        if batch_size is None:
+            batch_size = self._auto_batch_size(collection_name, len(vectors[0]), payloads[0], total_points)
+        total_batches = (total_points + batch_size - 1) // batch_size
 
+        if verbose:
+            print(f"\n Uploading {total_points} points to '{collection_name}' ({total_batches} batches)")
+
+        try:
+            self.client.upload_collection(collection_name=collection_name, vectors=vectors, payload=payloads,
+                                          ids=ids, batch_size=batch_size, parallel=parallel, wait=wait,
+                                          max_retries=3)
+        except Exception as e:
+            print(f"   Upload failed - {str(e)}")
+            raise
+
+        if verbose:
+            print(f" Successfully uploaded all {total_points} points")
+
+    def wait_for_green(self, collection_name: str, timeout: float = 120.0, poll_interval: float = 0.5) -> bool:
+        """
+        Block until a collection's status is green, i.e. uploads sent with
+        wait=False have been applied and optimizers are idle
+
+        Args:
+            collection_name: Name of the collection
+            timeout: Give up after this many seconds
+            poll_interval: Seconds between status checks
+
+        Returns:
+            True if the collection turned green within the timeout
+        """
+        deadline = time.monotonic() + timeout
+        while True:
             try:
-                self.client.upsert(
-                    collection_name=collection_name,
-                    points=batch
-                )
-                print(f"   Batch {batch_num}/{total_batches}: Uploaded {len(batch)} points")
+                if self.client.get_collection(collection_name).status == CollectionStatus.GREEN:
+                    return True
             except Exception as e:
-                print(f"   Batch {batch_num}/{total_batches}: Failed - {str(e)}")
-                raise
+                print(f"   Could not read collection status: {str(e)}")
+                return False
 
-        print(f" Successfully uploaded all {total_points} points")
+            if time.monotonic() >= deadline:
+                print(f"   Collection '{collection_name}' not green after {timeout:.0f}s")
+                return False
+            time.sleep(poll_interval)
 
     def get_collection_info(self, collection_name: str) -> Dict[str, Any]:
         """
@@ -162,6 +343,7 @@ class QdrantManager:
         """Delete a collection"""
         try:
             self.client.delete_collection(collection_name)
+            self._known_collections.discard(collection_name)
             print(f"  Deleted collection: {collection_name}")
         except Exception as e:
             print(f" Error deleting collection: {str(e)}")
@@ -6,52 +6,229 @@ Transforms AWS pricing JSON files into standardized CloudService format
 import json
 import os
 import re
-from typing import List, Dict, Optional
+import sys
+import functools
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from types import MappingProxyType
+from typing import Iterable, Iterator, List, Dict, Optional
 from datetime import datetime
 
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Import the standardized schema (assume it's in the same directory)
-from standard_cloud_service import CloudService, TechnicalSpecs, PricingInfo, ServiceCategory
+from standard_cloud_service import CloudService, TechnicalSpecs, PricingInfo, ServiceCategory, write_services_json
+
+
+# Service type mappings (read-only, shared by every transformer and pool worker)
+SERVICE_TYPE_MAP = MappingProxyType({
+    'ec2': ServiceCategory.COMPUTE.value,
+    'rds': ServiceCategory.DATABASE.value,
+    'lambda': ServiceCategory.SERVERLESS.value,
+    'eks': ServiceCategory.KUBERNETES.value,
+    'ecs': ServiceCategory.CONTAINER.value,
+    's3': ServiceCategory.STORAGE.value
+})
+
+# Region name mappings
+REGION_MAP = MappingProxyType({
+    'US East (N. Virginia)': 'us-east-1',
+    'US East (Ohio)': 'us-east-2',
+    'US West (N. California)': 'us-west-1',
+    'US West (Oregon)': 'us-west-2',
+    'Canada (Central)': 'ca-central-1',
+    'Canada West (Calgary)': 'ca-west-1',
+    'EU (Ireland)': 'eu-west-1',
+    'EU (Frankfurt)': 'eu-central-1',
+    'EU (London)': 'eu-west-2',
+    'EU (Paris)': 'eu-west-3',
+    'EU (Stockholm)': 'eu-north-1',
+    'Asia Pacific (Tokyo)': 'ap-northeast-1',
+    'Asia Pacific (Seoul)': 'ap-northeast-2',
+    'Asia Pacific (Singapore)': 'ap-southeast-1',
+    'Asia Pacific (Sydney)': 'ap-southeast-2',
+    'Asia Pacific (Mumbai)': 'ap-south-1',
+    'South America (São Paulo)': 'sa-east-1',
+    'China (Beijing)': 'cn-north-1',
+    'China (Ningxia)': 'cn-northwest-1'
+})
+
+# Attribute values repeat across 100k+ items (a few dozen regions, engines,
+# storage types); interning keeps one copy of each instead of one per service
+_intern = sys.intern
+
+# Leading number of an attributes.memory value such as "8 GiB" or "1,024 GiB"
+_MEMORY_RE = re.compile(r'([\d.]+)')
+
+# Per-engine RDS pricing files, e.g. rds_MySQL_Single-AZ_pricing_<timestamp>.json
+_RDS_FILE_RE = re.compile(r'rds_.*\.json$')
+
+# GB per unit of an attributes.memory suffix
+_MEMORY_UNITS = {'GIB': 1, 'GB': 1, 'TIB': 1024, 'TB': 1024}
+
+
+@functools.lru_cache(maxsize=4096)
+def _number(value: str) -> float:
+    """Float value of a pricing attribute, 0.0 for 'NA'/empty (cached: vcpu values repeat)"""
+    if not value:
+        return 0.0
+    try:
+        return float(value)
+    except ValueError:
+        return 0.0
+
+
+@functools.lru_cache(maxsize=4096)
+def _memory_gb(memory_str: str) -> float:
+    """GB in a memory string; cached since pricing files repeat a few dozen values"""
+    if not isinstance(memory_str, str):
+        return 0.0
+    # Examples: "8 GiB", "16 GB", "1,024 GiB"
+    memory_str = memory_str.replace(',', '').upper()
+    match = _MEMORY_RE.search(memory_str)
+    if not match:
+        return 0.0
+    # Parse the number once, then scale by the unit that follows it
+    unit = memory_str[match.end():].strip()
+    try:
+        return float(match.group(1)) * _MEMORY_UNITS.get(unit, 0)
+    except ValueError:
+        # e.g. "1.2.3 GiB"
+        return 0.0
+
+
+@functools.lru_cache(maxsize=None)
+def _processor_architecture(processor: str) -> str:
+    """Architecture for a physicalProcessor value (cached per distinct processor)"""
+    processor_lower = processor.lower()
+    if 'graviton' in processor_lower or 'arm' in processor_lower:
+        return "ARM64"
+    elif 'amd' in processor_lower or 'intel' in processor_lower:
+        return "x86_64"
+    return "x86_64"
+
+
+# Use cases per service type; the lists are shared by every service, so never mutated
+_USE_CASES = {
+    'ec2': [
+        "Web servers",
+        "Application servers",
+        "Batch processing",
+        "Development"
+    ],
+    'lambda': [
+        "API backends",
+        "Data processing",
+        "Real-time file processing",
+        "IoT backends",
+        "Scheduled tasks"
+    ],
+    'rds': [
+        "Web applications",
+        "E-commerce platforms",
+        "Mobile applications",
+        "Enterprise applications"
+    ],
+    'eks': [
+        "Microservices",
+        "Container orchestration",
+        "Hybrid applications",
+        "Batch processing"
+    ],
+    'ecs': [
+        "Microservices",
+        "Batch processing",
+        "Web applications",
+        "CI/CD pipelines"
+    ],
+    's3': [
+        "Data lakes",
+        "Backup and restore",
+        "Static website hosting",
+        "Content distribution"
+    ],
+}
+
+# Description per S3 storage class
+_S3_CLASS_DESCRIPTIONS = {
+    'Standard': 'Frequently accessed data with low latency and high throughput',
+    'Intelligent-Tiering': 'Automatic cost savings by moving data between access tiers',
+    'Standard-IA': 'Infrequently accessed data with rapid access when needed',
+    'One Zone-IA': 'Lower-cost option for infrequently accessed data in single AZ',
+    'Glacier': 'Long-term archive with retrieval times from minutes to hours',
+    'Glacier Deep Archive': 'Lowest cost storage for long-term retention',
+}
+
+# Features per S3 storage class (base durability/versioning features first)
+_S3_BASE_FEATURES = [
+    "99.999999999% durability",
+    "Versioning",
+    "Lifecycle policies",
+    "Encryption at rest"
+]
+_S3_FEATURES = {
+    storage_class: _S3_BASE_FEATURES + class_features
+    for storage_class, class_features in {
+        'Standard': ["Low latency", "High throughput", "Frequent access optimized"],
+        'Intelligent-Tiering': ["Automatic tiering", "Cost optimization", "No retrieval fees"],
+        'Standard-IA': ["Lower cost", "Rapid access", "Infrequent access optimized"],
+        'Glacier': ["Archive storage", "Configurable retrieval times", "Lowest cost for archival"],
+    }.items()
+}
+
+
+# Items per task sent to a worker process (amortizes pickling overhead)
+TRANSFORM_CHUNK_SIZE = 512
+
+# Per-process transformer used by the pool workers
+_worker_transformer = None
+
+
+def _init_worker(data_dir: str, now_iso: str):
+    """Build the region/service-type maps once per worker process"""
+    global _worker_transformer
+    _worker_transformer = AWSDataTransformer(data_dir=data_dir, workers=1)
+    _worker_transformer._now_iso = now_iso
+
+
+def _transform_chunk(method_name: str, items: List[Dict]) -> List[Dict]:
+    """Run one _transform_*_item method over a chunk of items in a worker, returning output records"""
+    transform = getattr(_worker_transformer, method_name)
+    return [service.to_record() for service in map(transform, items) if service]
 
 
 class AWSDataTransformer:
     """Transform AWS pricing data into standardized format"""
 
-    def __init__(self, data_dir: str = "./data/AWS"):
+    def __init__(self, data_dir: str = "./data/AWS", workers: Optional[int] = None):
+        """
+        Args:
+            data_dir: Directory holding the AWS pricing JSON files
+            workers: Processes used by transform_all_services (None = CPU count, 1 = serial)
+        """
         self.data_dir = data_dir
+        self.workers = workers or os.cpu_count() or 1
+        # Output records ({'embedding_text', 'blob'}); the CloudService objects
+        # are dropped as soon as they are serialized
         self.services = []
+        self._type_counts = Counter()
+        self._pool = None
 
-        # Service type mappings
-        self.service_type_map = {
-            'ec2': ServiceCategory.COMPUTE.value,
-            'rds': ServiceCategory.DATABASE.value,
-            'lambda': ServiceCategory.SERVERLESS.value,
-            'eks': ServiceCategory.KUBERNETES.value,
-            'ecs': ServiceCategory.CONTAINER.value,
-            's3': ServiceCategory.STORAGE.value
-        }
-
-        # Region name mappings
-        self.region_map = {
-            'US East (N. Virginia)': 'us-east-1',
-            'US East (Ohio)': 'us-east-2',
-            'US West (N. California)': 'us-west-1',
-            'US West (Oregon)': 'us-west-2',
-            'Canada (Central)': 'ca-central-1',
-            'Canada West (Calgary)': 'ca-west-1',
-            'EU (Ireland)': 'eu-west-1',
-            'EU (Frankfurt)': 'eu-central-1',
-            'EU (London)': 'eu-west-2',
-            'EU (Paris)': 'eu-west-3',
-            'EU (Stockholm)': 'eu-north-1',
-            'Asia Pacific (Tokyo)': 'ap-northeast-1',
-            'Asia Pacific (Seoul)': 'ap-northeast-2',
-            'Asia Pacific (Singapore)': 'ap-southeast-1',
-            'Asia Pacific (Sydney)': 'ap-southeast-2',
-            'Asia Pacific (Mumbai)': 'ap-south-1',
-            'South America (São Paulo)': 'sa-east-1',
-            'China (Beijing)': 'cn-north-1',
-            'China (Ningxia)': 'cn-northwest-1'
-        }
+        # last_updated stamped on every service of a run
+        self._now_iso = datetime.now().isoformat()
+
+        # Constant lookups live at module level; these are aliases
+        self.service_type_map = SERVICE_TYPE_MAP
+        self.region_map = REGION_MAP
 
     def transform_all_services(self, output_file: str = "aws_standardized_services.json"):
         """Transform all AWS service files"""
@@ -59,13 +236,25 @@ class AWSDataTransformer:
         print("AWS DATA TRANSFORMATION")
         print("="*80)
 
-        # Process each service type
-        self.transform_ec2()
-        self.transform_lambda()
-        self.transform_rds()
-        self.transform_eks()
-        self.transform_ecs()
-        self.transform_s3()
+        # One timestamp for the whole run instead of one datetime.now() per item
+        self._now_iso = datetime.now().isoformat()
+
+        # Process each service type; items are transformed in a shared process pool
+        if self.workers > 1:
+            print(f"Using {self.workers} worker processes")
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                             initargs=(self.data_dir, self._now_iso))
+        try:
+            self.transform_ec2()
+            self.transform_lambda()
+            self.transform_rds()
+            self.transform_eks()
+            self.transform_ecs()
+            self.transform_s3()
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
 
         # Save to file
         self.save_services(output_file)
@@ -81,15 +270,7 @@ class AWSDataTransformer:
             print("    EC2 file not found")
             return
 
-        with open(file_path, 'r') as f:
-            data = json.load(f)
-
-        count = 0
-        for item in data:
-            service = self._transform_ec2_item(item)
-            if service:
-                self.services.append(service)
-                count += 1
+        count = self._add_services('ec2', self._iter_items(file_path))
 
         print(f"   Processed {count} EC2 instances")
 
@@ -101,15 +282,7 @@ class AWSDataTransformer:
             print("    Lambda file not found")
             return
 
-        with open(file_path, 'r') as f:
-            data = json.load(f)
-
-        count = 0
-        for item in data:
-            service = self._transform_lambda_item(item)
-            if service:
-                self.services.append(service)
-                count += 1
+        count = self._add_services('lambda', self._iter_items(file_path))
 
         print(f"   Processed {count} Lambda pricing entries")
 
@@ -118,22 +291,13 @@ class AWSDataTransformer:
         print("\n️  Processing RDS...")
 
         # Find all RDS files
-        rds_files = [f for f in os.listdir(self.data_dir) if f.startswith('rds_') and f.endswith('.json')]
+        with os.scandir(self.data_dir) as entries:
+            rds_files = [entry.name for entry in entries if _RDS_FILE_RE.match(entry.name) and entry.is_file()]
 
         total_count = 0
         for rds_file in rds_files:
             file_path = os.path.join(self.data_dir, rds_file)
-            with open(file_path, 'r') as f:
-                data = json.load(f)
-
-            count = 0
-            for item in data:
-                service = self._transform_rds_item(item)
-                if service:
-                    self.services.append(service)
-                    count += 1
-
-            total_count += count
+            total_count += self._add_services('rds', self._iter_items(file_path))
 
         print(f"   Processed {total_count} RDS instances across {len(rds_files)} files")
 
@@ -145,15 +309,7 @@ class AWSDataTransformer:
             print("    EKS file not found")
             return
 
-        with open(file_path, 'r') as f:
-            data = json.load(f)
-
-        count = 0
-        for item in data:
-            service = self._transform_eks_item(item)
-            if service:
-                self.services.append(service)
-                count += 1
+        count = self._add_services('eks', self._iter_items(file_path))
 
         print(f"   Processed {count} EKS pricing entries")
 
@@ -165,15 +321,7 @@ class AWSDataTransformer:
             print("    ECS file not found")
             return
 
-        with open(file_path, 'r') as f:
-            data = json.load(f)
-
-        count = 0
-        for item in data:
-            service = self._transform_ecs_item(item)
-            if service:
-                self.services.append(service)
-                count += 1
+        count = self._add_services('ecs', self._iter_items(file_path))
 
         print(f"   Processed {count} ECS pricing entries")
 
@@ -185,23 +333,17 @@ class AWSDataTransformer:
             print("    S3 file not found")
             return
 
-        with open(file_path, 'r') as f:
-            data = json.load(f)
-
-        count = 0
-        for item in data:
-            service = self._transform_s3_item(item)
-            if service:
-                self.services.append(service)
-                count += 1
+        count = self._add_services('s3', self._iter_items(file_path))
 
         print(f"   Processed {count} S3 pricing entries")
 
     def _transform_ec2_item(self, item: Dict) -> Optional[CloudService]:
         """Transform single EC2 item"""
         try:
-            product = item.get('product', {})
-            attributes = product.get('attributes', {})
+            # Price List entries always carry product.attributes; a malformed
+            # item raises KeyError into the handler below
+            product = item['product']
+            attributes = product['attributes']
             sku = product.get('sku', '')
 
             # Extract instance type
@@ -216,7 +358,8 @@ class AWSDataTransformer:
 
             # Extract region
             location = attributes.get('location', '')
-            region = self.region_map.get(location, location.lower().replace(' ', '-'))
+            # Fallback slug is only built for locations missing from region_map
+            region = self.region_map.get(location) or _intern(location.lower().replace(' ', '-'))
 
             # Extract pricing
             pricing_list = self._extract_pricing(item, region)
@@ -228,10 +371,10 @@ class AWSDataTransformer:
             specs = TechnicalSpecs(
                 vcpu=vcpu,
                 memory_gb=memory_gb,
-                storage_type=attributes.get('storage', 'EBS-optimized'),
-                network_performance=attributes.get('networkPerformance', ''),
+                storage_type=_intern(attributes.get('storage', 'EBS-optimized')),
+                network_performance=_intern(attributes.get('networkPerformance', '')),
                 architecture=self._map_architecture(attributes.get('physicalProcessor', '')),
-                operating_system=attributes.get('operatingSystem', 'Linux')
+                operating_system=_intern(attributes.get('operatingSystem', 'Linux'))
             )
 
             # Determine features
@@ -251,12 +394,12 @@ class AWSDataTransformer:
                 region=region,
                 available_regions=[region],  # Would need to aggregate across regions
                 features=features,
-                use_cases=["Web servers", "Application servers", "Batch processing", "Development"],
+                use_cases=_USE_CASES['ec2'],
                 tags=["compute", "vm", "ec2", instance_type.lower()],
                 supports_auto_scaling=True,
                 supports_encryption=True,
                 raw_sku=sku,
-                last_updated=datetime.now().isoformat()
+                last_updated=self._now_iso
             )
 
             return service
@@ -268,13 +411,13 @@ class AWSDataTransformer:
     def _transform_lambda_item(self, item: Dict) -> Optional[CloudService]:
         """Transform single Lambda item"""
         try:
-            product = item.get('product', {})
-            attributes = product.get('attributes', {})
+            product = item['product']
+            attributes = product['attributes']
             sku = product.get('sku', '')
 
             # Extract location
             location = attributes.get('location', '')
-            region = self.region_map.get(location, attributes.get('regionCode', 'unknown'))
+            region = self.region_map.get(location) or _intern(attributes.get('regionCode', 'unknown'))
 
             # Extract pricing
             pricing_list = self._extract_pricing(item, region)
@@ -322,18 +465,12 @@ class AWSDataTransformer:
                 region=region,
                 available_regions=[region],
                 features=features,
-                use_cases=[
-                    "API backends",
-                    "Data processing",
-                    "Real-time file processing",
-                    "IoT backends",
-                    "Scheduled tasks"
-                ],
+                use_cases=_USE_CASES['lambda'],
                 tags=["serverless", "lambda", "compute", arch.lower()],
                 supports_auto_scaling=True,
                 supports_encryption=True,
                 raw_sku=sku,
-                last_updated=datetime.now().isoformat()
+                last_updated=self._now_iso
             )
 
             return service
@@ -345,8 +482,8 @@ class AWSDataTransformer:
     def _transform_rds_item(self, item: Dict) -> Optional[CloudService]:
         """Transform single RDS item"""
         try:
-            product = item.get('product', {})
-            attributes = product.get('attributes', {})
+            product = item['product']
+            attributes = product['attributes']
             sku = product.get('sku', '')
 
             # Extract instance class
@@ -355,8 +492,8 @@ class AWSDataTransformer:
                 return None
 
             # Extract database engine
-            db_engine = attributes.get('databaseEngine', 'Unknown')
-            deployment = attributes.get('deploymentOption', 'Single-AZ')
+            db_engine = _intern(attributes.get('databaseEngine', 'Unknown'))
+            deployment = _intern(attributes.get('deploymentOption', 'Single-AZ'))
 
             # Extract specs
             vcpu = self._parse_float(attributes.get('vcpu', '0'))
@@ -365,7 +502,8 @@ class AWSDataTransformer:
 
             # Extract region
             location = attributes.get('location', '')
-            region = self.region_map.get(location, location.lower().replace(' ', '-'))
+            # Fallback slug is only built for locations missing from region_map
+            region = self.region_map.get(location) or _intern(location.lower().replace(' ', '-'))
 
             # Extract pricing
             pricing_list = self._extract_pricing(item, region)
@@ -377,7 +515,7 @@ class AWSDataTransformer:
             specs = TechnicalSpecs(
                 vcpu=vcpu,
                 memory_gb=memory_gb,
-                storage_type=attributes.get('storageMedia', 'SSD'),
+                storage_type=_intern(attributes.get('storageMedia', 'SSD')),
                 database_engine=db_engine,
                 architecture=self._map_architecture(attributes.get('physicalProcessor', ''))
             )
@@ -408,18 +546,13 @@ class AWSDataTransformer:
                 region=region,
                 available_regions=[region],
                 features=features,
-                use_cases=[
-                    "Web applications",
-                    "E-commerce platforms",
-                    "Mobile applications",
-                    "Enterprise applications"
-                ],
+                use_cases=_USE_CASES['rds'],
                 tags=["database", "rds", db_engine.lower(), "managed"],
                 supports_auto_scaling=True,
                 supports_multi_az=('Multi' in deployment),
                 supports_encryption=True,
                 raw_sku=sku,
-                last_updated=datetime.now().isoformat()
+                last_updated=self._now_iso
             )
 
             return service
@@ -431,13 +564,13 @@ class AWSDataTransformer:
     def _transform_eks_item(self, item: Dict) -> Optional[CloudService]:
         """Transform single EKS item"""
         try:
-            product = item.get('product', {})
-            attributes = product.get('attributes', {})
+            product = item['product']
+            attributes = product['attributes']
             sku = product.get('sku', '')
 
             # Extract region
             location = attributes.get('location', '')
-            region = self.region_map.get(location, attributes.get('regionCode', 'unknown'))
+            region = self.region_map.get(location) or _intern(attributes.get('regionCode', 'unknown'))
 
             # Extract pricing
             pricing_list = self._extract_pricing(item, region)
@@ -473,18 +606,13 @@ class AWSDataTransformer:
                 region=region,
                 available_regions=[region],
                 features=features,
-                use_cases=[
-                    "Microservices",
-                    "Container orchestration",
-                    "Hybrid applications",
-                    "Batch processing"
-                ],
+                use_cases=_USE_CASES['eks'],
                 tags=["kubernetes", "containers", "eks", "orchestration"],
                 supports_auto_scaling=True,
                 supports_multi_az=True,
                 supports_encryption=True,
                 raw_sku=sku,
-                last_updated=datetime.now().isoformat()
+                last_updated=self._now_iso
             )
 
             return service
@@ -496,13 +624,13 @@ class AWSDataTransformer:
     def _transform_ecs_item(self, item: Dict) -> Optional[CloudService]:
         """Transform single ECS item"""
         try:
-            product = item.get('product', {})
-            attributes = product.get('attributes', {})
+            product = item['product']
+            attributes = product['attributes']
             sku = product.get('sku', '')
 
             # Extract region
             location = attributes.get('location', '')
-            region = self.region_map.get(location, attributes.get('regionCode', 'unknown'))
+            region = self.region_map.get(location) or _intern(attributes.get('regionCode', 'unknown'))
 
             # Extract pricing
             pricing_list = self._extract_pricing(item, region)
@@ -550,17 +678,12 @@ class AWSDataTransformer:
                 region=region,
                 available_regions=[region],
                 features=features,
-                use_cases=[
-                    "Microservices",
-                    "Batch processing",
-                    "Web applications",
-                    "CI/CD pipelines"
-                ],
+                use_cases=_USE_CASES['ecs'],
                 tags=["containers", "ecs", "docker", "fargate" if is_fargate else "ec2"],
                 supports_auto_scaling=True,
                 supports_encryption=True,
                 raw_sku=sku,
-                last_updated=datetime.now().isoformat()
+                last_updated=self._now_iso
             )
 
             return service
@@ -572,8 +695,8 @@ class AWSDataTransformer:
     def _transform_s3_item(self, item: Dict) -> Optional[CloudService]:
         """Transform single S3 item"""
         try:
-            product = item.get('product', {})
-            attributes = product.get('attributes', {})
+            product = item['product']
+            attributes = product['attributes']
             sku = product.get('sku', '')
 
             # Extract storage class
@@ -581,7 +704,7 @@ class AWSDataTransformer:
 
             # Extract region
             location = attributes.get('location', '')
-            region = self.region_map.get(location, attributes.get('regionCode', 'unknown'))
+            region = self.region_map.get(location) or _intern(attributes.get('regionCode', 'unknown'))
 
             # Extract pricing
             pricing_list = self._extract_pricing(item, region)
@@ -613,16 +736,11 @@ class AWSDataTransformer:
                 region=region,
                 available_regions=[region],
                 features=features,
-                use_cases=[
-                    "Data lakes",
-                    "Backup and restore",
-                    "Static website hosting",
-                    "Content distribution"
-                ],
+                use_cases=_USE_CASES['s3'],
                 tags=["storage", "s3", "object-storage", storage_class.lower()],
                 supports_encryption=True,
                 raw_sku=sku,
-                last_updated=datetime.now().isoformat()
+                last_updated=self._now_iso
             )
 
             return service
@@ -639,70 +757,133 @@ class AWSDataTransformer:
         files = glob.glob(os.path.join(self.data_dir, pattern))
         return files[0] if files else None
 
+    def _load_json(self, file_path: str):
+        """Load a pricing JSON file (orjson when installed, several times faster on large dumps)"""
+        with open(file_path, 'rb') as f:
+            if orjson is not None:
+                return orjson.loads(f.read())
+            return json.load(f)
+
+    def _iter_items(self, file_path: str):
+        """
+        Yield the items of a pricing JSON array one at a time
+
+        With ijson installed (it picks the C yajl2 backend when available)
+        the array is parsed incrementally, so only one item is held in memory;
+        otherwise the whole file is loaded with _load_json.
+        """
+        if ijson is None:
+            yield from self._load_json(file_path)
+            return
+
+        with open(file_path, 'rb') as f:
+            yield from ijson.items(f, 'item', use_float=True)
+
+    def _add_services(self, service_type: str, items: Iterable[Dict]) -> int:
+        """Append the output records for one service type's items; returns how many were added"""
+        start = len(self.services)
+        self.services.extend(self._transform_items(f'_transform_{service_type}_item', items))
+
+        # The summary counts by each record's service_type, not by transformer name
+        new_records = self.services[start:]
+        self._type_counts.update(record['blob'].get('service_type', '') for record in new_records)
+        return len(new_records)
+
+    def _transform_items(self, method_name: str, items: Iterable[Dict]) -> Iterator[Dict]:
+        """
+        Transform items with one _transform_*_item method into output records, skipping failures
+
+        Without a pool the items are transformed inline. With one, chunks of
+        TRANSFORM_CHUNK_SIZE items go to the workers; at most two chunks per
+        worker are pending, so streamed input is never fully buffered.
+        Records are yielded in input order.
+        """
+        if self._pool is None:
+            transform = getattr(self, method_name)
+            for item in items:
+                service = transform(item)
+                if service:
+                    yield service.to_record()
+            return
+
+        items = iter(items)
+        pending = deque()
+        while True:
+            while len(pending) < self.workers * 2:
+                chunk = list(islice(items, TRANSFORM_CHUNK_SIZE))
+                if not chunk:
+                    break
+                pending.append(self._pool.submit(_transform_chunk, method_name, chunk))
+
+            if not pending:
+                return
+            yield from pending.popleft().result()
+
     def _extract_pricing(self, item: Dict, region: str) -> List[PricingInfo]:
         """Extract pricing information from AWS item"""
         pricing_list = []
 
-        try:
-            terms = item.get('terms', {})
-            on_demand = terms.get('OnDemand', {})
-
-            for term_key, term_data in on_demand.items():
-                price_dimensions = term_data.get('priceDimensions', {})
-
-                for dimension_key, dimension in price_dimensions.items():
-                    price_per_unit = dimension.get('pricePerUnit', {})
+        # Malformed terms or dimensions are skipped one at a time, so the item
+        # keeps whatever pricing is well-formed
+        terms = item.get('terms')
+        on_demand = terms.get('OnDemand') if isinstance(terms, dict) else None
+        if not isinstance(on_demand, dict):
+            return pricing_list
+
+        for term_key, term_data in on_demand.items():
+            if not isinstance(term_data, dict):
+                continue
+            price_dimensions = term_data.get('priceDimensions')
+            if not isinstance(price_dimensions, dict):
+                continue
+
+            for dimension_key, dimension in price_dimensions.items():
+                if not isinstance(dimension, dict):
+                    continue
+                price_per_unit = dimension.get('pricePerUnit')
+                if not isinstance(price_per_unit, dict):
+                    continue
+                try:
                     usd_price = float(price_per_unit.get('USD', '0'))
                     cny_price = float(price_per_unit.get('CNY', '0'))
-
-                    # Convert CNY to USD if needed (approximate rate)
-                    if cny_price > 0 and usd_price == 0:
-                        usd_price = cny_price / 7.0  # Approximate conversion
-
-                    if usd_price > 0:
-                        pricing_info = PricingInfo(
-                            price_per_unit=usd_price,
-                            currency="USD",
-                            unit=dimension.get('unit', ''),
-                            pricing_model="on_demand",
-                            region=region,
-                            free_tier_included=False
-                        )
-                        pricing_list.append(pricing_info)
-
-        except Exception as e:
-            pass
+                except (TypeError, ValueError):
+                    continue
+
+                # Convert CNY to USD if needed (approximate rate)
+                if cny_price > 0 and usd_price == 0:
+                    usd_price = cny_price / 7.0  # Approximate conversion
+
+                if usd_price > 0:
+                    pricing_info = PricingInfo(
+                        price_per_unit=usd_price,
+                        currency="USD",
+                        unit=dimension.get('unit', ''),
+                        pricing_model="on_demand",
+                        region=region,
+                        free_tier_included=False
+                    )
+                    pricing_list.append(pricing_info)
 
         return pricing_list
 
     def _parse_float(self, value: str) -> float:
         """Parse float from string"""
         try:
-            return float(value)
-        except:
+            return _number(value)
+        except TypeError:
+            # Unhashable value (not a string or number)
             return 0.0
 
     def _parse_memory(self, memory_str: str) -> float:
         """Parse memory string to GB"""
         try:
-            # Examples: "8 GiB", "16 GB", "1,024 GiB"
-            memory_str = memory_str.replace(',', '').upper()
-            if 'GIB' in memory_str or 'GB' in memory_str:
-                return float(re.search(r'([\d.]+)', memory_str).group(1))
-            elif 'TIB' in memory_str or 'TB' in memory_str:
-                return float(re.search(r'([\d.]+)', memory_str).group(1)) * 1024
-            return 0.0
-        except:
+            return _memory_gb(memory_str)
+        except TypeError:
             return 0.0
 
     def _map_architecture(self, processor: str) -> str:
         """Map processor to architecture"""
-        processor_lower = processor.lower()
-        if 'graviton' in processor_lower or 'arm' in processor_lower:
-            return "ARM64"
-        elif 'amd' in processor_lower or 'intel' in processor_lower:
-            return "x86_64"
-        return "x86_64"
+        return _processor_architecture(processor)
 
     def _create_ec2_description(self, attributes: Dict, instance_type: str) -> str:
         """Create description for EC2 instance"""
@@ -735,57 +916,17 @@ class AWSDataTransformer:
 
     def _get_s3_class_description(self, storage_class: str) -> str:
         """Get description for S3 storage class"""
-        descriptions = {
-            'Standard': 'Frequently accessed data with low latency and high throughput',
-            'Intelligent-Tiering': 'Automatic cost savings by moving data between access tiers',
-            'Standard-IA': 'Infrequently accessed data with rapid access when needed',
-            'One Zone-IA': 'Lower-cost option for infrequently accessed data in single AZ',
-            'Glacier': 'Long-term archive with retrieval times from minutes to hours',
-            'Glacier Deep Archive': 'Lowest cost storage for long-term retention',
-        }
-        return descriptions.get(storage_class, 'Object storage')
+        return _S3_CLASS_DESCRIPTIONS.get(storage_class, 'Object storage')
 
     def _get_s3_features(self, storage_class: str) -> List[str]:
-        """Get features for S3 storage class"""
-        base_features = [
-            "99.999999999% durability",
-            "Versioning",
-            "Lifecycle policies",
-            "Encryption at rest"
-        ]
-
-        class_features = {
-            'Standard': ["Low latency", "High throughput", "Frequent access optimized"],
-            'Intelligent-Tiering': ["Automatic tiering", "Cost optimization", "No retrieval fees"],
-            'Standard-IA': ["Lower cost", "Rapid access", "Infrequent access optimized"],
-            'Glacier': ["Archive storage", "Configurable retrieval times", "Lowest cost for archival"],
-        }
-
-        return base_features + class_features.get(storage_class, [])
+        """Get features for S3 storage class (shared list, precomputed per class)"""
+        return _S3_FEATURES.get(storage_class, _S3_BASE_FEATURES)
 
     def save_services(self, output_file: str):
         """Save transformed services to JSON file"""
         print(f"\n Saving to {output_file}...")
 
-
-        services_output = []
-        for service in self.services:
-            services_output.append({
-                'embedding_text': service.generate_embedding_text(),
-                'blob': service.to_dict()
-            })
-
-        output_data = {
-            'metadata': {
-                'provider': 'aws',
-                'extraction_date': datetime.now().isoformat(),
-                'total_services': len(self.services)
-            },
-            'services': services_output
-        }
-
-        with open(output_file, 'w') as f:
-            json.dump(output_data, f, indent=2)
+        write_services_json(output_file, 'aws', self.services, len(self.services))
 
         print(f"   Saved {len(self.services)} services")
 
@@ -795,13 +936,7 @@ class AWSDataTransformer:
         print("TRANSFORMATION SUMMARY")
         print("="*80)
 
-        # Count by service type
-        type_counts = {}
-        for service in self.services:
-            service_type = service.service_type
-            type_counts[service_type] = type_counts.get(service_type, 0) + 1
-
-        for service_type, count in sorted(type_counts.items()):
+        for service_type, count in sorted(self._type_counts.items()):
             print(f"  {service_type.upper()}: {count} services")
 
         print(f"\n  TOTAL: {len(self.services)} services")
@@ -3,14 +3,25 @@ Azure Pricing Data Transformer
 Transforms Azure pricing JSON files into standardized CloudService format
 """
 
+import gzip
 import json
 import os
 import re
 from typing import List, Dict, Optional
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Import the standardized schema (assume it's in the same directory or accessible)
-from standard_cloud_service import CloudService, TechnicalSpecs, PricingInfo, ServiceCategory
+from standard_cloud_service import CloudService, TechnicalSpecs, PricingInfo, ServiceCategory, write_services_json
+
+
+def _json_loads(data: bytes):
+    """Parse JSON with orjson when installed"""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
 
 
 class AzureDataTransformer:
@@ -110,8 +121,7 @@ class AzureDataTransformer:
             print("    Virtual Machines file not found")
             return
 
-        with open(file_path, 'r') as f:
-            data = json.load(f)
+        data = self._load_json(file_path)
 
         count = 0
         for item in data.get('items', []):
@@ -130,8 +140,7 @@ class AzureDataTransformer:
             print("    SQL Database file not found")
             return
 
-        with open(file_path, 'r') as f:
-            data = json.load(f)
+        data = self._load_json(file_path)
 
         count = 0
         for item in data.get('items', []):
@@ -150,8 +159,7 @@ class AzureDataTransformer:
             print("    Azure Functions file not found")
             return
 
-        with open(file_path, 'r') as f:
-            data = json.load(f)
+        data = self._load_json(file_path)
 
         count = 0
         for item in data.get('items', []):
@@ -170,8 +178,7 @@ class AzureDataTransformer:
             print("    AKS file not found")
             return
 
-        with open(file_path, 'r') as f:
-            data = json.load(f)
+        data = self._load_json(file_path)
 
         count = 0
         for item in data.get('items', []):
@@ -190,8 +197,7 @@ class AzureDataTransformer:
             print("    Container Instances file not found")
             return
 
-        with open(file_path, 'r') as f:
-            data = json.load(f)
+        data = self._load_json(file_path)
 
         count = 0
         for item in data.get('items', []):
@@ -210,8 +216,7 @@ class AzureDataTransformer:
             print("    App Service file not found")
             return
 
-        with open(file_path, 'r') as f:
-            data = json.load(f)
+        data = self._load_json(file_path)
 
         count = 0
         for item in data.get('items', []):
@@ -230,8 +235,7 @@ class AzureDataTransformer:
             print("    Storage file not found")
             return
 
-        with open(file_path, 'r') as f:
-            data = json.load(f)
+        data = self._load_json(file_path)
 
         count = 0
         for item in data.get('items', []):
@@ -250,8 +254,7 @@ class AzureDataTransformer:
             print("    Cosmos DB file not found")
             return
 
-        with open(file_path, 'r') as f:
-            data = json.load(f)
+        data = self._load_json(file_path)
 
         count = 0
         for item in data.get('items', []):
@@ -270,8 +273,7 @@ class AzureDataTransformer:
             print("    Redis Cache file not found")
             return
 
-        with open(file_path, 'r') as f:
-            data = json.load(f)
+        data = self._load_json(file_path)
 
         count = 0
         for item in data.get('items', []):
@@ -290,8 +292,7 @@ class AzureDataTransformer:
             print("    SQL Managed Instance file not found")
             return
 
-        with open(file_path, 'r') as f:
-            data = json.load(f)
+        data = self._load_json(file_path)
 
         count = 0
         for item in data.get('items', []):
@@ -311,8 +312,7 @@ class AzureDataTransformer:
             print("    Logic Apps file not found")
             return
 
-        with open(file_path, 'r') as f:
-            data = json.load(f)
+        data = self._load_json(file_path)
 
         count = 0
         for item in data.get('items', []):
@@ -331,8 +331,7 @@ class AzureDataTransformer:
             print("    Container Apps file not found")
             return
 
-        with open(file_path, 'r') as f:
-            data = json.load(f)
+        data = self._load_json(file_path)
 
         count = 0
         for item in data.get('items', []):
@@ -351,8 +350,7 @@ class AzureDataTransformer:
             print("    Container Registry file not found")
             return
 
-        with open(file_path, 'r') as f:
-            data = json.load(f)
+        data = self._load_json(file_path)
 
         count = 0
         for item in data.get('items', []):
@@ -371,8 +369,7 @@ class AzureDataTransformer:
             print("    Synapse Analytics file not found")
             return
 
-        with open(file_path, 'r') as f:
-            data = json.load(f)
+        data = self._load_json(file_path)
 
         count = 0
         for item in data.get('items', []):
@@ -1403,10 +1400,42 @@ class AzureDataTransformer:
     # Helper methods
 
     def _find_file_by_pattern(self, pattern: str) -> Optional[str]:
-        """Find file matching pattern"""
+        """Find file matching pattern (JSON Lines or JSON, plain or gzip-compressed)"""
         import glob
-        files = glob.glob(os.path.join(self.data_dir, pattern))
-        return files[0] if files else None
+        for suffix in ('l.gz', 'l', '', '.gz'):
+            files = glob.glob(os.path.join(self.data_dir, pattern + suffix))
+            if files:
+                return files[0]
+        return None
+
+    def _load_json(self, file_path: str) -> Dict:
+        """
+        Load a pricing file written by the collectors
+
+        JSON Lines files come back in the same layout as the JSON files, with
+        their `.meta` sidecar merged in; the 'items' records are read lazily,
+        one line at a time, while the caller iterates them. Files are read as
+        bytes and parsed with orjson when it is installed.
+        """
+        opener = gzip.open if file_path.endswith('.gz') else open
+
+        if '.jsonl' not in os.path.basename(file_path):
+            with opener(file_path, 'rb') as f:
+                return _json_loads(f.read())
+
+        data = {}
+        if os.path.exists(file_path + '.meta'):
+            with open(file_path + '.meta', 'rb') as f:
+                data = _json_loads(f.read())
+
+        def records():
+            with opener(file_path, 'rb') as f:
+                for line in f:
+                    if line.strip():
+                        yield _json_loads(line)
+
+        data['items'] = records()
+        return data
 
     def _parse_vm_specs(self, product_name: str, sku_name: str) -> Dict:
         """Parse VM specs from product name"""
@@ -1513,24 +1542,8 @@ class AzureDataTransformer:
         """Save transformed services to JSON file"""
         print(f"\n Saving to {output_file}...")
 
-        services_output = []
-        for service in self.services:
-            services_output.append({
-                'embedding_text': service.generate_embedding_text(),
-                'blob': service.to_dict()
-            })
-
-        output_data = {
-            'metadata': {
-                'provider': 'azure',
-                'extraction_date': datetime.now().isoformat(),
-                'total_services': len(self.services)
-            },
-            'services': services_output
-        }
-
-        with open(output_file, 'w') as f:
-            json.dump(output_data, f, indent=2)
+        records = (service.to_record() for service in self.services)
+        write_services_json(output_file, 'azure', records, len(self.services))
 
         print(f"    Saved {len(self.services)} services")
 
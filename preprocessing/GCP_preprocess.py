@@ -3,6 +3,7 @@ GCP Pricing Data Transformer
 Transforms GCP pricing JSON files into standardized CloudService format
 """
 
+import gzip
 import json
 import os
 import re
@@ -10,7 +11,7 @@ from typing import List, Dict, Optional
 from datetime import datetime
 
 # Import the standardized schema
-from standard_cloud_service import CloudService, TechnicalSpecs, PricingInfo, ServiceCategory
+from standard_cloud_service import CloudService, TechnicalSpecs, PricingInfo, ServiceCategory, write_services_json
 
 
 class GCPDataTransformer:
@@ -99,8 +100,7 @@ class GCPDataTransformer:
             print("     Compute Engine file not found")
             return
 
-        with open(file_path, 'r') as f:
-            data = json.load(f)
+        data = self._load_json(file_path)
 
         count = 0
         for sku in data.get('skus', []):
@@ -119,8 +119,7 @@ class GCPDataTransformer:
             print("     Cloud SQL file not found")
             return
 
-        with open(file_path, 'r') as f:
-            data = json.load(f)
+        data = self._load_json(file_path)
 
         count = 0
         for sku in data.get('skus', []):
@@ -139,8 +138,7 @@ class GCPDataTransformer:
             print("     Cloud Functions file not found")
             return
 
-        with open(file_path, 'r') as f:
-            data = json.load(f)
+        data = self._load_json(file_path)
 
         count = 0
         for sku in data.get('skus', []):
@@ -159,8 +157,7 @@ class GCPDataTransformer:
             print("     GKE file not found")
             return
 
-        with open(file_path, 'r') as f:
-            data = json.load(f)
+        data = self._load_json(file_path)
 
         count = 0
         for sku in data.get('skus', []):
@@ -179,8 +176,7 @@ class GCPDataTransformer:
             print("     Cloud Run file not found")
             return
 
-        with open(file_path, 'r') as f:
-            data = json.load(f)
+        data = self._load_json(file_path)
 
         count = 0
         for sku in data.get('skus', []):
@@ -199,8 +195,7 @@ class GCPDataTransformer:
             print("     Cloud Storage file not found")
             return
 
-        with open(file_path, 'r') as f:
-            data = json.load(f)
+        data = self._load_json(file_path)
 
         count = 0
         for sku in data.get('skus', []):
@@ -219,8 +214,7 @@ class GCPDataTransformer:
             print("     Cloud Spanner file not found")
             return
 
-        with open(file_path, 'r') as f:
-            data = json.load(f)
+        data = self._load_json(file_path)
 
         count = 0
         for sku in data.get('skus', []):
@@ -239,8 +233,7 @@ class GCPDataTransformer:
             print("     Firestore file not found")
             return
 
-        with open(file_path, 'r') as f:
-            data = json.load(f)
+        data = self._load_json(file_path)
 
         count = 0
         for sku in data.get('skus', []):
@@ -259,8 +252,7 @@ class GCPDataTransformer:
             print("     Cloud Bigtable file not found")
             return
 
-        with open(file_path, 'r') as f:
-            data = json.load(f)
+        data = self._load_json(file_path)
 
         count = 0
         for sku in data.get('skus', []):
@@ -279,8 +271,7 @@ class GCPDataTransformer:
             print("     Memorystore file not found")
             return
 
-        with open(file_path, 'r') as f:
-            data = json.load(f)
+        data = self._load_json(file_path)
 
         count = 0
         for sku in data.get('skus', []):
@@ -299,8 +290,7 @@ class GCPDataTransformer:
             print("     App Engine file not found")
             return
 
-        with open(file_path, 'r') as f:
-            data = json.load(f)
+        data = self._load_json(file_path)
 
         count = 0
         for sku in data.get('skus', []):
@@ -1139,10 +1129,41 @@ class GCPDataTransformer:
     # Helper methods
 
     def _find_file_by_pattern(self, pattern: str) -> Optional[str]:
-        """Find file matching pattern"""
+        """Find file matching pattern (JSON Lines or JSON, plain or gzip-compressed)"""
         import glob
-        files = glob.glob(os.path.join(self.data_dir, pattern))
-        return files[0] if files else None
+        for suffix in ('l.gz', 'l', '', '.gz'):
+            files = glob.glob(os.path.join(self.data_dir, pattern + suffix))
+            if files:
+                return files[0]
+        return None
+
+    def _load_json(self, file_path: str) -> Dict:
+        """
+        Load a pricing file written by the collectors
+
+        JSON Lines files come back in the same layout as the JSON files, with
+        their `.meta` sidecar merged in; the 'skus' records are read lazily,
+        one line at a time, while the caller iterates them.
+        """
+        opener = gzip.open if file_path.endswith('.gz') else open
+
+        if '.jsonl' not in os.path.basename(file_path):
+            with opener(file_path, 'rt') as f:
+                return json.load(f)
+
+        data = {}
+        if os.path.exists(file_path + '.meta'):
+            with open(file_path + '.meta') as f:
+                data = json.load(f)
+
+        def records():
+            with opener(file_path, 'rt') as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+
+        data['skus'] = records()
+        return data
 
     def _extract_gcp_pricing(self, sku: Dict, region: str) -> List[PricingInfo]:
         """Extract pricing information from GCP SKU"""
@@ -1358,24 +1379,8 @@ class GCPDataTransformer:
         """Save transformed services to JSON file"""
         print(f"\n Saving to {output_file}...")
 
-        services_output = []
-        for service in self.services:
-            services_output.append({
-                'embedding_text': service.generate_embedding_text(),
-                'blob': service.to_dict()
-            })
-
-        output_data = {
-            'metadata': {
-                'provider': 'gcp',
-                'extraction_date': datetime.now().isoformat(),
-                'total_services': len(self.services)
-            },
-            'services': services_output
-        }
-
-        with open(output_file, 'w') as f:
-            json.dump(output_data, f, indent=2)
+        records = (service.to_record() for service in self.services)
+        write_services_json(output_file, 'gcp', records, len(self.services))
 
         print(f"    Saved {len(self.services)} services")
 
@@ -3,10 +3,25 @@ Standardized Cloud Service Schema for Vector Database
 This schema is cloud-provider agnostic and suitable for retrieval + ranking
 """
 
-from typing import List, Dict, Optional
+import json
+from typing import Iterable, List, Dict, Optional
 from dataclasses import dataclass, asdict
+from datetime import datetime
 from enum import Enum
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _json_dumps(obj) -> bytes:
+    """Serialize to compact JSON bytes (orjson when installed)"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+
 class ServiceCategory(Enum):
     """Main service categories"""
     COMPUTE = "compute"
@@ -26,7 +41,7 @@ class PricingModel(Enum):
     COMMITTED = "committed"
     FREE_TIER = "free_tier"
 
-@dataclass
+@dataclass(slots=True)
 class PricingInfo:
     """Standardized pricing information"""
     price_per_unit: float  # Normalized to USD per hour/month where applicable
@@ -43,7 +58,7 @@ class PricingInfo:
     def to_dict(self):
         return asdict(self)
 
-@dataclass
+@dataclass(slots=True)
 class TechnicalSpecs:
     """Technical specifications"""
     # Compute specs
@@ -73,7 +88,7 @@ class TechnicalSpecs:
     def to_dict(self):
         return {k: v for k, v in asdict(self).items() if v is not None}
 
-@dataclass
+@dataclass(slots=True)
 class CloudService:
     """
     Standardized cloud service representation
@@ -122,10 +137,18 @@ class CloudService:
     def to_dict(self):
         """Convert to dictionary for JSON serialization"""
         result = asdict(self)
+        # Specs keep only the fields that are set (TechnicalSpecs.to_dict drops None);
+        # asdict already converts the pricing list the same way PricingInfo.to_dict does
         result['specs'] = self.specs.to_dict()
-        result['pricing'] = [p.to_dict() for p in self.pricing]
         return result
 
+    def to_record(self) -> Dict:
+        """Output record written to the standardized services file"""
+        return {
+            'embedding_text': self.generate_embedding_text(),
+            'blob': self.to_dict()
+        }
+
     def generate_embedding_text(self) -> str:
         """
         Generate text for embedding model
@@ -175,6 +198,35 @@ class CloudService:
         return " | ".join(parts)
 
 
+def write_services_json(output_file: str, provider: str, records: Iterable[Dict], total: int):
+    """
+    Write records as the standardized {"metadata": ..., "services": [...]} document
+
+    Records (CloudService.to_record() output) are written one per line as
+    they are produced, so a generator of records is never fully held in memory.
+
+    Args:
+        output_file: Path of the JSON file to write
+        provider: Provider name stored in the metadata ("aws", "gcp", "azure")
+        records: Service records to write
+        total: Number of records, for metadata.total_services
+    """
+    metadata = {
+        'provider': provider,
+        'extraction_date': datetime.now().isoformat(),
+        'total_services': total
+    }
+
+    with open(output_file, 'wb') as f:
+        f.write(b'{\n  "metadata": ' + _json_dumps(metadata) + b',\n  "services": [')
+        separator = b'\n    '
+        for record in records:
+            f.write(separator)
+            f.write(_json_dumps(record))
+            separator = b',\n    '
+        f.write(b'\n  ]\n}\n')
+
+
 # Example usage
 if __name__ == "__main__":
     # Example: AWS Lambda
@@ -235,5 +287,4 @@ if __name__ == "__main__":
     print(lambda_service.generate_embedding_text())
     print("\n" + "="*80 + "\n")
     print("JSON representation:")
-    import json
     print(json.dumps(lambda_service.to_dict(), indent=2))
\ No newline at end of file
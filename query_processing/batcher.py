@@ -0,0 +1,116 @@
+"""
+Coalescing Embedder
+Groups concurrent single-text embed calls into batched Ollama requests
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List
+
+from llm_client import EmbeddingClient
+
+
+class CoalescingEmbedder:
+    """
+    Micro-batching wrapper around an EmbeddingClient.
+
+    Callers use the usual blocking `embed(text)`. Requests are pushed onto a
+    queue, and a background worker thread collects up to `max_batch` of them
+    (waiting at most `max_wait` seconds after the first one) and embeds the
+    whole group with a single `embed_batch` call. Concurrent queries from
+    several sessions therefore share one embedding request instead of each
+    paying a round trip. A lone request (nothing else queued) is sent at once.
+    """
+
+    def __init__(self, client: EmbeddingClient, max_batch: int = 32, max_wait: float = 0.025,
+                 timeout: float = 120.0):
+        """
+        Initialize the embedder and start the batching worker
+
+        Args:
+            client: Underlying embedding client
+            max_batch: Maximum number of texts embedded in one request
+            max_wait: Seconds to wait for more texts when others are already queued
+            timeout: Seconds embed() waits for its batch before giving up
+        """
+        self.client = client
+        self.model = client.model
+        self.dimension = client.dimension
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.timeout = timeout
+
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="embed-batcher", daemon=True)
+        self._worker.start()
+
+    def _collect(self) -> list:
+        """Block for the first request, then gather more until the batch is full or the window closes"""
+        batch = [self._queue.get()]
+
+        # Nothing else waiting: the common single-user query doesn't pay the window
+        if self._queue.empty():
+            return batch
+
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self):
+        """Worker loop: embed each collected batch and resolve its futures"""
+        while True:
+            batch = self._collect()
+            texts = [text for text, _ in batch]
+
+            try:
+                embeddings = self.client.embed_batch(texts)
+                if len(embeddings) != len(batch):
+                    raise ValueError(f"embed_batch returned {len(embeddings)} vectors for {len(batch)} texts")
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), embedding in zip(batch, embeddings):
+                future.set_result(embedding)
+
+    def embed(self, text: str) -> List[float]:
+        """
+        Generate embedding for a single text (batched with concurrent callers)
+
+        Args:
+            text: Text to embed
+
+        Returns:
+            Embedding vector
+        """
+        future = Future()
+        self._queue.put((text, future))
+        return future.result(timeout=self.timeout)
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """
+        Generate embeddings for multiple texts
+
+        Args:
+            texts: List of texts to embed
+
+        Returns:
+            List of embedding vectors
+        """
+        return self.client.embed_batch(texts)
+
+    def get_dimension(self) -> int:
+        """Get embedding dimension"""
+        return self.dimension
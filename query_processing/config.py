@@ -14,6 +14,7 @@ class OllamaConfig:
     chat_model: str = "gemma3:4b"
     temperature: float = 0.3  # Lower for more consistent outputs
     timeout: int = 300  # seconds
+    keep_alive: Optional[str] = "30m"  # how long Ollama keeps the chat model loaded between queries
 
 
 @dataclass
@@ -33,6 +34,13 @@ class RetrievalConfig:
     sparse_top_k: int = 30  # Candidates from sparse retrieval
     fusion_top_k: int = 25  # Candidates after fusion for reranking
     score_threshold: float = 0.3  # Minimum similarity score
+    route_providers: bool = False  # Restrict retrieval to providers picked by ProviderRouter (may drop providers)
+    router_margin: float = 0.05  # Keep providers within this centroid similarity of the best one
+    bm25_cache_dir: Optional[str] = "./cache"  # Where the fitted BM25 index and router centroids are pickled (None disables)
+    use_keyword_prefilter: bool = False  # Only score service types of the families named in the query
+    use_numba_bm25: bool = False  # Score BM25 with the Numba kernel (needs numpy + numba)
+    enable_quantization: bool = True  # Search quantized vectors, then rescore with originals (no-op if not quantized)
+    quantization_oversampling: float = 2.0  # Shortlist size multiplier for rescoring
 
 
 @dataclass
@@ -41,6 +49,9 @@ class RerankingConfig:
     batch_size: int = 5  # Services to evaluate per LLM call
     max_candidates: int = 20  # Maximum candidates to rerank
     min_relevance_score: float = 3.0  # Minimum LLM score (1-10) to include
+    method: str = "listwise"  # "listwise" (one call per window) or "pairwise" (PRP-Sliding)
+    window_size: int = 20  # Candidates ranked per listwise call
+    window_step: int = 10  # Stride between overlapping listwise windows
 
 
 @dataclass
@@ -0,0 +1,157 @@
+"""
+Keyword Prefilter - Stage 2 pre-filter
+Maps service-family keywords in a query to the service types whose documents
+mention them, so retrieval only scores services of the families the user asked about
+"""
+
+import re
+from collections import defaultdict, Counter
+from typing import Dict, List, Set, Optional
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+
+# Service family -> keywords that identify it (matched on word boundaries, case-insensitive)
+SERVICE_FAMILY_KEYWORDS = {
+    'postgres': ['postgres', 'postgresql', 'aurora postgresql', 'alloydb'],
+    'mysql': ['mysql', 'mariadb', 'aurora mysql'],
+    'sql_server': ['sql server', 'mssql', 'azure sql'],
+    'nosql': ['nosql', 'dynamodb', 'cosmos db', 'cosmosdb', 'firestore', 'bigtable', 'mongodb', 'cassandra'],
+    'cache': ['redis', 'memcached', 'elasticache', 'memorystore'],
+    'data_warehouse': ['data warehouse', 'redshift', 'bigquery', 'synapse'],
+    'kubernetes': ['kubernetes', 'k8s', 'eks', 'gke', 'aks'],
+    'container': ['container', 'containers', 'docker', 'ecs', 'fargate', 'cloud run', 'container apps'],
+    'serverless': ['serverless', 'lambda', 'cloud functions', 'azure functions', 'faas'],
+    'object_storage': ['object storage', 's3', 'blob storage', 'cloud storage', 'bucket'],
+    'block_storage': ['block storage', 'ebs', 'persistent disk', 'managed disks'],
+    'file_storage': ['file storage', 'efs', 'filestore', 'azure files', 'nfs'],
+    'messaging': ['message queue', 'sqs', 'sns', 'pub/sub', 'pubsub', 'service bus', 'event hubs', 'kafka'],
+    'cdn': ['cdn', 'cloudfront', 'cloud cdn', 'front door'],
+    'gpu': ['gpu', 'gpus', 'nvidia', 'cuda'],
+}
+
+# A service type belongs to a family when at least this share of the family's
+# mentions come from its documents (drops types that mention a keyword in passing)
+MIN_TYPE_SHARE = 0.05
+
+
+class KeywordPrefilter:
+    """
+    Deterministic service-family classifier over query and document text.
+
+    All keywords are compiled once into a single automaton: a pyahocorasick
+    Automaton when the package is installed, otherwise one regex alternation.
+    Each family is mapped to the service types (the indexed `service_type`
+    payload field) whose documents mention it; a query's families select those
+    service types, so the mask is a short payload filter rather than a list of
+    point ids, and services of a matched type are kept even when their own
+    text doesn't contain the keyword.
+    """
+
+    def __init__(self, family_keywords: Optional[Dict[str, List[str]]] = None):
+        """
+        Initialize and compile the keyword matcher
+
+        Args:
+            family_keywords: Family -> keywords (defaults to SERVICE_FAMILY_KEYWORDS)
+        """
+        self.family_keywords = family_keywords or SERVICE_FAMILY_KEYWORDS
+        self.family_types = defaultdict(Counter)  # family -> service_type -> documents mentioning it
+        self.type_doc_ids = defaultdict(set)  # service_type -> doc_ids
+
+        self._keyword_families = defaultdict(set)  # keyword -> families
+        for family, keywords in self.family_keywords.items():
+            for keyword in keywords:
+                self._keyword_families[keyword.lower()].add(family)
+
+        self._compile()
+
+    def _compile(self):
+        """Compile the keywords into an Aho-Corasick automaton or a regex alternation"""
+        self._automaton = None
+        self._pattern = None
+
+        if ahocorasick is not None:
+            self._automaton = ahocorasick.Automaton()
+            for keyword, families in self._keyword_families.items():
+                self._automaton.add_word(keyword, (len(keyword), families))
+            self._automaton.make_automaton()
+            return
+
+        # Longest keywords first so "aurora postgresql" wins over "postgresql"
+        keywords = sorted(self._keyword_families, key=len, reverse=True)
+        self._pattern = re.compile(r'(?<!\w)(?:' + '|'.join(re.escape(k) for k in keywords) + r')(?!\w)')
+
+    def __getstate__(self):
+        """Compiled automata are rebuilt after unpickling"""
+        state = self.__dict__.copy()
+        state.update(_automaton=None, _pattern=None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._compile()
+
+    def families(self, text: str) -> Set[str]:
+        """
+        Service families mentioned in a text
+
+        Args:
+            text: Query or document text
+
+        Returns:
+            Set of family names
+        """
+        text = text.lower()
+        found = set()
+
+        if self._automaton is not None:
+            for end, (length, families) in self._automaton.iter(text):
+                start = end - length + 1
+                # Keep whole-word matches only
+                if start > 0 and (text[start - 1].isalnum() or text[start - 1] == '_'):
+                    continue
+                if end + 1 < len(text) and (text[end + 1].isalnum() or text[end + 1] == '_'):
+                    continue
+                found |= families
+            return found
+
+        for match in self._pattern.finditer(text):
+            found |= self._keyword_families[match.group(0)]
+        return found
+
+    def add_document(self, doc_id: str, text: str, service_type: Optional[str]):
+        """Index a document by service type, counting the families its text mentions"""
+        if not service_type:
+            return
+
+        self.type_doc_ids[service_type].add(doc_id)
+        for family in self.families(text):
+            self.family_types[family][service_type] += 1
+
+    def service_types(self, query: str) -> Optional[Set[str]]:
+        """
+        Candidate service types for a query
+
+        Args:
+            query: User query
+
+        Returns:
+            Service types of every matched family, or None when nothing matched
+            (callers then fall back to the unrestricted search)
+        """
+        types = set()
+        for family in self.families(query):
+            counts = self.family_types.get(family)
+            if not counts:
+                continue
+            min_count = MIN_TYPE_SHARE * sum(counts.values())
+            types.update(t for t, count in counts.items() if count >= min_count)
+        return types or None
+
+    def doc_ids(self, service_types: Set[str]) -> Set[str]:
+        """Doc_ids of the given service types (for the local BM25 mask)"""
+        return set().union(*(self.type_doc_ids.get(t, set()) for t in service_types))
@@ -5,14 +5,19 @@ Handles chat/generation interactions with Ollama models
 
 import requests
 import json
-from typing import Optional, Dict, Any, List
+import hashlib
+import shelve
+import threading
+from array import array
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Iterator
 
 
 class LLMClient:
     """Client for interacting with Ollama LLM for chat/generation"""
 
     def __init__(self, host: str = "http://localhost:11434", model: str = "gemma3:4b", temperature: float = 0.3,
-                 timeout: int = 120):
+                 timeout: int = 120, keep_alive: Optional[str] = None):
         """
         Initialize the LLM client
 
@@ -21,11 +26,13 @@ class LLMClient:
             model: Model name for chat/generation
             temperature: Sampling temperature (lower = more deterministic)
             timeout: Request timeout in seconds
+            keep_alive: Default for how long Ollama keeps the model loaded (e.g. "30m")
         """
         self.host = host
         self.model = model
         self.temperature = temperature
         self.timeout = timeout
+        self.keep_alive = keep_alive
 
         # Test connection
         self._test_connection()
@@ -50,7 +57,8 @@ class LLMClient:
             raise ConnectionError(f"Failed to connect to Ollama at {self.host}: {str(e)}")
 
     def generate(self, prompt: str, system_prompt: Optional[str] = None,
-                 temperature: Optional[float] = None, max_tokens: int = 2048) -> str:
+                 temperature: Optional[float] = None, max_tokens: int = 2048,
+                 keep_alive: Optional[str] = None) -> str:
         """
         Generate a response from the LLM
 
@@ -59,6 +67,7 @@ class LLMClient:
             system_prompt: Optional system prompt for context
             temperature: Override default temperature
             max_tokens: Maximum tokens to generate
+            keep_alive: Override how long Ollama keeps the model loaded (e.g. "5m")
 
         Returns:
             Generated text response
@@ -76,6 +85,8 @@ class LLMClient:
 
             if system_prompt:
                 payload["system"] = system_prompt
+            if keep_alive or self.keep_alive:
+                payload["keep_alive"] = keep_alive or self.keep_alive
 
             response = requests.post(
                 f"{self.host}/api/generate",
@@ -93,6 +104,58 @@ class LLMClient:
             print(f" LLM generation error: {str(e)}")
             return ""
 
+    def generate_stream(self, prompt: str, system_prompt: Optional[str] = None,
+                        temperature: Optional[float] = None, max_tokens: int = 2048) -> Iterator[str]:
+        """
+        Stream a response from the LLM token chunk by token chunk
+
+        Args:
+            prompt: User prompt
+            system_prompt: Optional system prompt for context
+            temperature: Override default temperature
+            max_tokens: Maximum tokens to generate
+
+        Yields:
+            Text chunks as they are produced
+        """
+        try:
+            payload = {
+                "model": self.model,
+                "prompt": prompt,
+                "stream": True,
+                "options": {
+                    "temperature": temperature or self.temperature,
+                    "num_predict": max_tokens
+                }
+            }
+
+            if system_prompt:
+                payload["system"] = system_prompt
+            if self.keep_alive:
+                payload["keep_alive"] = self.keep_alive
+
+            with requests.post(
+                f"{self.host}/api/generate",
+                json=payload,
+                timeout=self.timeout,
+                stream=True
+            ) as response:
+                response.raise_for_status()
+
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get('response'):
+                        yield chunk['response']
+                    if chunk.get('done'):
+                        break
+
+        except requests.exceptions.Timeout:
+            print(f"  LLM stream timed out after {self.timeout}s")
+        except Exception as e:
+            print(f" LLM streaming error: {str(e)}")
+
     def chat(self, messages: List[Dict[str, str]], temperature: Optional[float] = None,
              max_tokens: int = 2048) -> str:
         """
@@ -117,6 +180,9 @@ class LLMClient:
                 }
             }
 
+            if self.keep_alive:
+                payload["keep_alive"] = self.keep_alive
+
             response = requests.post(
                 f"{self.host}/api/chat",
                 json=payload,
@@ -238,6 +304,127 @@ class EmbeddingClient:
             print(f" Embedding error: {str(e)}")
             raise
 
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """
+        Generate embeddings for multiple texts
+
+        Args:
+            texts: List of texts to embed
+
+        Returns:
+            List of embedding vectors
+        """
+        if not texts:
+            return []
+
+        try:
+            # /api/embed accepts a list input and embeds it in one forward pass
+            response = requests.post(
+                f"{self.host}/api/embed",
+                json={
+                    "model": self.model,
+                    "input": list(texts)
+                },
+                timeout=60
+            )
+            response.raise_for_status()
+
+            return response.json()["embeddings"]
+
+        except Exception as e:
+            print(f" Batch embedding error: {str(e)}")
+            raise
+
+    def get_dimension(self) -> int:
+        """Get embedding dimension"""
+        return self.dimension
+
+
+
+# Open shelve databases by path, shared by every CachedEmbeddingClient in the process
+# (dbm backends may refuse a second handle on the same file)
+_shelves = {}
+_shelves_lock = threading.Lock()
+
+
+def _open_shelf(cache_path: str):
+    """Shared (handle, lock) pair for a shelve database, opened on first use"""
+    with _shelves_lock:
+        if cache_path not in _shelves:
+            _shelves[cache_path] = (shelve.open(cache_path), threading.Lock())
+        return _shelves[cache_path]
+
+
+class CachedEmbeddingClient:
+    """
+    Disk-backed cache in front of an EmbeddingClient
+
+    Embeddings are stored as float32 bytes in a shelve database keyed by
+    sha1(model + "\0" + text), so repeated queries (within and across sessions)
+    skip the Ollama embed call entirely. The database is opened once and the
+    handle kept for the life of the process.
+    """
+
+    def __init__(self, client: EmbeddingClient, cache_path: str = "./cache/embeds.db"):
+        """
+        Initialize the cached embedding client
+
+        Args:
+            client: Underlying embedding client
+            cache_path: Path of the shelve database
+        """
+        self.client = client
+        self.model = client.model
+        self.dimension = client.dimension
+        self.cache_path = cache_path
+
+        Path(cache_path).parent.mkdir(parents=True, exist_ok=True)
+        try:
+            self._db, self._lock = _open_shelf(cache_path)
+        except Exception as e:
+            print(f"  Embedding cache unavailable, embedding without it: {str(e)}")
+            self._db, self._lock = None, threading.Lock()
+
+    def _key(self, text: str) -> str:
+        """Cache key for a text under the current model"""
+        return hashlib.sha1((self.model + "\0" + text).encode('utf-8')).hexdigest()
+
+    def embed(self, text: str) -> List[float]:
+        """
+        Generate embedding for a single text, using the cache when possible
+
+        Args:
+            text: Text to embed
+
+        Returns:
+            Embedding vector
+        """
+        if self._db is None:
+            return self.client.embed(text)
+
+        key = self._key(text)
+
+        with self._lock:
+            try:
+                cached = self._db.get(key)
+            except Exception as e:
+                print(f"  Embedding cache read error: {str(e)}")
+                cached = None
+
+        if cached is not None:
+            return array('f', cached).tolist()
+
+        embedding = self.client.embed(text)
+
+        with self._lock:
+            try:
+                self._db[key] = array('f', embedding).tobytes()
+                self._db.sync()
+            except Exception as e:
+                print(f"  Embedding cache write error: {str(e)}")
+
+        return embedding
+
     def embed_batch(self, texts: List[str]) -> List[List[float]]:
         """
         Generate embeddings for multiple texts
@@ -7,6 +7,10 @@ from typing import List, Dict, Any, Optional
 from enum import Enum
 
 
+# Display icon per provider (fallback: ☁️)
+PROVIDER_ICONS = {'aws': '🔶', 'gcp': '🔵', 'azure': '🔷'}
+
+
 class ServiceCategory(Enum):
     """Service category types"""
     COMPUTE = "compute"
@@ -239,6 +243,20 @@ class Recommendation:
     # Full data reference
     full_payload: Dict[str, Any] = field(default_factory=dict)
 
+    # Display strings, precomputed once so UI reruns don't rebuild them
+    icon: str = field(init=False, repr=False)
+    matches_short: str = field(init=False, repr=False)
+    concerns_short: str = field(init=False, repr=False)
+    features_short: str = field(init=False, repr=False)
+    specs_short: str = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.icon = PROVIDER_ICONS.get(self.provider.lower(), '☁️')
+        self.matches_short = ' | '.join(self.matches[:3])
+        self.concerns_short = ' | '.join(self.concerns[:2])
+        self.features_short = ', '.join(self.key_features[:4])
+        self.specs_short = self.specs_summary[:50] + "..." if len(self.specs_summary) > 50 else self.specs_summary
+
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for JSON serialization"""
         return {
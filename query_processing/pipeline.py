@@ -42,7 +42,8 @@ class RecommendationPipeline:
         self.scorer = MultiDimensionalScorer(config)
 
         # LLM for summary generation
-        self.llm = LLMClient(host=config.ollama.host,model=config.ollama.chat_model,temperature=config.ollama.temperature)
+        self.llm = LLMClient(host=config.ollama.host,model=config.ollama.chat_model,temperature=config.ollama.temperature,
+                             keep_alive=config.ollama.keep_alive)
 
         print("\n" + "="*80)
         print(" PIPELINE READY")
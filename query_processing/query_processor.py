@@ -25,7 +25,8 @@ class QueryProcessor:
 
         # Initialize LLM client
         self.llm = LLMClient(host=config.ollama.host, model=config.ollama.chat_model,
-            temperature=config.ollama.temperature, timeout=config.ollama.timeout)
+            temperature=config.ollama.temperature, timeout=config.ollama.timeout,
+            keep_alive=config.ollama.keep_alive)
 
         print(" QueryProcessor initialized")
 
@@ -1,12 +1,14 @@
 """
 Reranker - Stage 3
-Pairwise LLM Reranker with Sliding Window
+Listwise / Pairwise LLM Reranker with Sliding Window
 
 Based on CSCE 670 Lecture 23: Large Language Models for Ranking
-Implements PRP-Sliding approach (Qin et al., NAACL 2024)
+Implements listwise sliding-window ranking (RankGPT-style) with
+PRP-Sliding (Qin et al., NAACL 2024) as the fallback
 """
 
-from typing import List
+import re
+from typing import List, Optional
 from config import PipelineConfig, DEFAULT_CONFIG
 from models import UserRequirements, RetrievedCandidate, ScoredCandidate
 from llm_client import LLMClient
@@ -36,13 +38,14 @@ class LLMReranker:
             host=config.ollama.host,
             model=config.ollama.chat_model,
             temperature=config.ollama.temperature,
-            timeout=config.ollama.timeout
+            timeout=config.ollama.timeout,
+            keep_alive=config.ollama.keep_alive
         )
 
         # Number of bubblesort passes (k passes guarantees top-k accuracy)
         self.num_passes = min(config.top_k_results, 3)
 
-        print("✅ LLMReranker initialized (Pairwise + Sliding Window)")
+        print(f"✅ LLMReranker initialized ({config.reranking.method.capitalize()} + Sliding Window)")
 
     def _format_candidate(self, candidate: RetrievedCandidate) -> str:
         """Format a candidate for the comparison prompt"""
@@ -66,6 +69,42 @@ class LLMReranker:
 
         return "\n".join(parts)
 
+    def _pair_prompt_prefix(self, query: str) -> str:
+        """Prompt prefix shared by every pairwise comparison for a query"""
+        return f"""Given a query, which of the following two cloud services is more relevant?
+
+Query: {query}
+
+Service A:
+"""
+
+    def _list_prompt_prefix(self, query: str) -> str:
+        """Prompt prefix shared by every listwise window for a query"""
+        return f"""Rank the following cloud services by relevance to the query.
+
+Query: {query}
+
+"""
+
+    def warm(self, requirements: UserRequirements):
+        """
+        Prefill Ollama with the shared ranking-prompt prefix before reranking starts.
+
+        Meant to run concurrently with retrieval: the model is loaded and the
+        prefix is in Ollama's prompt cache by the time the first ranking call is made.
+
+        Args:
+            requirements: User requirements (uses raw_query)
+        """
+        try:
+            if self.config.reranking.method == "listwise":
+                prefix = self._list_prompt_prefix(requirements.raw_query)
+            else:
+                prefix = self._pair_prompt_prefix(requirements.raw_query)
+            self.llm.generate(prefix, max_tokens=1)
+        except Exception as e:
+            print(f"    Warning: Reranker warm-up failed ({str(e)})")
+
     def _compare_pair(self, query: str, candidate_a: RetrievedCandidate, candidate_b: RetrievedCandidate) -> str:
         """
         Compare two candidates and return which is more relevant.
@@ -76,12 +115,7 @@ class LLMReranker:
 
         Returns: "A" or "B"
         """
-        prompt = f"""Given a query, which of the following two cloud services is more relevant?
-
-Query: {query}
-
-Service A:
-{self._format_candidate(candidate_a)}
+        prompt = f"""{self._pair_prompt_prefix(query)}{self._format_candidate(candidate_a)}
 
 Service B:
 {self._format_candidate(candidate_b)}
@@ -109,35 +143,74 @@ Which service better matches the query requirements? Output only "A" or "B"."""
             print(f"    Warning: Comparison failed ({str(e)}), keeping original order")
             return "A"
 
-    def rerank(self, requirements: UserRequirements, candidates: List[RetrievedCandidate]) -> List[ScoredCandidate]:
+    def _rank_window(self, query: str, window: List[RetrievedCandidate]) -> Optional[List[RetrievedCandidate]]:
         """
-        Rerank candidates using pairwise comparisons with sliding window.
+        Rank a window of candidates with a single listwise LLM call.
 
-        Implements PRP-Sliding from Lecture 23 (Slides 27-28):
-        - Back-to-first bubblesort
-        - k passes guarantee top-k documents are correct
-        - O(k*N) API calls total
+        Returns:
+            Candidates in the LLM's order, or None if the response could not be parsed
+        """
+        listing = "\n\n".join(f"[{i}]\n{self._format_candidate(c)}" for i, c in enumerate(window, 1))
+
+        prompt = f"""{self._list_prompt_prefix(query)}{listing}
+
+Output only a JSON array of the service numbers, most relevant first, e.g. [3, 1, 2]."""
+
+        response = self.llm.generate(prompt, max_tokens=8 * len(window))
+
+        order = []
+        for token in re.findall(r'\d+', response):
+            idx = int(token) - 1
+            if 0 <= idx < len(window) and idx not in order:
+                order.append(idx)
+
+        if not order:
+            return None
+
+        # Candidates the LLM left out keep their relative order at the end
+        order.extend(i for i in range(len(window)) if i not in order)
+        return [window[i] for i in order]
+
+    def rerank_listwise(self, requirements: UserRequirements,
+                        candidates: List[RetrievedCandidate]) -> Optional[List[RetrievedCandidate]]:
+        """
+        Rerank candidates with listwise prompts over a back-to-first sliding window.
+
+        Each window of `window_size` candidates is ranked in one call; windows move
+        towards the front by `window_step`, so the best candidates bubble up in
+        ceil((N - w) / step) + 1 calls instead of ~k*N pairwise calls.
 
         Args:
             requirements: User requirements (uses raw_query)
-            candidates: List of retrieved candidates to rerank
+            candidates: Candidates to rerank
 
         Returns:
-            List of ScoredCandidate objects (ranked by position)
+            Reranked candidates, or None if any window could not be parsed
         """
-        if len(candidates) <= 1:
-            return [ScoredCandidate(candidate=c, llm_relevance_score=10.0 - i)
-                    for i, c in enumerate(candidates)]
-
-        # Limit candidates
-        candidates_to_rank = candidates[:self.config.reranking.max_candidates]
+        window_size = self.config.reranking.window_size
+        step = self.config.reranking.window_step
         query = requirements.raw_query
+        ranked = list(candidates)
+
+        start = max(len(ranked) - window_size, 0)
+        while True:
+            window = self._rank_window(query, ranked[start:start + window_size])
+            if window is None:
+                return None
+            ranked[start:start + window_size] = window
 
-        print(f"\n🔄 Reranking {len(candidates_to_rank)} candidates (pairwise sliding window)")
-        print(f"   Passes: {self.num_passes}, API calls: ~{self.num_passes * (len(candidates_to_rank) - 1)}")
+            if start == 0:
+                break
+            start = max(start - step, 0)
+
+        return ranked
+
+    def _rerank_pairwise(self, query: str, candidates: List[RetrievedCandidate]) -> List[RetrievedCandidate]:
+        """Rerank candidates with k passes of back-to-first pairwise bubblesort"""
+        print(f"   Passes: {self.num_passes}, API calls: ~{self.num_passes * (len(candidates) - 1)}")
 
         # Create working copy
-        ranked = list(candidates_to_rank)
+        ranked = list(candidates)
 
         # Perform k passes of bubblesort (back-to-first)
         for pass_num in range(self.num_passes):
@@ -154,6 +227,48 @@ Which service better matches the query requirements? Output only "A" or "B"."""
 
             print(f"   Pass {pass_num + 1}/{self.num_passes}: {swaps} swaps")
 
+        return ranked
+
+    def rerank(self, requirements: UserRequirements, candidates: List[RetrievedCandidate]) -> List[ScoredCandidate]:
+        """
+        Rerank candidates with the configured LLM ranking method.
+
+        Listwise (default): one call per sliding window of candidates.
+        Pairwise: PRP-Sliding from Lecture 23 (Slides 27-28):
+        - Back-to-first bubblesort
+        - k passes guarantee top-k documents are correct
+        - O(k*N) API calls total
+
+        Pairwise is also used whenever a listwise response cannot be parsed.
+
+        Args:
+            requirements: User requirements (uses raw_query)
+            candidates: List of retrieved candidates to rerank
+
+        Returns:
+            List of ScoredCandidate objects (ranked by position)
+        """
+        if len(candidates) <= 1:
+            return [ScoredCandidate(candidate=c, llm_relevance_score=10.0 - i)
+                    for i, c in enumerate(candidates)]
+
+        # Limit candidates
+        candidates_to_rank = candidates[:self.config.reranking.max_candidates]
+        query = requirements.raw_query
+
+        ranked = None
+        method = "listwise"
+        if self.config.reranking.method == "listwise":
+            print(f"\n🔄 Reranking {len(candidates_to_rank)} candidates (listwise sliding window)")
+            ranked = self.rerank_listwise(requirements, candidates_to_rank)
+            if ranked is None:
+                print("    Warning: Listwise ranking unparseable, falling back to pairwise")
+
+        if ranked is None:
+            method = "pairwise"
+            print(f"\n🔄 Reranking {len(candidates_to_rank)} candidates (pairwise sliding window)")
+            ranked = self._rerank_pairwise(query, candidates_to_rank)
+
         # Convert to ScoredCandidate with position-based scores
         # Higher score = better rank (top position gets highest score)
         scored_candidates = []
@@ -163,13 +278,12 @@ Which service better matches the query requirements? Output only "A" or "B"."""
             scored_candidates.append(ScoredCandidate(
                 candidate=candidate,
                 llm_relevance_score=score,
-                llm_explanation=f"Ranked #{i + 1} by pairwise comparison"
+                llm_explanation=f"Ranked #{i + 1} by {method} comparison"
             ))
 
         print(f"✅ Reranking complete")
         return scored_candidates
 
-
 if __name__ == "__main__":
     # Test the reranker
     print("\n" + "=" * 60)
@@ -3,16 +3,60 @@ Retriever - Stage 2
 Handles hybrid retrieval combining dense (vector) and sparse (BM25) search
 """
 
+import hashlib
 import math
-from typing import List, Dict, Any, Optional, Tuple
-from collections import defaultdict
+import pickle
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple, Set
+from collections import defaultdict, Counter
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+    prange = range
 
 from qdrant_client import QdrantClient
-from qdrant_client.models import Filter, FieldCondition, MatchAny
+from qdrant_client.models import (Filter, FieldCondition, MatchAny, SearchParams,
+                                  QuantizationSearchParams)
 
 from config import PipelineConfig, DEFAULT_CONFIG
 from models import UserRequirements, RetrievedCandidate
 from llm_client import EmbeddingClient
+from router import ProviderRouter
+from keyword_prefilter import KeywordPrefilter
+
+# Bump when the pickled BM25Index layout changes, so stale caches are not loaded
+BM25_CACHE_VERSION = 4
+
+
+def _compute_relevance(doc_ids, tf, idf, doc_len, avgdl, k1, b, scores_out):
+    """
+    Add one query term's BM25 contribution to every document in its posting list
+
+    Args:
+        doc_ids: Posting list (document positions), int32 array
+        tf: Term frequency of each posting, float32 array
+        idf: IDF of the term
+        doc_len: Length of every document, float32 array
+        avgdl: Average document length
+        k1: Term frequency saturation parameter
+        b: Length normalization parameter
+        scores_out: Per-document score accumulator, float32 array
+    """
+    for i in prange(doc_ids.shape[0]):
+        d = doc_ids[i]
+        f = tf[i]
+        scores_out[d] += idf * f * (k1 + 1) / (f + k1 * (1 - b + b * doc_len[d] / avgdl))
+
+
+if njit is not None:
+    _compute_relevance = njit(parallel=True, fastmath=True, cache=True)(_compute_relevance)
 
 
 class BM25Index:
@@ -28,27 +72,41 @@ class BM25Index:
         """
         self.k1 = k1
         self.b = b
-        self.documents = {}  # doc_id -> tokens
+        self.documents = {}  # doc_id -> Counter of term frequencies
         self.doc_lengths = {}
+        self.total_length = 0
         self.avg_doc_length = 0
         self.doc_freqs = defaultdict(int)  # term -> number of docs containing term
         self.inverted_index = defaultdict(set)  # term -> set of doc_ids
         self.N = 0  # total number of documents
 
+        # Array form of the index for the Numba scorer (see activate_numba_scorer)
+        self.use_numba = False
+        self._doc_index = []  # position -> doc_id
+        self._doc_position = {}  # doc_id -> position
+        self._doc_len_array = None
+        self._postings = {}  # term -> (doc positions, term frequencies)
+
+    def __getstate__(self):
+        """Pickle only the Python index; the array form is rebuilt on activation"""
+        state = self.__dict__.copy()
+        state.update(use_numba=False, _doc_index=[], _doc_position={}, _doc_len_array=None, _postings={})
+        return state
+
     def add_document(self, doc_id: str, text: str):
         """Add a document to the index"""
         tokens = self._tokenize(text)
-        self.documents[doc_id] = tokens
+        self.documents[doc_id] = Counter(tokens)
         self.doc_lengths[doc_id] = len(tokens)
 
         # Update inverted index and doc frequencies
-        unique_tokens = set(tokens)
-        for token in unique_tokens:
+        for token in self.documents[doc_id]:
             self.doc_freqs[token] += 1
             self.inverted_index[token].add(doc_id)
 
         self.N += 1
-        self.avg_doc_length = sum(self.doc_lengths.values()) / self.N
+        self.total_length += len(tokens)
+        self.avg_doc_length = self.total_length / self.N
 
     def _tokenize(self, text: str) -> List[str]:
         """Simple tokenization"""
@@ -64,18 +122,57 @@ class BM25Index:
             return 0
         return math.log((self.N - df + 0.5) / (df + 0.5) + 1)
 
-    def search(self, query: str, top_k: int = 10) -> List[Tuple[str, float]]:
+    def activate_numba_scorer(self) -> bool:
+        """
+        Switch search to the Numba-compiled scoring kernel
+
+        Builds contiguous posting-list arrays and compiles the kernel once up
+        front, so the first query doesn't pay the JIT cost.
+
+        Returns:
+            True if the Numba scorer is active
+        """
+        if np is None or njit is None:
+            print("   Numba scorer unavailable (requires numpy and numba), using Python scorer")
+            return False
+
+        self._doc_index = list(self.documents)
+        self._doc_position = position = {doc_id: i for i, doc_id in enumerate(self._doc_index)}
+        self._doc_len_array = np.array([self.doc_lengths[d] for d in self._doc_index], dtype=np.float32)
+
+        self._postings = {}
+        for term, doc_ids in self.inverted_index.items():
+            postings = list(doc_ids)
+            self._postings[term] = (
+                np.array([position[d] for d in postings], dtype=np.int32),
+                np.array([self.documents[d][term] for d in postings], dtype=np.float32)
+            )
+
+        # Pre-compile with dummy data
+        _compute_relevance(np.zeros(1, dtype=np.int32), np.ones(1, dtype=np.float32), 1.0,
+                           np.ones(1, dtype=np.float32), 1.0, self.k1, self.b, np.zeros(1, dtype=np.float32))
+
+        self.use_numba = True
+        print(f"   Numba BM25 scorer active ({len(self._postings)} posting lists)")
+        return True
+
+    def search(self, query: str, top_k: int = 10, allowed_ids: Optional[Set[str]] = None) -> List[Tuple[str, float]]:
         """
         Search for documents matching query
 
         Args:
             query: Search query
             top_k: Number of results to return
+            allowed_ids: Optional set of doc_ids to restrict the search to
 
         Returns:
             List of (doc_id, score) tuples
         """
         query_tokens = self._tokenize(query)
+
+        if self.use_numba:
+            return self._search_numba(query_tokens, top_k, allowed_ids)
+
         scores = defaultdict(float)
 
         for token in query_tokens:
@@ -85,8 +182,9 @@ class BM25Index:
             idf = self._idf(token)
 
             for doc_id in self.inverted_index[token]:
-                doc_tokens = self.documents[doc_id]
-                tf = doc_tokens.count(token)
+                if allowed_ids is not None and doc_id not in allowed_ids:
+                    continue
+                tf = self.documents[doc_id][token]
                 doc_len = self.doc_lengths[doc_id]
 
                 # BM25 scoring formula
@@ -98,21 +196,52 @@ class BM25Index:
         sorted_results = sorted(scores.items(), key=lambda x: x[1], reverse=True)
         return sorted_results[:top_k]
 
+    def _search_numba(self, query_tokens: List[str], top_k: int,
+                      allowed_ids: Optional[Set[str]]) -> List[Tuple[str, float]]:
+        """BM25 search over the posting-list arrays with the compiled kernel"""
+        # Per-query buffer: concurrent Streamlit sessions may search at once
+        scores = np.zeros(len(self._doc_index), dtype=np.float32)
+
+        for token in query_tokens:
+            if token not in self._postings:
+                continue
+            doc_ids, tf = self._postings[token]
+            _compute_relevance(doc_ids, tf, self._idf(token), self._doc_len_array, self.avg_doc_length,
+                               self.k1, self.b, scores)
+
+        if allowed_ids is not None:
+            # Keep only the allowed positions (one pass over allowed_ids, not the whole index)
+            position = self._doc_position
+            allowed = np.fromiter((position[d] for d in allowed_ids if d in position), dtype=np.int64)
+            masked = np.zeros_like(scores)
+            masked[allowed] = scores[allowed]
+            scores = masked
+
+        matched = np.flatnonzero(scores)
+        if not len(matched):
+            return []
+
+        k = min(top_k, len(matched))
+        top = matched[np.argpartition(scores[matched], -k)[-k:]]
+        top = top[np.argsort(-scores[top])]
+        return [(self._doc_index[i], float(scores[i])) for i in top]
+
 
 class HybridRetriever:
     """Hybrid retriever combining dense and sparse search"""
 
-    def __init__(self, config: PipelineConfig = DEFAULT_CONFIG):
+    def __init__(self, config: PipelineConfig = DEFAULT_CONFIG, embedder: Optional[EmbeddingClient] = None):
         """
         Initialize the hybrid retriever
 
         Args:
             config: Pipeline configuration
+            embedder: Optional pre-built embedding client (e.g. a cached one)
         """
         self.config = config
 
         # Initialize embedding client
-        self.embedder = EmbeddingClient(host=config.ollama.host, model=config.ollama.embedding_model)
+        self.embedder = embedder or EmbeddingClient(host=config.ollama.host, model=config.ollama.embedding_model)
 
         # Initialize Qdrant client
         if config.qdrant.url:
@@ -124,11 +253,99 @@ class HybridRetriever:
 
         # Initialize BM25 index
         self.bm25_index = BM25Index()
+        self.provider_doc_ids = defaultdict(set)  # provider -> doc_ids, for routed sparse search
+        self.keyword_prefilter = KeywordPrefilter()  # service family -> doc_ids, for the keyword mask
         self._build_bm25_index()
+        if config.retrieval.use_numba_bm25:
+            self.activate_numba_scorer()
+
+        # Initialize provider router
+        self.router = None
+        if config.retrieval.route_providers:
+            self.router = ProviderRouter(self.qdrant, self.collection_name, config.providers,
+                                         margin=config.retrieval.router_margin,
+                                         cache_path=self._cache_path("centroids"))
 
         print(" HybridRetriever initialized")
 
+    def activate_numba_scorer(self) -> bool:
+        """Switch sparse search to the Numba BM25 kernel (returns True if active)"""
+        return self.bm25_index.activate_numba_scorer()
+
+    def _collection_fingerprint(self) -> Optional[str]:
+        """
+        Fingerprint of the Qdrant collection contents, used to key the on-disk BM25 cache
+
+        Ingestion assigns random point ids, so the digest covers the sorted ids
+        (scrolled without payloads or vectors) as well as the collection params;
+        a recreated or re-ingested collection never matches an old cache file.
+        """
+        try:
+            info = self.qdrant.get_collection(self.collection_name)
+            digest = hashlib.blake2b(digest_size=8)
+            digest.update(f"{BM25_CACHE_VERSION}|{self.collection_name}|{info.config.params}".encode())
+
+            point_ids = []
+            offset = None
+            while True:
+                results, offset = self.qdrant.scroll(collection_name=self.collection_name, limit=1000,
+                                                     offset=offset, with_payload=False, with_vectors=False)
+                point_ids.extend(str(point.id) for point in results)
+                if not results or offset is None:
+                    break
+
+            for point_id in sorted(point_ids):
+                digest.update(point_id.encode())
+                digest.update(b"\0")
+            return digest.hexdigest()
+        except Exception as e:
+            print(f"     Could not fingerprint collection: {str(e)}")
+            return None
+
+    def _cache_path(self, prefix: str) -> Optional[Path]:
+        """Path of a pickled index (BM25, router centroids) for the current collection contents"""
+        cache_dir = self.config.retrieval.bm25_cache_dir
+        if not cache_dir:
+            return None
+
+        # Fingerprinting scrolls every point id, so it is done once per retriever
+        if not hasattr(self, '_fingerprint'):
+            self._fingerprint = self._collection_fingerprint()
+        if self._fingerprint is None:
+            return None
+
+        return Path(cache_dir) / f"{prefix}_{self._fingerprint}.pkl"
+
     def _build_bm25_index(self):
+        """Load the BM25 index from the disk cache, or build it from Qdrant and cache it"""
+        cache_path = self._cache_path("bm25")
+
+        if cache_path and cache_path.exists():
+            try:
+                with open(cache_path, 'rb') as f:
+                    self.bm25_index, provider_doc_ids, self.keyword_prefilter = pickle.load(f)
+                self.provider_doc_ids.update(provider_doc_ids)
+                print(f"    BM25 index loaded from {cache_path} ({self.bm25_index.N} documents)")
+                return
+            except Exception as e:
+                print(f"     Failed to load BM25 cache, rebuilding: {str(e)}")
+                self.bm25_index = BM25Index()
+                self.provider_doc_ids.clear()
+                self.keyword_prefilter = KeywordPrefilter()
+
+        self._fit_bm25_index()
+
+        if cache_path and self.bm25_index.N:
+            try:
+                cache_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(cache_path, 'wb') as f:
+                    pickle.dump((self.bm25_index, dict(self.provider_doc_ids), self.keyword_prefilter), f,
+                                protocol=pickle.HIGHEST_PROTOCOL)
+                print(f"    BM25 index cached to {cache_path}")
+            except Exception as e:
+                print(f"     Failed to cache BM25 index: {str(e)}")
+
+    def _fit_bm25_index(self):
         """Build BM25 index from Qdrant collection"""
         print("   Building BM25 index from Qdrant collection...")
 
@@ -149,6 +366,8 @@ class HybridRetriever:
                     payload = point.payload
                     search_text = self._create_search_text(payload)
                     self.bm25_index.add_document(str(point.id), search_text)
+                    self.provider_doc_ids[payload.get('provider', '').lower()].add(str(point.id))
+                    self.keyword_prefilter.add_document(str(point.id), search_text, payload.get('service_type'))
                     total_indexed += 1
 
                 if offset is None:
@@ -207,15 +426,45 @@ class HybridRetriever:
         # Use expanded query if available, otherwise raw query
         query = requirements.expanded_query or requirements.raw_query
 
+        # Embed once; the vector is shared by the router and dense search
+        query_embedding = None
+        try:
+            query_embedding = self.embedder.embed(query)
+        except Exception as e:
+            print(f"   ⚠️  Query embedding error: {str(e)}")
+
+        # Route to a subset of providers
+        providers = None
+        if self.router:
+            routed = self.router.route(requirements, query_embedding)
+            if routed and routed != set(self.router.providers):
+                providers = sorted(routed)
+                print(f"   Routed to providers: {', '.join(providers)}")
+
+        # Restrict to service types of the families named in the query (None = no restriction)
+        keyword_types = None
+        keyword_ids = None
+        if self.config.retrieval.use_keyword_prefilter:
+            keyword_types = self.keyword_prefilter.service_types(requirements.raw_query)
+            if keyword_types is not None:
+                keyword_ids = self.keyword_prefilter.doc_ids(keyword_types)
+                if providers:
+                    # Fall back to the full search if no routed provider offers a matched type
+                    routed_ids = set().union(*(self.provider_doc_ids.get(p, set()) for p in providers))
+                    if not keyword_ids & routed_ids:
+                        keyword_types = keyword_ids = None
+            if keyword_types is not None:
+                print(f"   Keyword prefilter: service types {', '.join(sorted(keyword_types))}")
+
         # Build filters based on requirements
-        filters = self._build_filters(requirements)
+        filters = self._build_filters(requirements, providers, keyword_types)
 
         # Dense retrieval
-        dense_results = self._dense_search(query, filters)
+        dense_results = self._dense_search(query, filters, query_embedding)
         print(f"   Dense search: {len(dense_results)} results")
 
         # Sparse retrieval (BM25)
-        sparse_results = self._sparse_search(query)
+        sparse_results = self._sparse_search(query, providers, keyword_ids)
         print(f"   Sparse search: {len(sparse_results)} results")
 
         # Fuse results
@@ -227,16 +476,27 @@ class HybridRetriever:
 
         return candidates
 
-    def _build_filters(self, requirements: UserRequirements) -> Optional[Filter]:
-        """Build Qdrant filters based on requirements"""
+    def _build_filters(self, requirements: UserRequirements, providers: Optional[List[str]] = None,
+                       keyword_types: Optional[Set[str]] = None) -> Optional[Filter]:
+        """Build Qdrant filters based on requirements, routed providers and the keyword mask"""
         conditions = []
 
-        # Filter by provider if specified
-        if requirements.preferred_providers:
+        # Restrict to the keyword prefilter's service types (an indexed payload field)
+        if keyword_types:
+            conditions.append(
+                FieldCondition(
+                    key="service_type",
+                    match=MatchAny(any=sorted(keyword_types))
+                )
+            )
+
+        # Filter by provider if routed or specified
+        providers = providers or requirements.preferred_providers
+        if providers:
             conditions.append(
                 FieldCondition(
                     key="provider",
-                    match=MatchAny(any=requirements.preferred_providers)
+                    match=MatchAny(any=providers)
                 )
             )
 
@@ -253,20 +513,31 @@ class HybridRetriever:
             return Filter(must=conditions)
         return None
 
-    def _dense_search(self, query: str, filters: Optional[Filter]) -> List[Dict[str, Any]]:
+    def _dense_search(self, query: str, filters: Optional[Filter],
+                      query_embedding: Optional[List[float]] = None) -> List[Dict[str, Any]]:
         """
         Perform dense (vector) search
 
         Args:
             query: Search query
             filters: Optional Qdrant filters
+            query_embedding: Precomputed query vector (embedded here if omitted)
 
         Returns:
             List of {id, score, payload} dicts
         """
         try:
             # Generate query embedding
-            query_embedding = self.embedder.embed(query)
+            if query_embedding is None:
+                query_embedding = self.embedder.embed(query)
+
+            # Search quantized vectors, rescoring the shortlist with full-precision ones
+            search_params = None
+            if self.config.retrieval.enable_quantization:
+                search_params = SearchParams(quantization=QuantizationSearchParams(
+                    rescore=True,
+                    oversampling=self.config.retrieval.quantization_oversampling
+                ))
 
             # Search Qdrant
             results = self.qdrant.query_points(
@@ -274,7 +545,8 @@ class HybridRetriever:
                 query=query_embedding,
                 limit=self.config.retrieval.dense_top_k,
                 query_filter=filters,
-                score_threshold=self.config.retrieval.score_threshold
+                score_threshold=self.config.retrieval.score_threshold,
+                search_params=search_params
             )
 
             # print("results from qdrant", results)
@@ -292,18 +564,28 @@ class HybridRetriever:
             print(f"   ⚠️  Dense search error: {str(e)}")
             return []
 
-    def _sparse_search(self, query: str) -> List[Dict[str, Any]]:
+    def _sparse_search(self, query: str, providers: Optional[List[str]] = None,
+                       keyword_ids: Optional[Set[str]] = None) -> List[Dict[str, Any]]:
         """
         Perform sparse (BM25) search
 
         Args:
             query: Search query
+            providers: Optional providers to restrict results to
+            keyword_ids: Optional keyword prefilter mask to restrict results to
 
         Returns:
             List of {id, score} dicts
         """
         try:
-            results = self.bm25_index.search(query, top_k=self.config.retrieval.sparse_top_k)
+            allowed_ids = None
+            if providers:
+                allowed_ids = set().union(*(self.provider_doc_ids.get(p, set()) for p in providers))
+            if keyword_ids:
+                allowed_ids = keyword_ids if allowed_ids is None else allowed_ids & keyword_ids
+
+            results = self.bm25_index.search(query, top_k=self.config.retrieval.sparse_top_k,
+                                             allowed_ids=allowed_ids)
             return [{'id': doc_id, 'score': score} for doc_id, score in results]
 
         except Exception as e:
@@ -0,0 +1,199 @@
+"""
+Provider Router - Stage 2 pre-filter
+Picks which cloud providers a query should be retrieved from, so fewer
+candidates reach the LLM reranker
+"""
+
+import math
+import pickle
+from pathlib import Path
+from typing import List, Dict, Set, Optional
+
+from qdrant_client import QdrantClient
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from models import UserRequirements
+
+
+class ProviderRouter:
+    """
+    Lightweight query router based on per-provider centroid embeddings.
+
+    Each provider is represented by the mean of its service vectors in Qdrant.
+    A query is routed to every provider whose centroid is within `margin`
+    cosine similarity of the best-matching provider. Centroids are pickled to
+    `cache_path` (keyed on the collection contents by the caller), so only the
+    first start after an ingestion scrolls the vectors.
+    """
+
+    def __init__(self, qdrant: QdrantClient, collection_name: str, providers: List[str], margin: float = 0.05,
+                 cache_path: Optional[Path] = None):
+        """
+        Initialize the router and compute provider centroids
+
+        Args:
+            qdrant: Qdrant client
+            collection_name: Collection holding the service vectors
+            providers: Providers that can be routed to
+            margin: Keep providers scoring within this much of the top provider
+            cache_path: Pickle file the centroids are loaded from / saved to (None disables)
+        """
+        self.qdrant = qdrant
+        self.collection_name = collection_name
+        self.providers = [p.lower() for p in providers]
+        self.margin = margin
+        self.centroids = {}  # provider -> unit-length centroid vector
+        self._centroid_providers = []  # row order of _centroid_matrix
+        self._centroid_matrix = None  # contiguous float32 (P, d) matrix of centroids, when numpy is available
+
+        if not self._load_centroids(cache_path):
+            self._build_centroids()
+            self._save_centroids(cache_path)
+
+        if np is not None and self.centroids:
+            self._centroid_providers = list(self.centroids)
+            self._centroid_matrix = np.ascontiguousarray(
+                [self.centroids[p] for p in self._centroid_providers], dtype=np.float32
+            )
+
+    def _load_centroids(self, cache_path: Optional[Path]) -> bool:
+        """Load centroids cached for the same providers (returns True on success)"""
+        if not cache_path or not cache_path.exists():
+            return False
+
+        try:
+            with open(cache_path, 'rb') as f:
+                providers, centroids = pickle.load(f)
+        except Exception as e:
+            print(f"     Failed to load provider centroids, rebuilding: {str(e)}")
+            return False
+
+        if providers != sorted(self.providers):
+            return False
+
+        self.centroids = centroids
+        print(f"    Provider centroids loaded from {cache_path}")
+        return True
+
+    def _save_centroids(self, cache_path: Optional[Path]):
+        """Pickle the centroids next to the BM25 cache"""
+        if not cache_path or not self.centroids:
+            return
+
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(cache_path, 'wb') as f:
+                pickle.dump((sorted(self.providers), self.centroids), f, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            print(f"     Failed to cache provider centroids: {str(e)}")
+
+    def _build_centroids(self):
+        """Compute the mean service vector of each provider from Qdrant"""
+        print("   Building provider centroids for routing...")
+
+        sums = {}
+        counts = {}
+
+        try:
+            offset = None
+
+            while True:
+                results, offset = self.qdrant.scroll(collection_name=self.collection_name, limit=256, offset=offset,
+                                                     with_payload=["provider"], with_vectors=True)
+
+                if not results:
+                    break
+
+                # Group this page's vectors by provider
+                page_vectors = {}
+                for point in results:
+                    provider = (point.payload or {}).get('provider', '').lower()
+                    vector = point.vector
+                    if provider not in self.providers or not isinstance(vector, list):
+                        continue
+                    page_vectors.setdefault(provider, []).append(vector)
+
+                for provider, vectors in page_vectors.items():
+                    counts[provider] = counts.get(provider, 0) + len(vectors)
+
+                    if np is not None:
+                        sums[provider] = sums.get(provider, 0) + np.asarray(vectors, dtype=np.float32).sum(axis=0)
+                        continue
+
+                    acc = sums.setdefault(provider, [0.0] * len(vectors[0]))
+                    for vector in vectors:
+                        for i, v in enumerate(vector):
+                            acc[i] += v
+
+                if offset is None:
+                    break
+
+        except Exception as e:
+            print(f"     Failed to build provider centroids: {str(e)}")
+            return
+
+        for provider, acc in sums.items():
+            self.centroids[provider] = self._normalize([float(v) / counts[provider] for v in acc])
+
+        print(f"    Provider centroids built for: {', '.join(sorted(self.centroids)) or 'none'}")
+
+    @staticmethod
+    def _normalize(vector: List[float]) -> List[float]:
+        """Scale a vector to unit length"""
+        norm = math.sqrt(sum(v * v for v in vector))
+        if norm == 0:
+            return vector
+        return [v / norm for v in vector]
+
+    def score(self, query_embedding: List[float]) -> Dict[str, float]:
+        """
+        Cosine similarity of a query embedding to each provider centroid
+
+        Args:
+            query_embedding: Query vector
+
+        Returns:
+            Dict of provider -> similarity
+        """
+        if self._centroid_matrix is not None:
+            # One matrix-vector product over all centroids
+            query_vec = np.asarray(query_embedding, dtype=np.float32)
+            norm = np.linalg.norm(query_vec)
+            if norm:
+                query_vec /= norm
+            scores = self._centroid_matrix @ query_vec
+            return dict(zip(self._centroid_providers, scores.tolist()))
+
+        query_vec = self._normalize(list(query_embedding))
+        return {
+            provider: sum(q * c for q, c in zip(query_vec, centroid))
+            for provider, centroid in self.centroids.items()
+        }
+
+    def route(self, requirements: UserRequirements, query_embedding: Optional[List[float]] = None) -> Set[str]:
+        """
+        Select the providers to retrieve from
+
+        Args:
+            requirements: User requirements (explicit provider hints win)
+            query_embedding: Query vector used for centroid scoring
+
+        Returns:
+            Set of provider names
+        """
+        # (a) Explicit provider hints from the query
+        if requirements.preferred_providers:
+            return {p.lower() for p in requirements.preferred_providers}
+
+        # No centroids or no embedding: don't restrict anything
+        if not self.centroids or query_embedding is None:
+            return set(self.providers)
+
+        # (b) Centroid similarity, (c) soft threshold around the best provider
+        scores = self.score(query_embedding)
+        best = max(scores.values())
+        return {p for p, s in scores.items() if s >= best - self.margin}
@@ -0,0 +1,293 @@
+"""
+Semantic Query Cache
+Returns stored pipeline results for queries that are paraphrases of earlier ones
+"""
+
+import math
+import pickle
+import re
+import threading
+from collections import deque
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+from llm_client import EmbeddingClient
+
+
+# Numbers in a query, with an optional thousands / millions suffix ("10,000", "1.5k", "$50")
+NUMBER_PATTERN = re.compile(r'(\d[\d,]*(?:\.\d+)?)\s*([km])?\b', re.IGNORECASE)
+NUMBER_SUFFIXES = {'k': 1e3, 'm': 1e6}
+
+
+def numeric_constraints(query: str) -> str:
+    """
+    Normalized numbers of a query (budgets, user counts, sizes), sorted
+
+    Paraphrases embed close together even when their numbers differ, so these
+    are part of the cache key: "Postgres for 1k users under $50" never hits
+    the entry for "Postgres for 100k users under $500".
+    """
+    values = []
+    for number, suffix in NUMBER_PATTERN.findall(query):
+        try:
+            value = float(number.replace(',', '')) * NUMBER_SUFFIXES.get(suffix.lower(), 1)
+        except ValueError:
+            continue
+        values.append(value)
+    return ','.join(f"{v:g}" for v in sorted(values))
+
+
+class SemanticQueryCache:
+    """
+    Cache of pipeline results keyed by query embedding.
+
+    A lookup embeds the query and returns the stored result of the most similar
+    earlier query (cosine similarity >= threshold) within the same namespace
+    and with the same numeric constraints (see numeric_constraints). Each namespace has its own index, so entries of other configs never crowd
+    out a hit. Uses a FAISS inner-product index when faiss is installed,
+    otherwise one float32 matrix-vector product with numpy, and a plain Python
+    scan as the last resort (fine for the few hundred entries a session produces).
+
+    Entries are persisted to an append-only pickle log: each put appends one
+    record, and the log is rewritten only when evicted records make up most of it.
+    """
+
+    def __init__(self, embedder: EmbeddingClient, path: Optional[str] = "./cache/semantic_cache.pkl",
+                 threshold: float = 0.92, max_entries: int = 1000):
+        """
+        Initialize the cache and load any persisted entries
+
+        Args:
+            embedder: Client used to embed queries
+            path: Pickle log the cache is persisted to (None keeps it in memory)
+            threshold: Minimum cosine similarity for a hit
+            max_entries: Oldest entries are dropped beyond this size
+        """
+        self.embedder = embedder
+        self.path = Path(path) if path else None
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._file_lock = threading.Lock()
+
+        # namespace -> {'vectors': unit-length embeddings, 'entries': parallel {query, namespace, result},
+        #               'index': FAISS index or None, 'matrix': float32 (N, d) copy for the numpy path}
+        self.spaces = {}
+        self._order = deque()  # namespace of every entry, oldest first (for eviction)
+        self._log_records = 0  # records in the log file, including evicted ones
+
+        self._load()
+
+    def _normalize(self, vector: List[float]) -> List[float]:
+        """Scale a vector to unit length"""
+        norm = math.sqrt(sum(v * v for v in vector))
+        if norm == 0:
+            return list(vector)
+        return [v / norm for v in vector]
+
+    def _space(self, namespace: str) -> Dict[str, Any]:
+        """Entries and index of one namespace (created on first use)"""
+        if namespace not in self.spaces:
+            self.spaces[namespace] = {'vectors': [], 'entries': [], 'index': None, 'matrix': None}
+        return self.spaces[namespace]
+
+    def _rebuild_index(self, space: Dict[str, Any]):
+        """Rebuild a namespace's FAISS index (or numpy matrix) from its stored vectors"""
+        space['index'] = None
+        space['matrix'] = None
+
+        if np is None or not space['vectors']:
+            return
+
+        matrix = np.ascontiguousarray(space['vectors'], dtype=np.float32)
+        if faiss is not None:
+            space['index'] = faiss.IndexFlatIP(matrix.shape[1])
+            space['index'].add(matrix)
+        else:
+            space['matrix'] = matrix
+
+    def _search(self, vector: List[float], namespace: str) -> Optional[Dict[str, Any]]:
+        """Find the most similar stored entry in a namespace above the threshold"""
+        space = self.spaces.get(namespace)
+        if not space or not space['vectors']:
+            return None
+
+        if space['index'] is not None:
+            scores, ids = space['index'].search(np.asarray([vector], dtype=np.float32), 1)
+            score, i = float(scores[0][0]), int(ids[0][0])
+        elif space['matrix'] is not None:
+            scores = space['matrix'] @ np.asarray(vector, dtype=np.float32)
+            i = int(np.argmax(scores))
+            score = float(scores[i])
+        else:
+            score, i = max((sum(q * v for q, v in zip(vector, stored)), i)
+                           for i, stored in enumerate(space['vectors']))
+
+        if i < 0 or score < self.threshold:
+            return None
+        return space['entries'][i]
+
+    def get(self, query: str, namespace: str = "") -> Optional[Dict[str, Any]]:
+        """
+        Look up the result of a semantically similar earlier query
+
+        Args:
+            query: User query
+            namespace: Partition key (e.g. a pipeline config hash)
+
+        Returns:
+            Cached result, or None on a miss
+        """
+        try:
+            vector = self._normalize(self.embedder.embed(query))
+        except Exception as e:
+            print(f"  Semantic cache lookup failed: {str(e)}")
+            return None
+
+        with self._lock:
+            entry = self._search(vector, f"{namespace}|{numeric_constraints(query)}")
+
+        if entry is None:
+            return None
+
+        print(f"  Semantic cache hit: \"{query[:60]}\" ~ \"{entry['query'][:60]}\"")
+        return entry['result']
+
+    def put(self, query: str, result: Dict[str, Any], namespace: str = ""):
+        """
+        Store a pipeline result for a query
+
+        Args:
+            query: User query
+            result: Pipeline results to return for similar queries
+            namespace: Partition key (e.g. a pipeline config hash)
+        """
+        try:
+            vector = self._normalize(self.embedder.embed(query))
+        except Exception as e:
+            print(f"  Semantic cache store failed: {str(e)}")
+            return
+
+        entry = {'query': query, 'namespace': f"{namespace}|{numeric_constraints(query)}", 'result': result}
+
+        # Puts are serialized on the log file; lookups only wait for the in-memory add
+        with self._file_lock:
+            with self._lock:
+                self._add(vector, entry)
+                snapshot = self._snapshot() if self._log_records + 1 > 2 * self.max_entries else None
+
+            if snapshot is not None:
+                self._rewrite_log(snapshot)
+            else:
+                self._append_log(vector, entry)
+
+    def _add(self, vector: List[float], entry: Dict[str, Any], rebuild: bool = True):
+        """Add an entry, evicting the oldest ones beyond max_entries (caller holds the lock)"""
+        namespace = entry['namespace']
+        space = self._space(namespace)
+        space['vectors'].append(vector)
+        space['entries'].append(entry)
+        self._order.append(namespace)
+
+        changed = {namespace}
+        while len(self._order) > self.max_entries:
+            # The oldest entry overall is the first entry of its namespace
+            oldest_namespace = self._order.popleft()
+            oldest = self.spaces[oldest_namespace]
+            del oldest['vectors'][0]
+            del oldest['entries'][0]
+            changed.add(oldest_namespace)
+
+        if not rebuild:
+            return
+
+        for changed_namespace in changed:
+            changed_space = self.spaces[changed_namespace]
+            if not changed_space['entries']:
+                del self.spaces[changed_namespace]
+            elif changed_namespace == namespace and len(changed) == 1 and changed_space['index'] is not None:
+                changed_space['index'].add(np.asarray([vector], dtype=np.float32))
+            else:
+                self._rebuild_index(changed_space)
+
+    def _snapshot(self) -> List[tuple]:
+        """All live (vector, entry) records, oldest first (caller holds the lock)"""
+        positions = dict.fromkeys(self.spaces, 0)
+        records = []
+        for namespace in self._order:
+            space = self.spaces[namespace]
+            i = positions[namespace]
+            records.append((space['vectors'][i], space['entries'][i]))
+            positions[namespace] = i + 1
+        return records
+
+    def _load(self):
+        """Load persisted entries from the log on disk"""
+        if not self.path or not self.path.exists():
+            return
+
+        records = 0
+        try:
+            with open(self.path, 'rb') as f:
+                while True:
+                    try:
+                        record = pickle.load(f)
+                    except EOFError:
+                        break
+                    records += 1
+
+                    vector, entry = record
+                    self._add(vector, entry, rebuild=False)
+        except Exception as e:
+            # A truncated last record (e.g. from a crash mid-append) keeps what was read
+            print(f"  Semantic cache log ended early: {str(e)}")
+
+        for namespace, space in list(self.spaces.items()):
+            if space['entries']:
+                self._rebuild_index(space)
+            else:
+                del self.spaces[namespace]
+        print(f"  Semantic cache loaded: {len(self._order)} entries")
+
+        self._log_records = records
+        if records > len(self._order):
+            self._rewrite_log(self._snapshot())
+
+    def _append_log(self, vector: List[float], entry: Dict[str, Any]):
+        """Append one record to the log (caller holds the file lock)"""
+        if not self.path:
+            return
+
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'ab') as f:
+                pickle.dump((vector, entry), f, protocol=pickle.HIGHEST_PROTOCOL)
+            self._log_records += 1
+        except Exception as e:
+            print(f"  Failed to save semantic cache: {str(e)}")
+
+    def _rewrite_log(self, records: List[tuple]):
+        """Replace the log with only the live records, dropping evicted ones (caller holds the file lock)"""
+        if not self.path:
+            return
+
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix('.tmp')
+            with open(tmp_path, 'wb') as f:
+                for record in records:
+                    pickle.dump(record, f, protocol=pickle.HIGHEST_PROTOCOL)
+            tmp_path.replace(self.path)
+            self._log_records = len(records)
+        except Exception as e:
+            print(f"  Failed to save semantic cache: {str(e)}")